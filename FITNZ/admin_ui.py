@@ -4,6 +4,8 @@ from tkinter import ttk
 from ttkbootstrap.dialogs import Messagebox
 import ttkbootstrap as bs
 from . import database_mysql as db
+from . import notify
+from .reports_ui import GridPager
 
 # ===============================================
 # Code Owner: Imran (US: Admin Panel for managing users)
@@ -11,6 +13,9 @@ from . import database_mysql as db
 # ===============================================
 
 class AdminPage(bs.Toplevel):
+    PAGE_SIZE = 100
+    COUNT_CAP = 5000  # totals past this show as "5000+"
+
     def __init__(self, parent, logged_in_user):
         super().__init__(parent)
         self.logged_in_user = logged_in_user
@@ -50,12 +55,34 @@ class AdminPage(bs.Toplevel):
             bootstyle="info"
         )
         tree_frame.grid(row=0, column=0, sticky="nsew")
-        tree_frame.grid_rowconfigure(0, weight=1)
+        tree_frame.grid_rowconfigure(1, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
+        # Search and role filter (run in the database, one page at a time)
+        filter_bar = ttk.Frame(tree_frame)
+        filter_bar.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        ttk.Label(filter_bar, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_bar, textvariable=self.search_var, width=24)
+        search_entry.pack(side="left", padx=(5, 15))
+        search_entry.bind("<Return>", lambda e: self.load_users())
+        ttk.Label(filter_bar, text="Role:").pack(side="left")
+        self.role_var = tk.StringVar(value="All")
+        role_box = ttk.Combobox(
+            filter_bar,
+            textvariable=self.role_var,
+            values=["All", "Customer", "Employee", "Manager", "Owner", "Developer"],
+            state="readonly",
+            width=12
+        )
+        role_box.pack(side="left", padx=(5, 15))
+        role_box.bind("<<ComboboxSelected>>", lambda e: self.load_users())
+        ttk.Button(filter_bar, text="🔍 Search", command=self.load_users,
+                   bootstyle="primary-outline").pack(side="left")
+
         # Treeview container
         tree_container = ttk.Frame(tree_frame)
-        tree_container.grid(row=0, column=0, sticky="nsew")
+        tree_container.grid(row=1, column=0, sticky="nsew")
         tree_container.grid_rowconfigure(0, weight=1)
         tree_container.grid_columnconfigure(0, weight=1)
 
@@ -89,13 +116,21 @@ class AdminPage(bs.Toplevel):
         )
         scrollbar.grid(row=0, column=1, sticky="ns")
         self.user_tree.configure(yscrollcommand=scrollbar.set)
+
+        pager_controls = ttk.Frame(tree_frame)
+        pager_controls.grid(row=2, column=0, sticky="e", pady=(10, 0))
+        self.pager = GridPager(
+            self.user_tree, pager_controls, self.fetch_users, self.render_user,
+            {"ID": "user_id", "Username": "username", "Role": "role", "Name": "name"},
+            sort="user_id", page_size=self.PAGE_SIZE, count_cap=self.COUNT_CAP
+        )
         
         # Load users
         self.load_users()
 
         # Action buttons
         action_frame = ttk.Frame(tree_frame)
-        action_frame.grid(row=0, column=1, sticky="ns", padx=(15, 0))
+        action_frame.grid(row=1, column=1, sticky="ns", padx=(15, 0))
         
         ttk.Button(
             action_frame, 
@@ -129,26 +164,31 @@ class AdminPage(bs.Toplevel):
         add_win = AddUserPage(self, self.logged_in_user)
         add_win.grab_set()
 
+    def fetch_users(self, sort, descending, page, page_size):
+        role = self.role_var.get()
+        filters = {"role": "" if role == "All" else role, "search": self.search_var.get().strip()}
+        return db.browse_users(sort, descending, filters, page, page_size, self.COUNT_CAP)
+
+    def render_user(self, user):
+        return (user["user_id"], user["username"], user["role"], user["name"])
+
     def load_users(self):
-        for i in self.user_tree.get_children(): 
-            self.user_tree.delete(i)
-        for user in db.get_all_users():
-            user_id = getattr(user, 'employee_id', getattr(user, '_customer_id', 'N/A'))
-            name = getattr(user, 'name', getattr(user, '_name', 'N/A'))
-            self.user_tree.insert("", "end", iid=user_id, values=(user_id, user.username, user.role, name))
+        """Back to page 1 with the current search, role filter and sort."""
+        self.pager.reload(first_page=True)
 
     def delete_user(self):
-        selected_item_id = self.user_tree.focus()
-        if not selected_item_id: 
+        focused = self.user_tree.focus()
+        if not focused: 
             Messagebox.show_warning("Please select a user to delete.", "No Selection", parent=self)
             return
+        selected_item_id = str(self.user_tree.item(focused)["values"][0])
         if selected_item_id == "E001": 
             Messagebox.show_error("Cannot delete the primary developer account.", "Error", parent=self)
             return
-        if Messagebox.yesno(f"Are you sure you want to delete user ID {selected_item_id}?", "Confirm Deletion", parent=self):
+        if notify.confirm(self, f"Are you sure you want to delete user ID {selected_item_id}?", "Confirm Deletion"):
             if db.delete_user_by_id(selected_item_id):
                 Messagebox.show_info("User deleted successfully.", "Success", parent=self)
-                self.load_users()
+                self.pager.reload()
             else: 
                 Messagebox.show_error("Failed to delete user.", "Error", parent=self)
 
@@ -256,7 +296,6 @@ class AddUserPage(bs.Toplevel):
 # helper to refresh users list (auto-added by fixer)
 def _auto_refresh_users(ui):
     try:
-        users = db.get_all_users()
         if hasattr(ui, 'load_users'):
             ui.load_users()
     except:
@@ -0,0 +1,49 @@
+# File: FITNZ/benchmarks/bench_checkout.py
+"""
+Checkout throughput through the headless CheckoutService (no Tk).
+
+Runs against a throwaway SQLite database so the real one is untouched:
+each iteration builds a basket, prices it and commits the sale.
+
+    python -m FITNZ.benchmarks.bench_checkout --sales 2000 --items 4
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from .. import database_mysql as db
+from ..checkout import CheckoutService
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless checkout throughput benchmark")
+    parser.add_argument("--sales", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=4, help="distinct products per basket")
+    args = parser.parse_args(argv)
+
+    folder = tempfile.mkdtemp(prefix="fitnz_bench_")
+    db.DB_PATH = os.path.join(folder, "bench.sqlite3")
+    db.setup_database()
+    products = db.get_all_products()
+    for p in products:
+        db.update_product(p.product_id, p.name, p.price, 10 ** 9)
+    products = db.get_all_products()
+    customer = db.get_user_by_username("alice")
+
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for _ in range(args.sales):
+        svc = CheckoutService(customer)
+        for p in rng.sample(products, min(args.items, len(products))):
+            svc.add(p, rng.randint(1, 3))
+        svc.checkout("Card")
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.sales:,} sales in {elapsed:.2f}s  {args.sales / elapsed:,.0f} checkouts/s  (db: {db.DB_PATH})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# File: FITNZ/benchmarks/bench_models_memory.py
+"""
+Memory benchmark for the resident product catalogue.
+
+Builds N Product objects (1,000,000 by default) and reports the traced
+allocation per object, next to an equivalent dict-backed class so the
+saving from __slots__ is visible.
+
+    python -m FITNZ.benchmarks.bench_models_memory --count 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from ..models.product import Product
+
+
+class _DictProduct:
+    """Same shape as Product but without __slots__ (the old layout)."""
+    def __init__(self, product_id, name, price, stock):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.stock = stock
+
+
+def measure(cls, count):
+    """Return (total_bytes, seconds) to materialise `count` instances of cls."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    catalogue = [cls(f"P{i:07d}", f"Product {i}", 9.99 + (i % 500), i % 200) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del catalogue
+    gc.collect()
+    return used, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Product catalogue memory benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of products to load")
+    args = parser.parse_args(argv)
+
+    print(f"Loading {args.count:,} products")
+    results = {}
+    for label, cls in (("dict-backed", _DictProduct), ("slots (Product)", Product)):
+        used, elapsed = measure(cls, args.count)
+        results[label] = used
+        print(f"{label:<18} {used / 1024 / 1024:>9.1f} MiB  {used / args.count:>7.1f} B/product  {elapsed:>6.2f}s")
+
+    saved = results["dict-backed"] - results["slots (Product)"]
+    print(f"Saved {saved / 1024 / 1024:.1f} MiB ({saved / results['dict-backed']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# File: FITNZ/benchmarks/bench_pricing.py
+"""
+Throughput benchmark for the pricing engine (baskets priced per second).
+
+Prices random baskets against a plan with a few multi-buy and category
+rules, first with the plan compiled once (the normal path) and then
+recompiling for every basket, and finally simulates the cart's hot path:
+repricing the same basket after each quantity change.
+
+    python -m FITNZ.benchmarks.bench_pricing --baskets 20000 --items 12
+"""
+
+import argparse
+import random
+import time
+
+from .. import pricing
+from ..models.customer import Customer
+from ..models.product import Product
+
+CATEGORIES = ("nutrition", "weights", "yoga", "accessories", "cardio")
+
+
+class _CatalogueProduct(Product):
+    __slots__ = ("category",)
+
+    def __init__(self, product_id, name, price, stock, category):
+        super().__init__(product_id, name, price, stock)
+        self.category = category
+
+
+def _catalogue(size):
+    return [_CatalogueProduct(f"P{i:04d}", f"Product {i}", round(5 + (i * 7.3) % 200, 2), 100,
+                              CATEGORIES[i % len(CATEGORIES)]) for i in range(size)]
+
+
+def _rules(catalogue):
+    return [pricing.MultiBuy(p.product_id, 2, 1) for p in catalogue[::25]] + \
+           [pricing.CategoryDiscount("nutrition", 0.10), pricing.CategoryDiscount("yoga", 0.05)]
+
+
+def _time(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:>9.1f} ms  {count / elapsed:>12,.0f} baskets/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pricing engine throughput benchmark")
+    parser.add_argument("--baskets", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=12, help="distinct products per basket")
+    parser.add_argument("--catalogue", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    catalogue = _catalogue(args.catalogue)
+    rules = _rules(catalogue)
+    baskets = [[{'product': p, 'quantity': rng.randint(1, 4)} for p in rng.sample(catalogue, args.items)]
+               for _ in range(args.baskets)]
+    member = Customer("U001", "Bench", "", "bench", "x")
+    member.membership_level = "Silver"
+
+    plan = pricing.compile_rules(rules)
+    _time("compiled plan", args.baskets,
+          lambda: [plan.price(b, member, False, 50) for b in baskets])
+    _time("recompile per basket", args.baskets,
+          lambda: [pricing.compile_rules(rules).price(b, member, False, 50) for b in baskets])
+
+    # Cart hot path: bump one line's quantity and reprice the whole basket.
+    basket = baskets[0]
+    def reprice():
+        for n in range(args.baskets):
+            basket[n % len(basket)]['quantity'] = 1 + n % 5
+            plan.price(basket, member, False, 0)
+    _time("reprice on qty change", args.baskets, reprice)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# File: FITNZ/benchmarks/bench_row_mappers.py
+"""
+Microbenchmark: the old per-row, by-name mapping (kept here as the
+baseline; the row_to_* helpers it copies are gone from database_mysql)
+vs the precompiled row mappers.
+
+Fills an in-memory SQLite `users` table (same schema as setup_database)
+and maps every row the way get_all_users does, once per strategy.
+
+    python -m FITNZ.benchmarks.bench_row_mappers --users 100000
+"""
+
+import argparse
+import sqlite3
+import time
+
+from .. import database_mysql as db
+from ..models.customer import Customer
+from ..models.employee import Employee
+
+
+def _build_users(count):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, username TEXT UNIQUE,
+            password TEXT, role TEXT, name TEXT, contact TEXT, address TEXT,
+            membership_level TEXT DEFAULT 'Standard', loyalty_points INTEGER DEFAULT 0
+        )""")
+    conn.executemany(
+        "INSERT INTO users (user_id, username, password, role, name, contact, address, membership_level, loyalty_points) "
+        "VALUES (?,?,?,?,?,?,?,?,?)",
+        ((f"U{i:06d}", f"user{i}", "secret", "Employee" if i % 20 == 0 else "Customer",
+          f"User {i}", f"user{i}@example.com", "1 Queen St", "Silver", i % 1000) for i in range(count)),
+    )
+    return conn
+
+
+def _legacy_customer(row):
+    keys = row.keys
+    cust = Customer(row['user_id'] if 'user_id' in keys() else "",
+                    row['name'] if 'name' in keys() else "",
+                    row['contact'] if 'contact' in keys() else "",
+                    row['username'] if 'username' in keys() else "",
+                    row['password'] if 'password' in keys() else "")
+    cust.loyalty_points = int(row['loyalty_points']) if 'loyalty_points' in keys() and row['loyalty_points'] is not None else 0
+    cust.membership_level = row['membership_level'] if 'membership_level' in keys() else 'Standard'
+    cust.address = row['address'] if 'address' in keys() else ""
+    return cust
+
+
+def _legacy_employee(row):
+    keys = row.keys
+    return Employee(row['user_id'] if 'user_id' in keys() else "",
+                    row['name'] if 'name' in keys() else "",
+                    row['role'] if 'role' in keys() else "",
+                    row['username'] if 'username' in keys() else "",
+                    row['password'] if 'password' in keys() else "")
+
+
+def _legacy(cur, rows):
+    result = []
+    for r in rows:
+        role_val = r['role'] if 'role' in r.keys() else ''
+        result.append(_legacy_customer(r) if role_val and role_val.lower() == 'customer' else _legacy_employee(r))
+    return result
+
+
+def _compiled(cur, rows):
+    to_user = db.mapper_for(cur, "user")
+    return [to_user(r) for r in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Row mapper microbenchmark")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    conn = _build_users(args.users)
+    cur = conn.execute("SELECT * FROM users")
+    rows = cur.fetchall()
+
+    timings = {}
+    for label, fn in (("by-name (legacy)", _legacy), ("mapper_for (compiled)", _compiled)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn(cur, rows)
+            best = min(best, time.perf_counter() - start)
+        timings[label] = best
+        print(f"{label:<24} {best * 1000:>9.1f} ms  {args.users / best:>12,.0f} rows/s")
+
+    legacy, compiled = timings.values()
+    print(f"Speed-up: {legacy / compiled:.1f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
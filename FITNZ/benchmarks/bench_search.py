@@ -0,0 +1,181 @@
+# File: FITNZ/benchmarks/bench_search.py
+"""
+Recall and latency of the trigram product search (FITNZ.search) on
+synthetic catalogues, in memory (no database).
+
+Each query takes one or two words from a random product name and puts a
+typo into one of them (drop, double, swap or replace a letter). A query
+counts as recalled when a product containing all the intended words is in
+the top --k results; the old substring search is scored the same way for
+comparison. The run fails (exit 1) if recall drops under --min-recall or
+p95 latency goes over --max-p95-ms at any size.
+
+Before the synthetic sizes, a fixed fixture of real misspellings
+("protien", "dumbell", a mistyped SKU, ...) over a small catalogue must
+put the intended product first; any miss also fails the run. That part
+takes milliseconds, so --fixture-only can gate every change to search.py.
+The thresholds above are the acceptance gate for the synthetic catalogues.
+
+    python -m FITNZ.benchmarks.bench_search --fixture-only
+    python -m FITNZ.benchmarks.bench_search --sizes 1000,10000,100000
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from ..search import TrigramIndex, normalize
+
+BRANDS = ("Optimum", "Musclepharm", "Rogue", "Reebok", "Nike", "Harbinger", "Gaiam", "Manduka",
+          "Bowflex", "Trigger", "Kinetic", "Ironclad", "Summit", "Velocity", "Everlast", "Titan")
+ITEMS = ("Whey Protein", "Creatine Monohydrate", "Pre-Workout", "BCAA", "Multivitamin", "Protein Bar",
+         "Dumbbell", "Kettlebell", "Barbell", "Weight Plate", "Adjustable Bench", "Squat Rack",
+         "Yoga Mat", "Foam Roller", "Resistance Band", "Jump Rope", "Lifting Straps", "Gloves",
+         "Electrolyte", "Casein", "Treadmill", "Rowing Machine", "Skipping Rope", "Ab Wheel")
+VARIANTS = ("Chocolate", "Vanilla", "Strawberry", "Unflavoured", "Black", "Blue", "Red", "Pro",
+            "Lite", "Max", "Eco", "Plus", "Elite", "Classic", "Sport", "Travel")
+SIZES = ("250g", "500g", "1kg", "2kg", "5kg", "2.5kg", "10kg", "20kg", "6mm", "8mm", "1m", "3m")
+
+
+# Fixed recall fixture: each query must rank its product first.
+FIXTURE_PRODUCTS = (
+    ("P001", "Resistance Band - Light", "BND001"),
+    ("P002", "Yoga Mat - Eco", "MAT001"),
+    ("P003", "Dumbbell 5kg", "WGT001"),
+    ("P004", "Protein Powder 1kg", "PRT001"),
+    ("P005", "Kettlebell 12kg", "WGT002"),
+    ("P006", "Creatine Monohydrate 500g", "SUP001"),
+    ("P007", "Foam Roller", "REC001"),
+    ("P008", "Skipping Rope", "CRD001"),
+    ("P009", "Whey Protein Bar Chocolate", "SUP002"),
+    ("P010", "Adjustable Bench", "BEN001"),
+    ("P011", "Barbell Olympic 20kg", "WGT003"),
+    ("P012", "Electrolyte Tablets", "SUP003"),
+)
+FIXTURE_QUERIES = (
+    ("protien", "P004"), ("dumbell", "P003"), ("kettelbell", "P005"), ("yoga matt", "P002"),
+    ("resistnce band", "P001"), ("creatin", "P006"), ("fom roler", "P007"), ("skiping rope", "P008"),
+    ("barbel", "P011"), ("electrolite", "P012"), ("adjustible bench", "P010"),
+    ("wey protein bar", "P009"), ("bnd001", "P001"), ("wgt02", "P005"),
+)
+
+
+def check_fixture():
+    """Run FIXTURE_QUERIES; returns the failures (empty when every query ranks its product first)."""
+    index = TrigramIndex()
+    index.rebuild(FIXTURE_PRODUCTS)
+    failures = []
+    for query, expected in FIXTURE_QUERIES:
+        ids = index.search(query, limit=3)
+        if not ids or ids[0] != expected:
+            failures.append(f"{query!r} -> {ids} (want {expected} first)")
+    print(f"fixture: {len(FIXTURE_QUERIES) - len(failures)}/{len(FIXTURE_QUERIES)} misspellings found first")
+    return failures
+
+
+def catalogue(n, rng):
+    for i in range(1, n + 1):
+        name = f"{rng.choice(BRANDS)} {rng.choice(ITEMS)} {rng.choice(VARIANTS)} {rng.choice(SIZES)}"
+        yield f"S{i:06d}", name, f"SKU{i:06d}"
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + word[i + 1:]                       # drop
+    if kind == 1:
+        return word[:i] + word[i] + word[i:]                 # double
+    if kind == 2:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]  # swap
+    return word[:i] + rng.choice("aeiounrst") + word[i + 1:]  # replace
+
+
+def make_queries(docs, count, rng):
+    queries = []
+    for _ in range(count):
+        _, name, _ = rng.choice(docs)
+        words = [w for w in normalize(name).split() if w.isalpha() and len(w) > 3]
+        if not words:
+            continue
+        picked = rng.sample(words, min(len(words), rng.choice((1, 2))))
+        noisy = list(picked)
+        j = rng.randrange(len(noisy))
+        noisy[j] = typo(noisy[j], rng)
+        queries.append((" ".join(noisy), picked))
+    return queries
+
+
+def _relevant(text, words):
+    tokens = set(text.split())
+    return all(w in tokens for w in words)
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def run_size(n, args, rng):
+    docs = list(catalogue(n, rng))
+    texts = {pid: normalize(f"{name} {sku} {pid}") for pid, name, sku in docs}
+    index = TrigramIndex()
+    start = time.perf_counter()
+    index.rebuild(docs)
+    build = time.perf_counter() - start
+
+    queries = make_queries(docs, args.queries, rng)
+    latencies, hits, substring_hits = [], 0, 0
+    for query, words in queries:
+        start = time.perf_counter()
+        ids = index.search(query, limit=args.k)
+        latencies.append(time.perf_counter() - start)
+        if any(_relevant(texts[pid], words) for pid in ids):
+            hits += 1
+        needle = normalize(query)
+        if any(needle in text for text in texts.values()):
+            substring_hits += 1
+
+    recall = hits / len(queries)
+    print(f"{n:>8,} products  build {build:6.2f}s  recall@{args.k} {recall:6.1%}  "
+          f"(substring {substring_hits / len(queries):6.1%})  "
+          f"p50 {_pct(latencies, .5):6.2f} ms  p95 {_pct(latencies, .95):6.2f} ms  p99 {_pct(latencies, .99):6.2f} ms")
+
+    # incremental maintenance: re-index a slice of products one at a time
+    start = time.perf_counter()
+    for pid, name, sku in docs[:1000]:
+        index.add(pid, name + " v2", sku)
+    per_update = (time.perf_counter() - start) / min(1000, len(docs))
+    print(f"{'':>8}           incremental update {per_update * 1e6:7.1f} us/product")
+    return recall, _pct(latencies, .95)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trigram product search recall/latency benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10, help="results inspected for recall")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--max-p95-ms", type=float, default=25.0)
+    parser.add_argument("--fixture-only", action="store_true", help="run only the fixed recall fixture")
+    args = parser.parse_args(argv)
+
+    failures = check_fixture()
+    sizes = () if args.fixture_only else (int(s) for s in args.sizes.split(",") if s)
+    for n in sizes:
+        recall, p95 = run_size(n, args, random.Random(args.seed))
+        if recall < args.min_recall:
+            failures.append(f"recall {recall:.1%} < {args.min_recall:.0%} at {n:,}")
+        if p95 > args.max_p95_ms:
+            failures.append(f"p95 {p95:.1f} ms > {args.max_p95_ms} ms at {n:,}")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
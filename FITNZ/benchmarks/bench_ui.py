@@ -0,0 +1,238 @@
+# File: FITNZ/benchmarks/bench_ui.py
+"""
+UI responsiveness benchmark: drives the staff MainAppPage in a real Tk
+root (mapped under Xvfb, or withdrawn with --withdrawn) against throwaway
+databases with growing catalogues, and times
+
+    load_products, search_products per keystroke, update_sale_display,
+    CartPage construction + populate_cart, opening ProductDetailsPage
+
+at each --catalogue size and --carts size. Every timing includes the
+update_idletasks() that follows, so geometry and redraw are counted.
+Event-loop latency is measured with an after() heartbeat while a
+simulated typist drives the search box through real <KeyRelease> events;
+the report gives p50/p95/p99/max lateness of the heartbeat.
+
+Needs a display. With no $DISPLAY, an Xvfb on PATH is started for the run:
+
+    python -m FITNZ.benchmarks.bench_ui --catalogue 100,1000,10000 --carts 1,10,100
+    xvfb-run python -m FITNZ.benchmarks.bench_ui --json ui.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+from .. import database_mysql as db
+from .. import datagen
+
+TYPED = "whey pro"
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def _summary(values):
+    return {"n": len(values), "median_ms": statistics.median(values) * 1000,
+            "p95_ms": _pct(values, .95), "max_ms": max(values) * 1000}
+
+
+def _start_xvfb():
+    """Start a private Xvfb if there is no display; returns the process (or None)."""
+    if os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        sys.exit("no $DISPLAY and no Xvfb on PATH: run under xvfb-run or a desktop session")
+    display = f":{90 + os.getpid() % 100}"
+    proc = subprocess.Popen([xvfb, display, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+class _Controller:
+    """Stands in for AppController; the benchmark never logs out."""
+
+    def show_login_page(self):
+        pass
+
+
+class LoopProbe:
+    """after() heartbeat that records how late each tick fires."""
+
+    def __init__(self, root, interval_ms=10):
+        self.root = root
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.lateness = []
+        self._due = None
+        self._job = None
+
+    def start(self):
+        self._due = time.perf_counter() + self.interval
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lateness.append(max(0.0, now - self._due))
+        self._due = now + self.interval
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+
+def _timed(root, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        root.update_idletasks()
+        samples.append(time.perf_counter() - start)
+    root.update()
+    return samples
+
+
+def _typing_latency(root, page, interval_ms, keystroke_ms, rounds):
+    """Type TYPED into the search box `rounds` times through the event loop."""
+    probe = LoopProbe(root, interval_ms)
+    keys = list(TYPED) * rounds
+    entry = page.search_entry
+
+    def press(i=0):
+        if i and i % len(TYPED) == 0:
+            entry.delete(0, "end")
+        if i == len(keys):
+            root.after(keystroke_ms, root.quit)
+            return
+        entry.insert("end", keys[i])
+        entry.event_generate("<KeyRelease>")
+        root.after(keystroke_ms, press, i + 1)
+
+    entry.delete(0, "end")
+    probe.start()
+    root.after(keystroke_ms, press)
+    root.mainloop()
+    probe.stop()
+    return probe.lateness
+
+
+def run_catalogue(root, size, carts, repeat, args):
+    folder = tempfile.mkdtemp(prefix="fitnz_bench_ui_")
+    datagen.main(["--db", os.path.join(folder, "ui.sqlite3"), "--products", str(size),
+                  "--customers", "200", "--sales", "0"])
+    user = db.authenticate_user("manager", "man123")
+    customer = db.get_user_by_username("alice")
+    products = db.get_all_products()
+
+    from ..main_app_ui import MainAppPage, ProductDetailsPage
+    from ..customer_ui import CartPage
+
+    results = {}
+    page = MainAppPage(root, _Controller(), user)
+    page.grid(row=0, column=0, sticky="nsew")
+    root.update()
+
+    results["load_products"] = _summary(_timed(root, page.load_products, repeat))
+
+    keystrokes = []
+    for _ in range(repeat):
+        page.search_var.set("")
+        for ch in TYPED:
+            page.search_var.set(page.search_var.get() + ch)
+            keystrokes += _timed(root, page.search_products, 1)
+    results["search_keystroke"] = _summary(keystrokes)
+
+    for n in carts:
+        page.sale_items = [{'product': products[i % len(products)], 'quantity': 1 + i % 3} for i in range(n)]
+        results[f"update_sale_display[{n}]"] = _summary(_timed(root, page.update_sale_display, repeat))
+
+        cart = [products[i % len(products)] for i in range(n)]
+        opened = []
+        results[f"CartPage.open[{n}]"] = _summary(
+            _timed(root, lambda: opened.append(CartPage(root, cart, customer)), repeat))
+        results[f"CartPage.populate_cart[{n}]"] = _summary(_timed(root, opened[-1].populate_cart, repeat))
+        for w in opened:
+            w.destroy()
+    page.sale_items = []
+    page.update_sale_display()
+
+    opened = []
+    results["ProductDetailsPage.open"] = _summary(
+        _timed(root, lambda: opened.append(ProductDetailsPage(root, products[len(products) // 2], "Manager")), repeat))
+    for w in opened:
+        w.destroy()
+
+    lateness = _typing_latency(root, page, args.tick, args.keystroke, args.rounds)
+    results["event_loop_lateness"] = {
+        "n": len(lateness), "p50_ms": _pct(lateness, .5), "p95_ms": _pct(lateness, .95),
+        "p99_ms": _pct(lateness, .99), "max_ms": max(lateness, default=0) * 1000}
+
+    page.destroy()
+    root.update()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Tk UI responsiveness benchmark")
+    parser.add_argument("--catalogue", default="100,1000,10000", help="comma-separated generated product counts")
+    parser.add_argument("--carts", default="1,10,100", help="comma-separated cart sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tick", type=int, default=10, help="heartbeat interval in ms")
+    parser.add_argument("--keystroke", type=int, default=80, help="simulated typist interval in ms")
+    parser.add_argument("--rounds", type=int, default=3, help="times to type the search phrase")
+    parser.add_argument("--withdrawn", action="store_true", help="keep the root window unmapped")
+    parser.add_argument("--json", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    xvfb = _start_xvfb()
+    try:
+        import ttkbootstrap as bs
+        try:
+            root = bs.Window(themename="cyborg")
+        except tk.TclError as e:
+            sys.exit(f"cannot start Tk: {e}")
+        root.geometry("1400x900")
+        root.grid_rowconfigure(0, weight=1)
+        root.grid_columnconfigure(0, weight=1)
+        if args.withdrawn:
+            root.withdraw()
+
+        carts = [int(n) for n in args.carts.split(",") if n]
+        report = {}
+        for size in (int(s) for s in args.catalogue.split(",") if s):
+            results = run_catalogue(root, size, carts, args.repeat, args)
+            for name, r in results.items():
+                key = f"{name}@{size}"
+                report[key] = r
+                if "median_ms" in r:
+                    print(f"{key:<40} median {r['median_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  max {r['max_ms']:>9.2f} ms")
+                else:
+                    print(f"{key:<40} p50 {r['p50_ms']:>7.2f} ms  p95 {r['p95_ms']:>7.2f} ms  "
+                          f"p99 {r['p99_ms']:>7.2f} ms  max {r['max_ms']:>7.2f} ms  (n={r['n']})")
+        root.destroy()
+    finally:
+        if xvfb:
+            xvfb.terminate()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
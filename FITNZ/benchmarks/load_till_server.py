@@ -0,0 +1,117 @@
+# File: FITNZ/benchmarks/load_till_server.py
+"""
+Load generator for till_server: N concurrent keep-alive clients on localhost
+issuing a mix of product lookups, basket pricing and sales.
+
+With --spawn (the default) a server is started in-process on a throwaway
+copy of the database, so the real one is untouched; use --no-spawn to hit
+a server you started yourself.
+
+    python -m FITNZ.benchmarks.load_till_server --clients 32 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from .. import database_mysql as db
+from .. import till_server
+
+
+async def _request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, requests, product_ids, mix, rng, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            roll = rng.random()
+            items = [{"product_id": pid, "qty": rng.randint(1, 2)} for pid in rng.sample(product_ids, min(3, len(product_ids)))]
+            if roll < mix[0]:
+                kind, args = "lookup", ("GET", "/products?ids=" + ",".join(i["product_id"] for i in items))
+            elif roll < mix[0] + mix[1]:
+                kind, args = "price", ("POST", "/price", {"items": items, "customer_id": "C101"})
+            else:
+                kind, args = "sale", ("POST", "/sales", {"items": items})
+            start = time.perf_counter()
+            status = await _request(reader, writer, *args)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def run(args):
+    server_task = None
+    if args.spawn:
+        folder = tempfile.mkdtemp(prefix="fitnz_load_")
+        db.DB_PATH = os.path.join(folder, "load.sqlite3")
+        db.setup_database()
+        for p in db.get_all_products():
+            db.update_product(p.product_id, p.name, p.price, 10 ** 9)
+        ready = asyncio.Event()
+        server_task = asyncio.ensure_future(till_server.serve(args.host, args.port, args.pool, args.ttl, ready))
+        await ready.wait()
+
+    product_ids = [p.product_id for p in db.get_all_products()] if args.spawn else args.products.split(",")
+    mix = tuple(float(x) for x in args.mix.split(","))
+    latencies, statuses = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(args.host, args.port, args.requests, product_ids, mix, random.Random(i), latencies, statuses)
+        for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = args.clients * args.requests
+    print(f"{total:,} requests from {args.clients} clients in {elapsed:.2f}s  {total / elapsed:,.0f} req/s  status={statuses}")
+    for kind, values in sorted(latencies.items()):
+        print(f"  {kind:<7} n={len(values):>6}  p50={_pct(values, .5):7.2f} ms  p95={_pct(values, .95):7.2f} ms  p99={_pct(values, .99):7.2f} ms")
+
+    if server_task:
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for till_server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--mix", default="0.6,0.3,0.1", help="lookup,price,sale fractions")
+    parser.add_argument("--pool", type=int, default=8)
+    parser.add_argument("--ttl", type=float, default=5.0)
+    parser.add_argument("--spawn", action=argparse.BooleanOptionalAction, default=True,
+                        help="start a server on a throwaway database first")
+    parser.add_argument("--products", default="P001,P002,P003,P004", help="product ids when not spawning")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# File: FITNZ/benchmarks/suite.py
+"""
+Benchmark suite for the database hot paths, with JSON output and
+regression checks against a saved baseline.
+
+Each --scales entry is a sales-table size. For each one a database is
+generated once with FITNZ.datagen and cached under --data-dir, so later
+runs reuse it. The cases are:
+
+    authenticate_user, get_all_products, get_product_by_id,
+    process_sale with 1/10/100-line carts,
+    get_all_sales, order history (get_orders_by_customer)
+
+    python -m FITNZ.benchmarks.suite --scales 10000,1000000 --save baseline.json
+    python -m FITNZ.benchmarks.suite --scales 10000,1000000 --baseline baseline.json
+
+The second run exits with status 1 if any case's median is slower than
+the baseline by more than --threshold (default 1.25x). --engine mysql
+runs against the MySQL server configured in database.env; the data is
+generated into that database, so point it at a scratch schema.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from .. import database_mysql as db
+from .. import datagen
+from .. import db_queries as q
+
+
+def _prepare(scale, data_dir, engine, seed):
+    """Generate (or reuse) the dataset for `scale` and point database_mysql at it."""
+    args = ["--products", "1000", "--customers", str(max(100, scale // 20)),
+            "--sales", str(scale), "--years", "2", "--seed", str(seed), "--batch", "20000"]
+    if engine != "sqlite":
+        print(f"generating {scale:,} sales ...")
+        datagen.main(args)
+        return
+    os.makedirs(data_dir, exist_ok=True)
+    pristine = os.path.join(data_dir, f"bench_{scale}_s{seed}.sqlite3")
+    if not os.path.exists(pristine):
+        print(f"generating {scale:,} sales ...")
+        datagen.main(args + ["--db", pristine])
+        # fold the WAL back in so the file can be copied on its own
+        conn = sqlite3.connect(pristine)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+    # process_sale writes, so every run works on a fresh copy of the data
+    db.release_pool()
+    db.DB_PATH = os.path.join(data_dir, f"run_{scale}_s{seed}.sqlite3")
+    shutil.copyfile(pristine, db.DB_PATH)
+
+
+def _restock():
+    conn = db.get_conn()
+    q.execute(conn, "datagen.restock", (10 ** 9,))
+    conn.commit()
+    conn.close()
+
+
+def _top_customer():
+    conn = db.get_conn()
+    row = q.execute(conn, "datagen.top_customer").fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def _measure(fn, repeat, budget=0.2):
+    """Median/min seconds per call; calls per sample auto-sized to ~budget seconds."""
+    start = time.perf_counter()
+    fn()
+    once = max(time.perf_counter() - start, 1e-7)
+    number = max(1, min(10000, int(budget / once)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    median = statistics.median(samples)
+    return {"median_ms": median * 1000, "min_ms": min(samples) * 1000,
+            "ops_per_s": 1 / median if median else 0.0, "calls": number * repeat}
+
+
+def run_cases(scale, repeat):
+    _restock()
+    products = db.get_all_products()
+    customer = db.get_user_by_user_id(_top_customer() or "C101")
+    carts = {n: [products[i % len(products)] for i in range(n)] for n in (1, 10, 100)}
+    cases = {
+        "authenticate_user": lambda: db.authenticate_user("alice", "alice123"),
+        "get_all_products": db.get_all_products,
+        "get_product_by_id": lambda: db.get_product_by_id(products[len(products) // 2].product_id),
+        "get_all_sales": db.get_all_sales,
+        "order_history": lambda: db.get_orders_by_customer(customer._customer_id),
+    }
+    for n, cart in carts.items():
+        cases[f"process_sale_{n}_lines"] = lambda cart=cart: db.process_sale(customer, cart, 0, False, "2030-01-01")
+
+    results = {}
+    for name, fn in cases.items():
+        key = f"{name}@{scale}"
+        results[key] = _measure(fn, repeat)
+        r = results[key]
+        print(f"{key:<32} median {r['median_ms']:>10.3f} ms  min {r['min_ms']:>10.3f} ms  {r['ops_per_s']:>10,.1f} ops/s")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print per-case ratios against `baseline`; return the names that regressed."""
+    regressions = []
+    print(f"\n{'case':<32} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+    for key, r in results.items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            print(f"{key:<32} {'-':>12} {r['median_ms']:>10.3f}   (new)")
+            continue
+        ratio = r["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{key:<32} {base['median_ms']:>12.3f} {r['median_ms']:>10.3f} {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FitNZ database hot-path benchmark suite")
+    parser.add_argument("--scales", default="10000", help="comma-separated sales-table sizes, e.g. 10000,1000000")
+    parser.add_argument("--engine", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "fitnz_bench_data"))
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this saved results JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.engine == "mysql":
+        if db.mysql is None:
+            try:
+                import mysql.connector as connector
+            except ImportError:
+                sys.exit("mysql-connector-python is not installed")
+            db.mysql = connector
+        db.USE_MYSQL = True
+
+    results = {}
+    for scale in (int(s) for s in args.scales.split(",") if s):
+        _prepare(scale, args.data_dir, args.engine, args.seed)
+        results.update(run_cases(scale, args.repeat))
+
+    report = {
+        "meta": {"created": datetime.now().isoformat(timespec="seconds"), "engine": args.engine,
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "scales": args.scales, "repeat": args.repeat},
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved {args.save}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.2f}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
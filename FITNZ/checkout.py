@@ -0,0 +1,218 @@
+# File: FITNZ/checkout.py
+# ===============================================
+# Code Owner: Sahil (US: Complete my purchase by providing payment details)
+# Headless checkout: cart, pricing, stock checks, payment validation and
+# sale commit without any Tk. The checkout pages drive this; scripts,
+# kiosks and benchmarks can use it directly.
+# ===============================================
+"""
+    svc = CheckoutService(customer)
+    svc.add("P001", 2)
+    svc.redeem_points(50)
+    quote = svc.quote()
+    receipt = svc.checkout("Card", card={"number": "4242424242424242", "expiry": "12/30", "cvv": "123"})
+
+checkout() returns the receipt dict used by receipts.render_*(). Any
+problem (unknown product, not enough stock, too many points, bad card,
+failed commit) raises CheckoutError with a message fit for the UI.
+"""
+
+import re
+from datetime import date, datetime
+
+from . import database_mysql as db
+from . import pricing
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class PaymentError(CheckoutError):
+    pass
+
+
+# ------------------------- payment validation -------------------------
+
+def luhn_check(card_number):
+    n = re.sub(r"\D", "", card_number or "")
+    if len(n) < 12:
+        return False
+    digits = [int(d) for d in n]
+    odd_sum = sum(digits[-1::-2])
+    even_sum = sum(sum(divmod(2 * d, 10)) for d in digits[-2::-2])
+    return (odd_sum + even_sum) % 10 == 0
+
+def validate_expiry(mm_yy):
+    """MM/YY (or MM/YYYY) not earlier than the current month."""
+    try:
+        m, y = (int(part) for part in mm_yy.strip().split("/"))
+        if y < 100:
+            y += 2000
+        now = datetime.now()
+        return 1 <= m <= 12 and (y, m) >= (now.year, now.month)
+    except Exception:
+        return False
+
+def validate_cvv(cvv):
+    return bool(re.fullmatch(r"\d{3,4}", (cvv or "").strip()))
+
+def validate_payment(card):
+    """
+    Validate the card fields that are present in `card` (name, number,
+    expiry, cvv). Raises PaymentError on the first problem.
+    """
+    if "name" in card and not (card["name"] or "").strip():
+        raise PaymentError("Cardholder name is required.")
+    if "number" in card and not luhn_check(card["number"]):
+        raise PaymentError("Invalid card number.")
+    if "expiry" in card and not validate_expiry(card["expiry"] or ""):
+        raise PaymentError("Invalid expiry (use MM/YY).")
+    if "cvv" in card and not validate_cvv(card["cvv"]):
+        raise PaymentError("Invalid CVV (3 or 4 digits).")
+
+
+def _positive_qty(qty):
+    """Quantity as an int >= 1; anything else would sell negative stock."""
+    if isinstance(qty, float) and not qty.is_integer():
+        raise CheckoutError(f"Invalid quantity: {qty!r}.")
+    try:
+        qty = int(qty)
+    except (TypeError, ValueError):
+        raise CheckoutError(f"Invalid quantity: {qty!r}.")
+    if qty < 1:
+        raise CheckoutError("Quantity must be at least 1.")
+    return qty
+
+
+# ------------------------------ service ------------------------------
+
+class CheckoutService:
+    """One basket being checked out. Not thread-safe; use one per till/session."""
+
+    def __init__(self, customer=None, student=False, employee=None, plan=None):
+        self.customer = customer
+        self.employee = employee
+        self.student = bool(student)
+        self.points = 0
+        self.plan = plan or pricing.default_plan()
+        self._lines = {}  # product_id -> [product, qty], in the order added
+
+    @classmethod
+    def from_cart(cls, cart, customer=None, student=False, points=0, employee=None):
+        """Build a service from any cart shape the UI uses (see pricing.basket_lines)."""
+        svc = cls(customer, student, employee)
+        for pid, product, qty in pricing.basket_lines(cart):
+            svc._lines[pid] = [product, _positive_qty(qty)]
+        # The cart page has already checked the points against the balance;
+        # process_sale's guarded debit is the final word.
+        svc.points = int(points or 0)
+        return svc
+
+    # ----- cart -----
+    def add(self, product, qty=1):
+        """Add a Product (or product id) and return its line quantity."""
+        if not hasattr(product, "product_id"):
+            found = db.get_product_by_id(product)
+            if not found:
+                raise CheckoutError(f"Product {product} not found.")
+            product = found
+        line = self._lines.get(product.product_id)
+        new_qty = (line[1] if line else 0) + _positive_qty(qty)
+        self._check_stock(product, new_qty)
+        if line:
+            line[1] = new_qty
+        else:
+            self._lines[product.product_id] = [product, new_qty]
+        return new_qty
+
+    def set_quantity(self, product_id, qty):
+        """Set a line's quantity; 0 removes the line."""
+        line = self._lines.get(product_id)
+        if not line:
+            raise CheckoutError(f"Product {product_id} is not in the cart.")
+        if qty == 0 and not isinstance(qty, bool):
+            return self.remove(product_id)
+        qty = _positive_qty(qty)
+        self._check_stock(line[0], qty)
+        line[1] = qty
+
+    def remove(self, product_id):
+        self._lines.pop(product_id, None)
+
+    def clear(self):
+        self._lines.clear()
+        self.points = 0
+
+    @property
+    def items(self):
+        return [{'product': p, 'quantity': q} for p, q in self._lines.values()]
+
+    def _check_stock(self, product, qty):
+        stock = getattr(product, "stock", None)
+        if stock is not None and qty > stock:
+            raise CheckoutError(f"Only {stock} of {product.name} in stock.")
+
+    # ----- discounts -----
+    def set_customer(self, customer):
+        self.customer = customer
+        self.points = 0
+
+    def apply_student(self, on=True):
+        self.student = bool(on)
+
+    def redeem_points(self, points):
+        points = int(points)
+        available = int(getattr(self.customer, "loyalty_points", 0) or 0)
+        if points < 0:
+            raise CheckoutError("Points cannot be negative.")
+        if points and self.customer is None:
+            raise CheckoutError("Select a customer to redeem points.")
+        if points > available:
+            raise CheckoutError(f"Only {available} points available.")
+        self.points = points
+
+    def quote(self):
+        return self.plan.price(self.items, self.customer, self.student, self.points)
+
+    # ----- commit -----
+    def checkout(self, payment_method="Card", card=None, delivery_date=None):
+        """
+        Validate payment, record the sale (stock is decremented only if every
+        line is still available) and return the receipt dict.
+        """
+        if not self._lines:
+            raise CheckoutError("The cart is empty.")
+        if card is not None:
+            validate_payment(card)
+
+        # The sale is stored from this quote, so a custom plan's prices are
+        # what both the receipt and the sales table show.
+        quote = self.quote()
+        ok, remaining_points, gst_total, grand_total = db.process_sale(
+            self.customer, self.items, quote.points_used, self.student, delivery_date or date.today(),
+            quote=quote)
+        if not ok:
+            raise CheckoutError("Failed to record the sale (stock or points may have changed).")
+
+        if self.customer is not None and remaining_points is not None:
+            self.customer.loyalty_points = remaining_points
+
+        now = datetime.now()
+        receipt = {
+            'items': [{'name': l.name, 'price': l.unit_price, 'quantity': l.qty, 'total': l.total}
+                      for l in quote.lines],
+            'subtotal': quote.subtotal,
+            'discount': quote.discount,
+            'points_redeemed': quote.points_used,
+            'remaining_points': remaining_points,
+            'gst': gst_total,
+            'total': grand_total,
+            'payment_method': payment_method,
+            'customer': self.customer.get_name() if self.customer else "Walk-in Customer",
+            'employee': getattr(self.employee, "name", ""),
+            'date': now.strftime("%Y-%m-%d"),
+            'time': now.strftime("%H:%M:%S"),
+        }
+        self.clear()
+        return receipt
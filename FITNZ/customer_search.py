@@ -0,0 +1,174 @@
+# File: FITNZ/customer_search.py
+# ===============================================
+# Code Owner: Om (Initial Developer/Core Structure)
+# Type-ahead customer picker for the staff sale screen.
+# ===============================================
+"""
+The picker never loads the member list. Each pause in typing runs
+db.search_customers, three LIMITed prefix range scans (user_id, name,
+contact) on indexes, so it costs the same at 500 members or 500k.
+CustomerLookup keeps the last few customers it served in a small LRU with
+a short expiry: a regular coming back to the till, or the same customer
+being re-selected after a sale, skips the full user query.
+"""
+
+import time
+import tkinter as tk
+from collections import OrderedDict
+
+import ttkbootstrap as ttk
+
+from . import database_mysql as db
+from . import metrics
+
+
+class CustomerLookup:
+    """Prefix search plus an LRU of recently served Customer objects."""
+
+    def __init__(self, limit=8, cache_size=64, ttl=120.0):
+        self.limit = limit
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self._recent = OrderedDict()  # user_id -> (expires, customer)
+
+    def search(self, text):
+        return db.search_customers(text, self.limit)
+
+    def get(self, user_id):
+        entry = self._recent.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._recent.move_to_end(user_id)
+            metrics.CACHE.inc(cache="customers", result="hit")
+            return entry[1]
+        metrics.CACHE.inc(cache="customers", result="miss")
+        customer = db.get_user_by_user_id(user_id)
+        if customer is None:
+            self._recent.pop(user_id, None)
+            return None
+        self._recent[user_id] = (time.monotonic() + self.ttl, customer)
+        self._recent.move_to_end(user_id)
+        while len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+        return customer
+
+    def forget(self, user_id):
+        """Drop a cached customer whose points or tier just changed."""
+        self._recent.pop(user_id, None)
+
+    def recent(self, n=None):
+        """Cached customers, most recently served first (shown before anything is typed)."""
+        now = time.monotonic()
+        out = [c for expires, c in reversed(self._recent.values()) if expires > now]
+        return out[:n or self.limit]
+
+
+class CustomerPicker(ttk.Frame):
+    """
+    Entry with a drop-down of matches. on_select(customer) is called with
+    the chosen Customer, or None for a walk-in.
+    """
+
+    DEBOUNCE_MS = 150
+    NAV_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab"}
+
+    def __init__(self, parent, on_select, lookup=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_select = on_select
+        self.lookup = lookup or CustomerLookup()
+        self.matches = []
+        self._job = None
+
+        self.text_var = tk.StringVar(value="")
+        self.entry = ttk.Entry(self, textvariable=self.text_var, font=("Segoe UI", 10))
+        self.entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        ttk.Button(self, text="🚶 Walk-in", command=self.walk_in, bootstyle="primary-outline",
+                   width=15).grid(row=0, column=1, sticky="ew")
+        self.listbox = tk.Listbox(self, height=6, font=("Segoe UI", 10), activestyle="dotbox",
+                                  exportselection=False)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.entry.bind("<KeyRelease>", self.on_key)
+        self.entry.bind("<FocusIn>", lambda e: self.show_recent())
+        self.entry.bind("<Down>", self.focus_matches)
+        self.entry.bind("<Return>", lambda e: self.choose(0))
+        self.entry.bind("<Escape>", lambda e: self.hide())
+        self.listbox.bind("<Return>", lambda e: self.choose_selected())
+        self.listbox.bind("<ButtonRelease-1>", lambda e: self.choose_selected())
+        self.listbox.bind("<Escape>", lambda e: (self.hide(), self.entry.focus_set()))
+
+    def on_key(self, event):
+        if event.keysym in self.NAV_KEYS:
+            return
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._job = self.after(self.DEBOUNCE_MS, self.refresh)
+
+    @metrics.ui_handler("customer_search")
+    def refresh(self):
+        self._job = None
+        text = self.text_var.get().strip()
+        if not text:
+            self.show_recent()
+            return
+        self.show([(m["user_id"], self.describe(m["name"], m["user_id"], m["contact"], m["membership_level"]))
+                   for m in self.lookup.search(text)])
+
+    def show_recent(self):
+        if self.text_var.get().strip():
+            return
+        self.show([(c._customer_id, self.describe(c.get_name(), c._customer_id, c._contact,
+                                                  getattr(c, "membership_level", "")))
+                   for c in self.lookup.recent()])
+
+    @staticmethod
+    def describe(name, user_id, contact, tier):
+        return f"{name} ({user_id}) · {contact or '-'} · {tier or 'Standard'}"
+
+    def show(self, matches):
+        self.matches = matches
+        self.listbox.delete(0, "end")
+        for _, label in matches:
+            self.listbox.insert("end", label)
+        if matches:
+            self.listbox.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+        else:
+            self.hide()
+
+    def hide(self):
+        self.listbox.grid_remove()
+
+    def focus_matches(self, event=None):
+        if self.matches:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, "end")
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+        return "break"
+
+    def choose_selected(self):
+        selected = self.listbox.curselection()
+        if selected:
+            self.choose(selected[0])
+
+    def choose(self, index):
+        if self._job is not None:
+            # Enter pressed before the debounce fired: search now
+            self.after_cancel(self._job)
+            self.refresh()
+        if index >= len(self.matches):
+            return
+        user_id = self.matches[index][0]
+        customer = self.lookup.get(user_id)
+        self.hide()
+        if customer is None:
+            self.text_var.set("")
+            self.on_select(None)
+            return
+        self.text_var.set(f"{customer.get_name()} ({user_id})")
+        self.entry.icursor("end")
+        self.on_select(customer)
+
+    def walk_in(self):
+        self.text_var.set("")
+        self.hide()
+        self.on_select(None)
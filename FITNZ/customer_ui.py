@@ -8,6 +8,10 @@ from ttkbootstrap.dialogs import Messagebox
 
 # Import your database module
 from . import database_mysql as db
+from . import pricing
+from . import metrics
+from . import notify
+from .checkout import CheckoutService, CheckoutError
 
 # ===============================================
 # Code Owner: Om (US: Add to cart, View cart, Subtotal)
@@ -43,6 +47,10 @@ class CartPage(bs.Toplevel):
         main_frame.grid_rowconfigure(1, weight=1)
         main_frame.grid_columnconfigure(0, weight=1)
 
+        # Status bar for success messages (see notify)
+        self.status_bar = notify.StatusBar(self)
+        self.status_bar.grid(row=1, column=0, sticky="ew")
+
         # Header
         header_frame = ttk.Frame(main_frame)
         header_frame.grid(row=0, column=0, sticky="ew", pady=(0, 15))
@@ -219,6 +227,7 @@ class CartPage(bs.Toplevel):
         # Populate cart
         self.populate_cart()
 
+    @metrics.ui_handler("populate_cart")
     def populate_cart(self):
         """Fill the treeview with current cart contents and update summary."""
         for i in self.cart_tree.get_children():
@@ -262,22 +271,12 @@ class CartPage(bs.Toplevel):
 
     def update_summary(self):
         """Recalculate subtotal, discounts and total, update labels."""
-        self.subtotal = sum(float(getattr(item, "price", 0.0)) for item in self.cart)
-
-        # Calculate discount rate
-        if self.student_discount_applied:
-            discount_rate = 0.20
-        else:
-            discount_rate = getattr(self.customer, "get_discount_rate", lambda: 0.0)()
-        
-        discount_amount = self.subtotal * discount_rate
-
-        # Points conversion: 1 point = $0.10
-        points_discount = float(self.points_to_redeem) * 0.10
-        total_discount = discount_amount + points_discount
-
-        # Prevent negative totals
-        self.total = max(0.0, self.subtotal - total_discount)
+        # One pass through the compiled pricing plan (promotions, member or
+        # student rate, points at $0.10 capped at the basket value).
+        quote = pricing.price_basket(self.cart, self.customer, self.student_discount_applied, self.points_to_redeem)
+        self.subtotal = quote.subtotal
+        total_discount = quote.discount + quote.points_discount
+        self.total = quote.net
 
         self.subtotal_label.config(text=f"${self.subtotal:.2f}")
         self.discount_label.config(text=f"-${total_discount:.2f}")
@@ -328,23 +327,23 @@ class CartPage(bs.Toplevel):
 
         self.points_to_redeem = points
         self.update_summary()
-        Messagebox.show_info(f"{points} points applied successfully.", "Points Redeemed", parent=self)
+        notify.success(self, f"{points} points applied successfully.", "Points Redeemed")
 
     def apply_student_discount(self):
         """Apply student discount."""
         if self.student_discount_applied:
-            Messagebox.show_info("Student discount is already applied.", "Info", parent=self)
+            notify.info(self, "Student discount is already applied.")
             return
             
-        ok = Messagebox.yesno(
+        ok = notify.confirm(
+            self,
             "Apply 20% Student Discount?\n\nThis will override your current membership discount for this purchase.",
             "Confirm Student Discount",
-            parent=self,
         )
         if ok:
             self.student_discount_applied = True
             self.update_summary()
-            Messagebox.show_info("20% student discount applied!", "Discount Applied", parent=self)
+            notify.success(self, "20% student discount applied!", "Discount Applied")
 
     def open_checkout(self):
         """Open checkout window."""
@@ -640,19 +639,13 @@ class CheckoutPage(bs.Toplevel):
             return
 
         try:
-            success = db.process_sale(
-                self.customer,
-                self.cart,
-                self.points_redeemed,
-                self.student_discount_applied,
-                self.delivery_date
-            )
- 
-            if success:
-                self.show_success()
-            else:
-                Messagebox.show_error("Failed to process sale.", "Error", parent=self)
+            CheckoutService.from_cart(
+                self.cart, self.customer, self.student_discount_applied, self.points_redeemed
+            ).checkout("Card", delivery_date=self.delivery_date)
+            self.show_success()
 
+        except CheckoutError as e:
+            Messagebox.show_error(f"Failed to process sale: {e}", "Error", parent=self)
         except Exception as e:
             Messagebox.show_error(f"Error: {e}", "Payment Error", parent=self)
 
@@ -696,6 +689,8 @@ class MembershipPage(bs.Toplevel):
         super().__init__(parent)
         self.parent = parent
         self.customer = customer
+        # Resolve the customer's user_id once; the DB updates key on it alone.
+        self.customer_id = getattr(customer, "_customer_id", getattr(customer, "customer_id", None))
 
         self.title("⭐ Manage Membership - Fit NZ")
         self.geometry("480x550")
@@ -817,7 +812,7 @@ class MembershipPage(bs.Toplevel):
         new_level = selection.split(" ")[0]
 
         try:
-            ok = db.update_customer_membership(getattr(self.customer, "_customer_id", getattr(self.customer, "customer_id", None)), new_level)
+            ok = db.update_customer_membership(self.customer_id, new_level)
         except Exception as e:
             ok = False
             print("Error updating membership in DB:", e)
@@ -835,7 +830,7 @@ class MembershipPage(bs.Toplevel):
 
     def upgrade_to_student(self):
         try:
-            ok = db.upgrade_to_student_membership(getattr(self.customer, "_customer_id", getattr(self.customer, "customer_id", None)))
+            ok = db.upgrade_to_student_membership(self.customer_id)
         except Exception as e:
             ok = False
             print("Error upgrading to student membership:", e)
@@ -1,8 +1,15 @@
 
-import os, sqlite3
-from datetime import datetime
-from types import SimpleNamespace
+import os, sqlite3, threading, time
+from datetime import datetime, timedelta
+from operator import itemgetter
 from .models.product import Product
+from .models.customer import Customer
+from .models.employee import Employee
+from . import db_queries as q
+from . import pricing
+from . import metrics
+from . import passwords
+from .money import Money, to_cents, from_cents, total_cents
 
 BASE = os.path.dirname(__file__)
 DB_PATH = os.path.join(BASE, "fitnz.sqlite3")
@@ -31,171 +38,260 @@ if USE_MYSQL:
 # Code Owner: Imran (US: Admin/Reports - Core DB Access & Management)
 # ===============================================
 
+# Connection pool, on by default (DB_POOL_SIZE in database.env; 0 opens one
+# connection per call). get_conn() hands out an idle connection and
+# conn.close() returns it, so a connection's statement cache and prepared
+# cursors serve many calls instead of one. till_server sizes it with --pool.
+_pool_size = int(config.get("DB_POOL_SIZE", 4))
+_idle = []
+_pool_lock = threading.Lock()
+
+class _PooledSqliteConnection(sqlite3.Connection):
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        with _pool_lock:
+            if _pool_size and self.pool_path == DB_PATH and len(_idle) < _pool_size:
+                _idle.append(self)
+                return
+        super().close()
+
+def enable_pool(size=8):
+    """Keep up to `size` connections open and reuse them across get_conn() calls."""
+    global _pool_size
+    _pool_size = int(size)
+
+def release_pool():
+    """Close the idle pooled connections (before copying, moving or re-journaling the file)."""
+    with _pool_lock:
+        idle = _idle[:]
+        del _idle[:]
+    for conn in idle:
+        sqlite3.Connection.close(conn)
+
+def disable_pool():
+    global _pool_size
+    with _pool_lock:
+        _pool_size = 0
+    release_pool()
+
+# Query instrumentation (see db_queries): SLOW_QUERY_MS in database.env turns
+# on the slow-query log (to SLOW_QUERY_LOG, or stderr), and DB_STATS_SECONDS
+# makes start_stats_dump() write the stats report (to DB_STATS_FILE, or stdout).
+if config.get("SLOW_QUERY_MS"):
+    q.set_slow_query_log(float(config["SLOW_QUERY_MS"]), config.get("SLOW_QUERY_LOG") or None)
+
+_stats_dump = None
+
+def start_stats_dump():
+    """Start the periodic stats dump (once) if DB_STATS_SECONDS is configured; returns its stop Event or None."""
+    global _stats_dump
+    seconds = config.get("DB_STATS_SECONDS")
+    if _stats_dump is None and seconds:
+        _stats_dump = q.start_periodic_dump(float(seconds), config.get("DB_STATS_FILE") or None)
+    return _stats_dump
+
 def get_conn():
+    start = time.perf_counter()
     if USE_MYSQL and mysql:
         # Build connection from env
+        pool = {"pool_name": "fitnz", "pool_size": min(_pool_size, 32)} if _pool_size else {}
         conn = mysql.connect(
             host=config.get("MYSQL_HOST","127.0.0.1"),
             port=int(config.get("MYSQL_PORT","3306")),
             user=config.get("MYSQL_USER","root"),
             password=config.get("MYSQL_PASSWORD",""),
             database=config.get("MYSQL_DB","fitnz_db"),
-            autocommit=False
+            autocommit=False,
+            **pool
         )
+        # the connector pool hides whether this was a fresh connect; count it as opened
+        q.record_connection(time.perf_counter() - start)
+        return conn
+    elif _pool_size:
+        with _pool_lock:
+            while _idle:
+                conn = _idle.pop()
+                if conn.pool_path == DB_PATH:
+                    q.record_connection(0.0, reused=True)
+                    metrics.CACHE.inc(cache="db_pool", result="hit")
+                    return conn
+                sqlite3.Connection.close(conn)
+        metrics.CACHE.inc(cache="db_pool", result="miss")
+        conn = sqlite3.connect(DB_PATH, cached_statements=q.STATEMENT_CACHE_SIZE,
+                               factory=_PooledSqliteConnection, check_same_thread=False)
+        conn.pool_path = DB_PATH
+        conn.row_factory = sqlite3.Row
+        q.record_connection(time.perf_counter() - start)
         return conn
     else:
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(DB_PATH, cached_statements=q.STATEMENT_CACHE_SIZE)
         conn.row_factory = sqlite3.Row
+        q.record_connection(time.perf_counter() - start)
         return conn
 
-# Model mapping helpers: delayed imports to avoid circular
-def row_to_product(row):
-    if row is None: return None
-    try:
-        from .models.product import Product
-    except Exception:
-        from models.product import Product
-    # support sqlite3.Row or dict or SimpleNamespace
-    if hasattr(row, "keys"):
-        pid = row['product_id'] if 'product_id' in row.keys() else (row['id'] if 'id' in row.keys() else "")
-        name = row['name'] if 'name' in row.keys() else ""
-        price = float(row['price']) if 'price' in row.keys() else 0.0
-        stock = int(row['stock']) if 'stock' in row.keys() else 0
-    elif isinstance(row, dict):
-        pid = row.get('product_id') or row.get('id') or ""
-        name = row.get('name') or ""
-        price = float(row.get('price') or 0.0)
-        stock = int(row.get('stock') or 0)
-    else:
-        # SimpleNamespace or model object
-        pid = getattr(row, "product_id", getattr(row, "id", ""))
-        name = getattr(row, "name", "")
-        price = float(getattr(row, "price", 0.0))
-        stock = int(getattr(row, "stock", 0))
-    return Product(str(pid), name, price, stock)
-
-def row_to_customer(row):
-    if row is None: return None
-    try:
-        from .models.customer import Customer
-    except Exception:
-        from models.customer import Customer
-    # extract fields safely
-    if hasattr(row, "keys"):
-        user_id = row['user_id'] if 'user_id' in row.keys() else (row['customer_id'] if 'customer_id' in row.keys() else "")
-        name = row['name'] if 'name' in row.keys() else ""
-        contact = row['contact'] if 'contact' in row.keys() else (row['email'] if 'email' in row.keys() else "")
-        username = row['username'] if 'username' in row.keys() else ""
-        password = row['password'] if 'password' in row.keys() else ""
-        loyalty = int(row['loyalty_points']) if 'loyalty_points' in row.keys() and row['loyalty_points'] is not None else 0
-        membership = row['membership_level'] if 'membership_level' in row.keys() else (row['tier'] if 'tier' in row.keys() else 'Standard')
-        address = row['address'] if 'address' in row.keys() else ""
-    elif isinstance(row, dict):
-        user_id = row.get('user_id') or row.get('customer_id') or ""
-        name = row.get('name') or ""
-        contact = row.get('contact') or row.get('email') or ""
-        username = row.get('username') or ""
-        password = row.get('password') or ""
-        loyalty = int(row.get('loyalty_points') or 0)
-        membership = row.get('membership_level') or row.get('tier') or 'Standard'
-        address = row.get('address') or ""
-    else:
-        user_id = getattr(row, "user_id", getattr(row, "customer_id", ""))
-        name = getattr(row, "name", "")
-        contact = getattr(row, "contact", getattr(row, "email", ""))
-        username = getattr(row, "username", "")
-        password = getattr(row, "_password", getattr(row, "password", ""))
-        loyalty = int(getattr(row, "loyalty_points", 0))
-        membership = getattr(row, "membership_level", getattr(row, "membership", "Standard"))
-        address = getattr(row, "address", "")
-    cust = Customer(user_id, name, contact, username, password)
-    cust.loyalty_points = loyalty
-    cust.membership_level = membership
-    cust.address = address
-    return cust
-
-def row_to_employee(row):
-    if row is None: return None
-    try:
-        from .models.employee import Employee
-    except Exception:
-        from models.employee import Employee
-    if hasattr(row, "keys"):
-        eid = row['user_id'] if 'user_id' in row.keys() else ""
-        name = row['name'] if 'name' in row.keys() else ""
-        role = row['role'] if 'role' in row.keys() else ""
-        username = row['username'] if 'username' in row.keys() else ""
-        password = row['password'] if 'password' in row.keys() else ""
-    elif isinstance(row, dict):
-        eid = row.get('user_id') or ""
-        name = row.get('name') or ""
-        role = row.get('role') or ""
-        username = row.get('username') or ""
-        password = row.get('password') or ""
-    else:
-        eid = getattr(row, "user_id", "")
-        name = getattr(row, "name", "")
-        role = getattr(row, "role", "")
-        username = getattr(row, "username", "")
-        password = getattr(row, "_password", getattr(row, "password", ""))
-    return Employee(eid, name, role, username, password)
+# Precompiled row mappers: the column layout is resolved once per cursor
+# description into a positional itemgetter, so mapping a row is a single
+# tuple unpack instead of repeated row.keys() lookups. Fields missing from
+# the result shape index into a tuple of defaults appended to the row.
+_PRODUCT_FIELDS = ((("product_id", "id"), ""), (("name",), ""), (("price",), 0.0), (("stock",), 0), (("price_cents",), None),
+                  (("category",), None))
+_CUSTOMER_FIELDS = (
+    (("user_id", "customer_id"), ""), (("name",), ""), (("contact", "email"), ""),
+    (("username",), ""), (("password",), ""), (("loyalty_points",), 0),
+    (("membership_level", "tier"), "Standard"), (("address",), ""),
+)
+_EMPLOYEE_FIELDS = ((("user_id",), ""), (("name",), ""), (("role",), ""), (("username",), ""), (("password",), ""))
+_MAPPER_CACHE = {}
+
+def _compile_getter(columns, fields):
+    position = {}
+    for i, col in enumerate(columns):
+        position.setdefault(col, i)
+    indexes, defaults = [], []
+    for names, default in fields:
+        idx = next((position[n] for n in names if n in position), None)
+        if idx is None:
+            idx = len(columns) + len(defaults)
+            defaults.append(default)
+        indexes.append(idx)
+    get = itemgetter(*indexes)
+    if not defaults:
+        return get
+    defaults = tuple(defaults)
+    return lambda row: get(tuple(row) + defaults)
+
+def _build_product_mapper(columns):
+    get = _compile_getter(columns, _PRODUCT_FIELDS)
+    def to_product(row):
+        pid, name, price, stock, cents, category = get(row)
+        price = Money(cents) if cents is not None else float(price or 0.0)
+        return Product(str(pid), name or "", price, int(stock or 0), category)
+    return to_product
+
+def _build_customer_mapper(columns):
+    get = _compile_getter(columns, _CUSTOMER_FIELDS)
+    def to_customer(row):
+        user_id, name, contact, username, password, loyalty, membership, address = get(row)
+        cust = Customer(user_id or "", name or "", contact or "", username or "", password or "")
+        cust.loyalty_points = int(loyalty or 0)
+        cust.membership_level = membership or "Standard"
+        cust.address = address or ""
+        return cust
+    return to_customer
+
+def _build_employee_mapper(columns):
+    get = _compile_getter(columns, _EMPLOYEE_FIELDS)
+    def to_employee(row):
+        eid, name, role, username, password = get(row)
+        return Employee(eid or "", name or "", role or "", username or "", password or "")
+    return to_employee
+
+def _build_user_mapper(columns):
+    to_customer = _build_customer_mapper(columns)
+    to_employee = _build_employee_mapper(columns)
+    if "role" not in columns:
+        return to_employee
+    role_of = itemgetter(columns.index("role"))
+    def to_user(row):
+        role = role_of(row)
+        return to_customer(row) if role and role.lower() == "customer" else to_employee(row)
+    return to_user
+
+_MAPPER_BUILDERS = {
+    "product": _build_product_mapper,
+    "customer": _build_customer_mapper,
+    "employee": _build_employee_mapper,
+    "user": _build_user_mapper,
+}
+
+def mapper_for(cursor, kind):
+    """Return the row mapper for `kind` compiled against cursor.description."""
+    columns = tuple(d[0] for d in cursor.description)
+    key = (kind, columns)
+    mapper = _MAPPER_CACHE.get(key)
+    if mapper is None:
+        mapper = _MAPPER_CACHE[key] = _MAPPER_BUILDERS[kind](columns)
+    return mapper
 
 # ------------------------- Database functions -------------------------
 
+def _ensure_indexes(conn):
+    dialect = q.dialect_of(conn)
+    for name in q.RETIRED_INDEXES:
+        try:
+            q.execute(conn, name)
+        except Exception as e:
+            # MySQL error 1091: the index is already gone.
+            if getattr(e, "errno", None) != 1091:
+                print(f"setup_database: could not drop {name}:", e)
+    for name in q.INDEXES:
+        source = q.STATEMENTS[name]
+        if isinstance(source, dict) and dialect not in source:
+            continue
+        try:
+            q.execute(conn, name)
+        except Exception as e:
+            # MySQL error 1061: the index already exists.
+            if getattr(e, "errno", None) != 1061:
+                print(f"setup_database: could not create {name}:", e)
+
+def _object_kind(conn, name):
+    """Return 'table', 'view' or None for a schema object."""
+    row = q.execute(conn, "meta.object_kind", (name,)).fetchone()
+    return row[0] if row else None
+
+def _migrate_customers(conn):
+    """Fold the legacy `customers` table into `users` and leave a view in its place."""
+    if _object_kind(conn, "customers") == "table":
+        q.execute(conn, "migrate.customers_into_users")
+        q.execute(conn, "migrate.retire_customers_table")
+    if q.dialect_of(conn) == "sqlite":
+        # SQLite has no CREATE OR REPLACE VIEW; rebuild so definition changes apply.
+        q.execute(conn, "view.customers_drop")
+    q.execute(conn, "view.customers")
+
+def _ensure_money_columns(conn):
+    """Add missing *_cents columns and backfill them once from the REAL columns."""
+    existing = {}
+    for table, column, legacy in q.MONEY_COLUMNS:
+        if table not in existing:
+            existing[table] = {r[0] for r in q.execute(conn, "meta.columns", (table,)).fetchall()}
+        if column in existing[table]:
+            continue
+        q.execute(conn, f"migrate.add.{table}.{column}")
+        if legacy:
+            q.execute(conn, f"migrate.backfill.{table}.{column}")
+        existing[table].add(column)
+
+def _ensure_added_columns(conn):
+    """Add the post-release columns in q.ADDED_COLUMNS that an older database lacks."""
+    existing = {}
+    for table, column, _type in q.ADDED_COLUMNS:
+        if table not in existing:
+            existing[table] = {r[0] for r in q.execute(conn, "meta.columns", (table,)).fetchall()}
+        if column not in existing[table]:
+            q.execute(conn, f"migrate.add.{table}.{column}")
+            if f"migrate.backfill.{table}.{column}" in q.STATEMENTS:
+                q.execute(conn, f"migrate.backfill.{table}.{column}")
+            existing[table].add(column)
+
+def _seed_loyalty_balances(conn):
+    """Open a ledger and balance row for every customer that has none yet."""
+    now = datetime.now().isoformat(timespec='seconds')
+    q.execute(conn, "loyalty.seed_opening_entries", (now,))
+    q.execute(conn, "loyalty.seed_balances", (now,))
+
 def setup_database():
-    conn = get_conn(); cur = conn.cursor()
-    # Use different SQL for MySQL vs SQLite if needed
-    cur.executescript("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id TEXT,
-        username TEXT UNIQUE,
-        password TEXT,
-        role TEXT,
-        name TEXT,
-        contact TEXT,
-        address TEXT,
-        membership_level TEXT DEFAULT 'Standard',
-        loyalty_points INTEGER DEFAULT 0
-    );
-    CREATE TABLE IF NOT EXISTS products (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        product_id TEXT UNIQUE,
-        sku TEXT,
-        name TEXT,
-        description TEXT,
-        price REAL,
-        stock INTEGER DEFAULT 0
-    );
-    CREATE TABLE IF NOT EXISTS customers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id TEXT,
-        name TEXT,
-        email TEXT,
-        phone TEXT,
-        tier TEXT DEFAULT 'Bronze',
-        loyalty_points INTEGER DEFAULT 0
-    );
-    CREATE TABLE IF NOT EXISTS sales (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        datetime TEXT,
-        user_id TEXT,
-        customer_id TEXT,
-        total REAL,
-        gst REAL,
-        delivery_date TEXT
-    );
-    CREATE TABLE IF NOT EXISTS sale_lines (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sale_id INTEGER,
-        product_id TEXT,
-        qty INTEGER,
-        unit_price REAL,
-        line_total REAL
-    );
-    """)
+    conn = get_conn()
+    for name in q.SCHEMA:
+        q.execute(conn, name)
+    _ensure_money_columns(conn)
+    _ensure_added_columns(conn)
+    _ensure_indexes(conn)
+    _migrate_customers(conn)
     # seed users & products
-    cur.execute("SELECT COUNT(*) FROM users"); cnt = cur.fetchone()[0]
+    cnt = q.execute(conn, "users.count").fetchone()[0]
     if cnt == 0:
         defaults = [
             ('E001','dev','dev123','Developer','Om Patel','dev@fit.nz','AIS Campus','Standard',0),
@@ -203,9 +299,10 @@ def setup_database():
             ('E003','emp','emp123','Employee','John Smith','john@fit.nz','AIS Campus','Standard',0),
             ('C101','alice','alice123','Customer','Alice','alice@example.com','123 Queen St, Auckland','Gold',500)
         ]
-        for u in defaults:
-            cur.execute("INSERT INTO users (user_id, username, password, role, name, contact, address, membership_level, loyalty_points) VALUES (?,?,?,?,?,?,?,?,?)", u)
-    cur.execute("SELECT COUNT(*) FROM products"); pcount = cur.fetchone()[0]
+        q.executemany(conn, "users.seed", [d[:2] + (passwords.hash_password(d[2]),) + d[3:] for d in defaults])
+    # after the default users so a fresh database opens their balances too
+    _seed_loyalty_balances(conn)
+    pcount = q.execute(conn, "products.count").fetchone()[0]
     if pcount == 0:
         products = [
             ('P001','BND001','Resistance Band - Light','Light resistance band, 1m',12.0,50),
@@ -213,8 +310,9 @@ def setup_database():
             ('P003','WGT001','Dumbbell 5kg','Cast iron dumbbell 5kg',40.0,10),
             ('P004','PRT001','Protein Powder 1kg','Whey protein 1kg',80.0,25)
         ]
-        for p in products:
-            cur.execute("INSERT INTO products (product_id, sku, name, description, price, stock) VALUES (?,?,?,?,?,?)", p)
+        q.executemany(conn, "products.seed",
+                      [(pid, sku, name, desc, price, to_cents(price), stock, product_category(name))
+                       for pid, sku, name, desc, price, stock in products])
     conn.commit(); conn.close()
 
 
@@ -224,42 +322,51 @@ def setup_database():
 # ===============================================
 
 def authenticate_user(username, password, role=None):
-    conn = get_conn(); cur = conn.cursor()
-    if USE_MYSQL and mysql:
-        if role:
-            cur.execute("SELECT * FROM users WHERE username=%s AND password=%s AND role=%s", (username, password, role))
-        else:
-            cur.execute("SELECT * FROM users WHERE username=%s AND password=%s", (username, password))
-        r = cur.fetchone(); conn.close(); return row_to_employee(r) if r and r.get('role','').lower()!='customer' else row_to_customer(r)
-    else:
+    start = time.perf_counter()
+    conn = get_conn()
+    try:
         if role:
-            cur.execute("SELECT * FROM users WHERE username=? AND password=? AND role=?", (username, password, role))
+            cur = q.execute(conn, "users.by_username_role", (username, role))
         else:
-            cur.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
-        r = cur.fetchone(); conn.close()
-        if not r: return None
-        # role column may contain 'Customer' or others
-        role_val = r['role'] if 'role' in r.keys() else ''
-        if role_val and role_val.lower() == 'customer':
-            return row_to_customer(r)
-        else:
-            return row_to_employee(r)
+            cur = q.execute(conn, "users.by_username", (username,))
+        r = cur.fetchone()
+        user = mapper_for(cur, "user")(r) if r else None
+        if user is None:
+            passwords.burn_check(password)
+        elif not passwords.verify_password(password, user._password):
+            user = None
+        elif passwords.needs_rehash(user._password):
+            # Plaintext or old-cost hash: upgrade it now that we have the password.
+            try:
+                stored = passwords.hash_password(password)
+                q.execute(conn, "users.set_password", (stored, username))
+                conn.commit()
+                user._password = stored
+            except Exception as e:
+                conn.rollback()
+                print("password upgrade error:", e)
+    finally:
+        conn.close()
+    metrics.LOGIN_LATENCY.observe(time.perf_counter() - start)
+    metrics.LOGINS.inc(result="ok" if user else "rejected")
+    return user
 
 def add_user(name, contact, username, password, role, address):
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_conn()
     try:
-        cur.execute("SELECT COUNT(*) FROM users"); cnt = cur.fetchone()[0] + 1
-        user_id = f"U{cnt:03d}"
-        if USE_MYSQL and mysql:
-            cur.execute("INSERT INTO users (user_id, username, password, role, name, contact, address) VALUES (%s,%s,%s,%s,%s,%s,%s)",
-                        (user_id, username, password, role, name, contact, address))
-        else:
-            cur.execute("INSERT INTO users (user_id, username, password, role, name, contact, address) VALUES (?,?,?,?,?,?,?)",
-                        (user_id, username, password, role, name, contact, address))
+        # Derive the next id from the primary key, not COUNT(*), so deleted
+        # rows can't hand out a user_id that already exists.
+        next_pk = q.execute(conn, "users.next_pk").fetchone()[0]
+        user_id = f"U{next_pk:03d}"
+        q.execute(conn, "users.insert",
+                  (user_id, username, passwords.hash_password(password), role, name, contact, address))
+        if role == "Customer":
+            q.execute(conn, "loyalty.open_balance", (user_id, datetime.now().isoformat(timespec='seconds')))
         conn.commit()
         # return created user object
-        r = cur.execute("SELECT * FROM users WHERE user_id=?",(user_id,)).fetchone() if not (USE_MYSQL and mysql) else cur.execute("SELECT * FROM users WHERE user_id=%s",(user_id,)).fetchone()
-        return row_to_employee(r) if r and (r['role'] if 'role' in r.keys() else '') and (r['role'].lower()!='customer') else row_to_customer(r)
+        cur = q.execute(conn, "users.by_user_id", (user_id,))
+        r = cur.fetchone()
+        return mapper_for(cur, "user")(r) if r else None
     except Exception as e:
         conn.rollback()
         return None
@@ -267,25 +374,47 @@ def add_user(name, contact, username, password, role, address):
         conn.close()
 
 
-def add_product(product_id, name, price, stock):
+# In-memory product indexes (search) register here to hear about edits.
+_product_listeners = []
+
+def on_product_changed(fn):
+    """Call fn(product_id) after a product is added, updated or deleted."""
+    _product_listeners.append(fn)
+
+def _product_changed(product_id):
+    for fn in _product_listeners:
+        try:
+            fn(product_id)
+        except Exception as e:
+            print("product listener error:", e)
+
+def product_category(name):
+    """Category shown (and filtered on) in the product grids, from the product name."""
+    name = name.lower()
+    if "protein" in name or "supplement" in name:
+        return "Nutrition"
+    if "yoga" in name or "mat" in name:
+        return "Yoga"
+    if "band" in name:
+        return "Accessories"
+    return "Equipment"
+
+def add_product(product_id, name, price, stock, description=""):
     conn = get_conn()
-    cur = conn.cursor()
     try:
         # Insert into DB
-        cur.execute(
-            "INSERT INTO products (product_id, name, price, stock) VALUES (?, ?, ?, ?)",
-            (product_id, name, float(price), int(stock))
-        )
+        cents = to_cents(price)
+        q.execute(conn, "products.insert",
+                  (product_id, name, description, from_cents(cents), cents, int(stock), product_category(name)))
         conn.commit()
+        _product_changed(product_id)
 
         # Fetch inserted record
-        row = cur.execute(
-            "SELECT product_id, name, price, stock FROM products WHERE product_id = ?",
-            (product_id,)
-        ).fetchone()
+        cur = q.execute(conn, "products.by_product_id", (product_id,))
+        row = cur.fetchone()
 
         if row:
-            return Product(row[0], row[1], row[2], row[3])
+            return mapper_for(cur, "product")(row)
         return None
 
     except Exception as e:
@@ -300,46 +429,98 @@ def add_product(product_id, name, price, stock):
 
 def get_all_products():
     conn = get_conn()
-    cur = conn.cursor()
-
-    if USE_MYSQL and mysql:
-        cur.execute("SELECT product_id, name, price, stock FROM products")
-    else:
-        cur.execute("SELECT product_id, name, price, stock FROM products")
+    cur = q.execute(conn, "products.all")
 
     rows = cur.fetchall()
+    to_product = mapper_for(cur, "product")
     conn.close()
 
-    return [Product(r[0], r[1], r[2], r[3]) for r in rows]
+    return [to_product(r) for r in rows]
 
 
 def get_product_by_id(pid):
     conn = get_conn()
-    cur = conn.cursor()
-
-    if USE_MYSQL and mysql:
-        cur.execute("SELECT product_id, name, price, stock FROM products WHERE product_id=%s OR id=%s", (pid, pid))
-    else:
-        cur.execute("SELECT product_id, name, price, stock FROM products WHERE product_id=? OR id=?", (pid, pid))
+    cur = q.execute(conn, "products.by_id_or_pk", (pid, pid))
 
     row = cur.fetchone()
+    product = mapper_for(cur, "product")(row) if row else None
     conn.close()
 
-    if row:
-        return Product(row[0], row[1], row[2], row[3])
+    return product
 
-    return None
+
+def get_products_by_ids(product_ids):
+    """Fetch many products in a few IN (...) queries; returns {product_id: Product}."""
+    ids = list(dict.fromkeys(str(p) for p in product_ids))
+    found = {}
+    if not ids:
+        return found
+    conn = get_conn()
+    try:
+        size = q.PRODUCT_BATCH
+        for i in range(0, len(ids), size):
+            chunk = ids[i:i + size]
+            # pad with a repeat so every batch uses the one prepared statement
+            cur = q.execute(conn, "products.by_product_ids", chunk + [chunk[-1]] * (size - len(chunk)))
+            to_product = mapper_for(cur, "product")
+            for row in cur.fetchall():
+                product = to_product(row)
+                found[product.product_id] = product
+    finally:
+        conn.close()
+    return found
+
+
+def get_search_docs():
+    """[(product_id, name, sku)] for the search index."""
+    conn = get_conn()
+    rows = q.execute(conn, "products.search_docs").fetchall()
+    conn.close()
+    return [(r[0], r[1], r[2]) for r in rows]
+
+def get_search_doc(product_id):
+    conn = get_conn()
+    r = q.execute(conn, "products.search_doc", (product_id,)).fetchone()
+    conn.close()
+    return (r[0], r[1], r[2]) if r else None
+
+def get_scan_codes():
+    """[(sku, barcode, Product)] for every product that has a scannable code."""
+    conn = get_conn()
+    cur = q.execute(conn, "products.scan_codes")
+    rows = cur.fetchall(); to_product = mapper_for(cur, "product"); conn.close()
+    return [(r[1], r[2], to_product(r)) for r in rows]
+
+def get_product_by_code(code):
+    """Product whose SKU or barcode is `code` (one unique-index probe each), or None."""
+    conn = get_conn()
+    cur = q.execute(conn, "products.by_code", (code, code))
+    row = cur.fetchone()
+    product = mapper_for(cur, "product")(row) if row else None
+    conn.close()
+    return product
+
+def set_product_barcode(pid, barcode):
+    conn = get_conn()
+    try:
+        q.execute(conn, "products.set_barcode", (barcode or None, pid))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print("set_product_barcode error:", e)
+        return False
+    finally:
+        conn.close()
 
 
 def update_product(pid, name, price, stock):
     conn = get_conn()
-    cur = conn.cursor()
     try:
-        cur.execute(
-            "UPDATE products SET name=?, price=?, stock=? WHERE product_id=?",
-            (name, float(price), int(stock), pid)
-        )
+        cents = to_cents(price)
+        q.execute(conn, "products.update", (name, from_cents(cents), cents, int(stock), product_category(name), pid))
         conn.commit()
+        _product_changed(pid)
         return True
     except Exception as e:
         conn.rollback()
@@ -350,10 +531,11 @@ def update_product(pid, name, price, stock):
 
 
 def delete_product(pid):
-    conn = get_conn(); cur = conn.cursor()
+    conn = get_conn()
     try:
-        cur.execute("DELETE FROM products WHERE product_id=?", (pid,))
+        q.execute(conn, "products.delete", (pid,))
         conn.commit()
+        _product_changed(pid)
         return True
     except:
         conn.rollback()
@@ -363,33 +545,101 @@ def delete_product(pid):
 
 
 
+def _like_prefix(text):
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+
+def browse_users(sort="user_id", descending=False, filters=None, page=0, page_size=100, count_cap=5000):
+    """
+    One page of the admin user list as (user_id, username, role, name) dicts,
+    plus the match count. filters: role, search (prefix of username, name or
+    user_id). The count stops past count_cap; a total above it means "more than".
+    """
+    filters = dict(filters or {})
+    if filters.get("search"):
+        filters["search"] = _like_prefix(filters["search"].strip())
+    try:
+        rows, total = _browse("users", sort, descending, filters, page, page_size, count_cap)
+    except Exception as e:
+        print("browse_users error:", e)
+        return [], 0
+    return [{"user_id": r[0], "username": r[1], "role": r[2], "name": r[3]} for r in rows], total
+
 def get_all_users():
-    conn = get_conn(); cur = conn.cursor()
-    rows = cur.execute("SELECT * FROM users").fetchall(); conn.close()
-    result = []
-    for r in rows:
-        role_val = r['role'] if 'role' in r.keys() else ''
-        result.append(row_to_customer(r) if role_val and role_val.lower()=='customer' else row_to_employee(r))
-    return result
+    conn = get_conn()
+    cur = q.execute(conn, "users.all")
+    rows = cur.fetchall(); to_user = mapper_for(cur, "user"); conn.close()
+    return [to_user(r) for r in rows]
 
-def get_user_by_id(uid):
-    conn = get_conn(); cur = conn.cursor()
-    if USE_MYSQL and mysql:
-        r = cur.execute("SELECT * FROM users WHERE id=%s OR user_id=%s OR username=%s",(uid,uid,uid,)).fetchone()
-    else:
-        r = cur.execute("SELECT * FROM users WHERE id=? OR user_id=? OR username=?", (uid, uid, uid)).fetchone()
+def get_all_customers():
+    """Customers only, straight from the users table (indexed on role)."""
+    conn = get_conn()
+    cur = q.execute(conn, "users.customers")
+    rows = cur.fetchall(); to_customer = mapper_for(cur, "customer"); conn.close()
+    return [to_customer(r) for r in rows]
+
+def search_customers(prefix, limit=8):
+    """
+    Customers whose user_id, name or contact (email/phone) starts with
+    `prefix`, as dicts, id matches first. Each probe is an index range scan.
+    """
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    upper = prefix.upper()
+    probes = (
+        ("customers.prefix_user_id", (upper, upper[:-1] + chr(ord(upper[-1]) + 1), limit)),
+        ("customers.prefix_name", (_like_prefix(prefix), limit)),
+        ("customers.prefix_contact", (_like_prefix(prefix), limit)),
+    )
+    found = {}
+    try:
+        conn = get_conn()
+        try:
+            for name, params in probes:
+                for r in q.execute(conn, name, params).fetchall():
+                    found.setdefault(r[0], {"user_id": r[0], "name": r[1], "contact": r[2], "membership_level": r[3]})
+                if len(found) >= limit:
+                    break
+        finally:
+            conn.close()
+    except Exception as e:
+        print("search_customers error:", e)
+    return list(found.values())[:limit]
+
+def _get_user(statement, key):
+    conn = get_conn()
+    cur = q.execute(conn, statement, (key,))
+    r = cur.fetchone()
+    user = mapper_for(cur, "user")(r) if r else None
     conn.close()
-    if not r: return None
-    role_val = r['role'] if 'role' in r.keys() else ''
-    return row_to_customer(r) if role_val and role_val.lower()=='customer' else row_to_employee(r)
+    return user
 
-def delete_user_by_id(uid):
+def get_user_by_pk(pk):
+    """Look up a user by the numeric `users.id` primary key."""
+    return _get_user("users.by_pk", int(pk))
+
+def get_user_by_user_id(user_id):
+    """Look up a user by business id (e.g. 'C101', 'E002')."""
+    return _get_user("users.by_user_id", user_id)
+
+def get_user_by_username(username):
+    """Look up a user by login name."""
+    return _get_user("users.by_username", username)
+
+def get_user_by_id(uid):
+    """Resolve `uid` as a primary key (int), user_id or username, probing one index at a time."""
+    if isinstance(uid, int):
+        return get_user_by_pk(uid)
+    user = get_user_by_user_id(uid) or get_user_by_username(uid)
+    if user is None and str(uid).isdigit():
+        user = get_user_by_pk(uid)
+    return user
+
+def delete_user_by_id(user_id):
+    """Delete the user whose business id is `user_id`."""
     try:
-        conn = get_conn(); cur = conn.cursor()
-        if USE_MYSQL and mysql:
-            cur.execute("DELETE FROM users WHERE id=%s OR user_id=%s OR username=%s",(uid,uid,uid,))
-        else:
-            cur.execute("DELETE FROM users WHERE id=? OR user_id=? OR username=?", (uid, uid, uid))
+        conn = get_conn()
+        q.execute(conn, "users.delete_by_user_id", (user_id,))
         conn.commit(); conn.close(); return True
     except:
         return False
@@ -399,62 +649,61 @@ def delete_user_by_id(uid):
 # Code Owner: Rajina (US: Discount Management - Membership tiers)
 # ===============================================
 
-def process_sale(customer_obj, cart, points_redeemed, student_discount_applied, delivery_date):
+def process_sale(customer_obj, cart, points_redeemed, student_discount_applied, delivery_date, quote=None):
+    """
+    Record a sale. `quote` is the pricing.Quote the customer was shown
+    (CheckoutService passes its own); without one the cart is priced with
+    the default plan.
+    """
+    start = time.perf_counter()
     try:
         conn = get_conn()
-        cur = conn.cursor()
 
         now = datetime.now().isoformat(timespec='seconds')
-        total = 0.0
 
-        # Calculate totals
-        for it in cart:
-            pid = getattr(it, 'product_id', None)
-            qty = getattr(it, 'qty', 1)
-            price = getattr(it, 'price', 0)
-            total += float(price) * int(qty)
-
-        gst_total = round(total * 0.15, 2)
-        grand_total = round(total + gst_total, 2)
+        # Discounts, points and GST all come from the pricing plan so the
+        # stored totals match what the cart showed.
+        if quote is None:
+            quote = pricing.price_basket(cart, customer_obj, student_discount_applied, points_redeemed)
+        gst_total = quote.gst
+        grand_total = quote.total
 
         # Insert sale
-        cur.execute(
-            "INSERT INTO sales (datetime, user_id, customer_id, total, gst, delivery_date) VALUES (?,?,?,?,?,?)",
-            (now, None, getattr(customer_obj, '_customer_id', None), grand_total, gst_total, str(delivery_date))
+        cur = q.execute(
+            conn, "sales.insert",
+            (now, None, getattr(customer_obj, '_customer_id', None), grand_total, gst_total,
+             int(quote.total_cents), int(quote.gst_cents), str(delivery_date))
         )
         sale_id = cur.lastrowid
 
         # Insert sale lines
-        for it in cart:
-            pid = getattr(it, 'product_id', None)
-            qty = getattr(it, 'qty', 1)
-            price = getattr(it, 'price', 0)
-            line_total = round((price * qty) * 1.15, 2)
-
-            cur.execute(
-                "INSERT INTO sale_lines (sale_id, product_id, qty, unit_price, line_total) VALUES (?,?,?,?,?)",
-                (sale_id, pid, qty, price, line_total)
-            )
-
-            cur.execute(
-                "UPDATE products SET stock = stock - ? WHERE product_id = ?",
-                (qty, pid)
-            )
+        for line in quote.lines:
+            if line.qty <= 0:
+                raise ValueError(f"Invalid quantity {line.qty} for {line.product_id}")
+            q.execute(conn, "sale_lines.insert", (sale_id, line.product_id, line.qty, line.unit_price, line.total,
+                                                  line.unit_cents, line.total_cents, line.gst_cents))
+            # Stock is taken in the sale's transaction; a line that can't be
+            # covered any more rolls the whole sale back.
+            if q.execute(conn, "products.reserve_stock", (line.qty, line.product_id, line.qty)).rowcount != 1:
+                raise ValueError(f"Insufficient stock for {line.product_id}")
 
         # ----- LOYALTY POINTS -----
+        # Ledger entries + relative balance updates in the sale's transaction;
+        # a redemption the balance can't cover rolls the whole sale back.
         remaining_points = None
-        if customer_obj and points_redeemed > 0:
-            old_pts = getattr(customer_obj, 'loyalty_points', 0)
-            remaining_points = max(0, old_pts - points_redeemed)
-
-            cur.execute(
-                "UPDATE customers SET loyalty_points = ? WHERE customer_id = ?",
-                (remaining_points, customer_obj._customer_id)
-            )
+        customer_id = getattr(customer_obj, '_customer_id', None)
+        if customer_id:
+            if quote.points_used > 0:
+                _post_points(conn, customer_id, -quote.points_used, "redeem", sale_id)
+            earned = int(grand_total // POINTS_EARN_DOLLARS)
+            if earned > 0:
+                _post_points(conn, customer_id, earned, "earn", sale_id)
+            remaining_points = _read_balance(conn, customer_id)
 
         conn.commit()
         conn.close()
 
+        metrics.record_sale(time.perf_counter() - start, True, quote.total_cents)
         return True, remaining_points, gst_total, grand_total
 
     except Exception as e:
@@ -464,16 +713,100 @@ def process_sale(customer_obj, cart, points_redeemed, student_discount_applied,
             conn.close()
         except:
             pass
+        metrics.record_sale(time.perf_counter() - start, False)
         return False, None, None, None
         
+# Rajina: loyalty points ledger
+POINTS_EARN_DOLLARS = 10  # 1 point per $10 spent
+
+def _read_balance(conn, user_id):
+    row = q.execute(conn, "loyalty.balance", (user_id,)).fetchone()
+    return int(row[0]) if row else 0
+
+def _post_points(conn, user_id, delta, reason, sale_id=None):
+    """Append a ledger entry and apply it to the member's balance (caller commits)."""
+    now = datetime.now().isoformat(timespec='seconds')
+    if delta < 0:
+        cur = q.execute(conn, "loyalty.debit", (-delta, user_id, -delta))
+        if cur.rowcount == 0:
+            raise ValueError(f"Insufficient loyalty points for {user_id}")
+    else:
+        cur = q.execute(conn, "loyalty.credit", (delta, user_id))
+        if cur.rowcount == 0:
+            q.execute(conn, "loyalty.open_balance", (user_id, now))
+            q.execute(conn, "loyalty.credit", (delta, user_id))
+    q.execute(conn, "loyalty.append", (user_id, delta, reason, sale_id, now))
+
+def get_loyalty_balance(user_id):
+    """Current points balance: a single primary-key read."""
+    conn = get_conn()
+    try:
+        return _read_balance(conn, user_id)
+    finally:
+        conn.close()
+
+def add_loyalty_points(user_id, delta, reason="adjust"):
+    """Post a relative points change; returns the new balance or None if it failed."""
+    conn = get_conn()
+    try:
+        _post_points(conn, user_id, int(delta), reason)
+        balance = _read_balance(conn, user_id)
+        conn.commit()
+        return balance
+    except Exception as e:
+        conn.rollback()
+        print("add_loyalty_points error:", e)
+        return None
+    finally:
+        conn.close()
+
+def update_customer_points(user_id, points):
+    """Compatibility setter: posts the difference to `points` as an adjustment."""
+    conn = get_conn()
+    try:
+        delta = int(points) - _read_balance(conn, user_id)
+        if delta:
+            _post_points(conn, user_id, delta, "adjust")
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print("update_customer_points error:", e)
+        return False
+    finally:
+        conn.close()
+
+def compact_loyalty_ledger(prune=False, repair=False):
+    """
+    Fold ledger entries into each member's snapshot and copy balances back to
+    users.loyalty_points. prune=True deletes the folded entries; repair=True
+    recomputes live balances from snapshot + tail (run with the tills idle).
+    """
+    conn = get_conn()
+    try:
+        now = datetime.now().isoformat(timespec='seconds')
+        upto = q.execute(conn, "loyalty.max_entry").fetchone()[0]
+        q.execute(conn, "loyalty.compact_snapshots", (upto, upto, now, upto))
+        if repair:
+            q.execute(conn, "loyalty.resync_balances")
+        if prune:
+            q.execute(conn, "loyalty.prune_ledger", (upto,))
+        q.execute(conn, "loyalty.sync_users")
+        conn.commit()
+        return upto
+    except Exception as e:
+        conn.rollback()
+        print("compact_loyalty_ledger error:", e)
+        return None
+    finally:
+        conn.close()
+
 # Rajina:
 def update_customer_membership(customer_id, new_tier):
+    """Set the membership tier of the customer whose user_id is `customer_id`."""
     try:
-        conn = get_conn(); cur = conn.cursor()
-        if USE_MYSQL and mysql:
-            cur.execute("UPDATE users SET membership_level=%s WHERE user_id=%s OR username=%s OR id=%s", (new_tier, customer_id, customer_id, customer_id))
-        else:
-            cur.execute("UPDATE users SET membership_level=? WHERE user_id=? OR username=? OR id=?", (new_tier, customer_id, customer_id, customer_id))
+        conn = get_conn()
+        q.execute(conn, "users.set_membership_by_user_id", (new_tier, customer_id))
         conn.commit(); conn.close(); return True
     except Exception as e:
         return False
@@ -481,19 +814,44 @@ def update_customer_membership(customer_id, new_tier):
 def upgrade_to_student_membership(customer_id):
     return update_customer_membership(customer_id, "Student")
 
+# Rajina: rolling-spend thresholds (NZD dollars; compared in cents) for the nightly re-tier job.
+TIER_THRESHOLDS = {"Gold": 2500.0, "Silver": 1000.0, "Bronze": 200.0}
+
+def recompute_membership_tiers(window_days=365, thresholds=None, chunk_size=5000, progress=None):
+    """
+    Re-tier every customer from spend over the last `window_days` with one
+    UPDATE per primary-key chunk, committing after each chunk. Student
+    members are left alone. progress(done, total, updated) is called after
+    every commit. Returns the number of rows updated.
+    """
+    t = dict(TIER_THRESHOLDS, **(thresholds or {}))
+    since = (datetime.now() - timedelta(days=window_days)).isoformat(timespec='seconds')
+    conn = get_conn()
+    try:
+        lo, hi = q.execute(conn, "users.customer_id_bounds").fetchone()
+        start, total, updated = lo - 1, max(0, hi - lo + 1), 0
+        while start < hi:
+            end = min(start + chunk_size, hi)
+            cur = q.execute(conn, "users.retier_range", (to_cents(t["Gold"]), to_cents(t["Silver"]),
+                                                          to_cents(t["Bronze"]), since, start, end))
+            conn.commit()
+            updated += max(cur.rowcount, 0)
+            start = end
+            if progress:
+                progress(end - lo + 1, total, updated)
+        return updated
+    except Exception as e:
+        conn.rollback()
+        print("recompute_membership_tiers error:", e)
+        raise
+    finally:
+        conn.close()
+
 # Rajina:
 def get_all_sales():
     try:
         conn = get_conn()
-        cur = conn.cursor()
-
-        rows = cur.execute("""
-            SELECT s.id, s.datetime, s.customer_id, s.total, s.gst, s.delivery_date,
-                   c.name AS customer_name
-            FROM sales s
-            LEFT JOIN customers c ON c.customer_id = s.customer_id
-            ORDER BY s.datetime DESC
-        """).fetchall()
+        rows = q.execute(conn, "sales.all_with_customer").fetchall()
 
         data = []
         for r in rows:
@@ -512,3 +870,107 @@ def get_all_sales():
         print("get_all_sales error:", e)
         return []
 
+def _browse(grid, sort, descending, filters, page, page_size, count_cap=None):
+    """One page of a q.GRIDS view: (rows, total matching). Empty filter values are ignored."""
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "")}
+    page_sql, count_sql = q.grid_statements(grid, sort, descending, filters, count_cap)
+    values = q.grid_params(grid, filters)
+    conn = get_conn()
+    try:
+        total = q.execute(conn, count_sql, values).fetchone()[0]
+        rows = q.execute(conn, page_sql, values + (int(page_size), int(page) * int(page_size))).fetchall()
+        return rows, total
+    finally:
+        conn.close()
+
+def browse_products(sort="name", descending=False, filters=None, page=0, page_size=100):
+    """
+    Sorted, filtered page of the catalogue for the product grids.
+    filters: category, name (substring), min_price/max_price (dollars), min_stock/max_stock.
+    """
+    filters = dict(filters or {})
+    if filters.get("name"):
+        filters["name"] = f"%{filters['name']}%"
+    try:
+        for key in ("min_price", "max_price"):
+            if filters.get(key) not in (None, ""):
+                filters[key] = to_cents(filters[key])
+        rows, total = _browse("products", sort, descending, filters, page, page_size)
+    except Exception as e:
+        print("browse_products error:", e)
+        return [], 0
+    return [
+        {"product_id": r[0], "name": r[1], "price": from_cents(r[3]), "stock": r[4], "category": r[5]}
+        for r in rows
+    ], total
+
+def _sales_filters(filters):
+    """browse_sales filters with empties dropped and dollar bounds in cents."""
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "")}
+    for key in ("min_total", "max_total"):
+        if key in filters:
+            filters[key] = to_cents(filters[key])
+    return filters
+
+def browse_sales(sort="date", descending=True, filters=None, page=0, page_size=100):
+    """
+    Sorted, filtered page of sales for the sales report.
+    filters: date_from/date_to (ISO dates, date_to exclusive), min_total/max_total (dollars), customer (user_id).
+    """
+    try:
+        filters = _sales_filters(filters)
+        rows, total = _browse("sales", sort, descending, filters, page, page_size)
+    except Exception as e:
+        print("browse_sales error:", e)
+        return [], 0
+    return [
+        {"sale_id": r[0], "datetime": r[1], "customer_id": r[2], "customer": r[6] or "Walk-in",
+         "total": r[3], "gst": r[4], "delivery_date": r[5]}
+        for r in rows
+    ], total
+
+def sales_totals(filters=None):
+    """
+    (total cents, GST cents) over every sale matching the browse_sales
+    filters, summed exactly with the money array helpers.
+    """
+    try:
+        filters = _sales_filters(filters)
+        conn = get_conn()
+        try:
+            rows = q.execute(conn, q.grid_column_statement("sales", filters),
+                             q.grid_params("sales", filters)).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        print("sales_totals error:", e)
+        return 0, 0
+    return total_cents([r[0] or 0 for r in rows]), total_cents([r[1] or 0 for r in rows])
+
+def get_orders_by_customer(customer_id):
+    """Sales for one customer, newest first (served by ix_sales_customer)."""
+    try:
+        conn = get_conn()
+        rows = q.execute(conn, "sales.by_customer", (customer_id,)).fetchall()
+        conn.close()
+        return [
+            {"id": r[0], "datetime": r[1], "total": r[2], "gst": r[3], "delivery_date": r[4]}
+            for r in rows
+        ]
+    except Exception as e:
+        print("get_orders_by_customer error:", e)
+        return []
+
+def get_sale_details(sale_id):
+    """Line items of one sale with product names."""
+    try:
+        conn = get_conn()
+        rows = q.execute(conn, "sale_lines.by_sale", (sale_id,)).fetchall()
+        conn.close()
+        return [
+            {"product_id": r[0], "name": r[1], "qty": r[2], "unit_price": r[3], "line_total": r[4]}
+            for r in rows
+        ]
+    except Exception as e:
+        print("get_sale_details error:", e)
+        return []
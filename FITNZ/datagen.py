@@ -0,0 +1,194 @@
+# File: FITNZ/datagen.py
+# ===============================================
+# Code Owner: Imran (US: Admin/Reports - Core DB Access & Management)
+# Synthetic data for scale testing. Never point this at the live database.
+# ===============================================
+"""
+Fill the configured database (SQLite by default, MySQL via database.env)
+with products, customers and years of sales/sale lines.
+
+    python -m FITNZ.datagen --db /tmp/scale.sqlite3 --products 5000 \\
+        --customers 200000 --sales 1000000 --years 3
+
+Distributions: product and customer popularity are Zipf-like (a few
+best-sellers and regulars), prices are log-normal around $35, basket size
+is geometric (mean ~2.5 lines), ~20% of sales are walk-ins, and sales
+follow weekday and hour-of-day peaks. Rows go in through executemany in
+--batch sized transactions; generated ids use a G prefix so reruns append
+without clashing with real data. Loyalty balances are opened afterwards.
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from . import database_mysql as db
+from . import db_queries as q
+from . import passwords
+from .money import apply_rate, from_cents, rate_bp
+
+TIERS = (("Standard", 60), ("Bronze", 20), ("Silver", 12), ("Gold", 6), ("Student", 2))
+PRODUCT_WORDS = (
+    ("Whey Protein", "Creatine", "Pre-Workout", "BCAA", "Multivitamin", "Protein Bar"),
+    ("Dumbbell", "Kettlebell", "Barbell", "Weight Plate", "Bench", "Rack"),
+    ("Yoga Mat", "Foam Roller", "Resistance Band", "Jump Rope", "Lifting Straps", "Gloves"),
+)
+# Relative traffic by weekday (Mon..Sun) and by hour of day.
+WEEKDAY_WEIGHTS = (0.9, 0.85, 0.9, 1.0, 1.15, 1.4, 1.2)
+HOUR_WEIGHTS = (0, 0, 0, 0, 0, 0, 1, 3, 4, 4, 5, 6, 8, 7, 5, 5, 6, 8, 9, 7, 4, 2, 1, 0)
+GST_BP = rate_bp(0.15)
+
+
+def _zipf_cum_weights(n, s=1.07):
+    total, cum = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        cum.append(total)
+    return cum
+
+
+def _progress(label, done, total, started):
+    rate = done / max(time.perf_counter() - started, 1e-9)
+    print(f"\r{label}: {done:,}/{total:,} ({rate:,.0f}/s)", end="", flush=True)
+
+
+def generate_products(conn, count, rng, batch):
+    # GP/SKU numbers follow the highest id, so deleted rows never make them repeat
+    start = q.execute(conn, "products.next_pk").fetchone()[0]
+    started = time.perf_counter()
+    rows = []
+    for n in range(start, start + count):
+        family = PRODUCT_WORDS[n % len(PRODUCT_WORDS)]
+        name = f"{rng.choice(family)} {rng.choice(('Pro', 'Lite', 'Max', 'Eco', 'Plus', ''))} #{n}".replace("  ", " ")
+        cents = max(199, int(round(rng.lognormvariate(math.log(3500), 0.8), -1)) - 1)
+        rows.append((f"GP{n:07d}", f"SKU{n:07d}", name, "Generated product", from_cents(cents), cents,
+                     rng.randint(0, 500), db.product_category(name)))
+        if len(rows) >= batch:
+            q.executemany(conn, "products.seed", rows); conn.commit(); rows = []
+            _progress("products", n - start + 1, count, started)
+    if rows:
+        q.executemany(conn, "products.seed", rows); conn.commit()
+    _progress("products", count, count, started); print()
+
+
+def generate_customers(conn, count, rng, batch):
+    start = q.execute(conn, "users.next_pk").fetchone()[0]
+    levels = [t for t, _ in TIERS]
+    cum = list(itertools.accumulate(w for _, w in TIERS))
+    started = time.perf_counter()
+    password = passwords.hash_password("gen123")  # one KDF run shared by every generated login
+    rows = []
+    for n in range(start, start + count):
+        level = rng.choices(levels, cum_weights=cum)[0]
+        rows.append((f"G{n:07d}", f"gen{n}", password, "Customer", f"Customer {n}", f"gen{n}@example.com",
+                     f"{rng.randint(1, 999)} Queen St, Auckland", level, int(rng.expovariate(1 / 150))))
+        if len(rows) >= batch:
+            q.executemany(conn, "users.seed", rows); conn.commit(); rows = []
+            _progress("customers", n - start + 1, count, started)
+    if rows:
+        q.executemany(conn, "users.seed", rows); conn.commit()
+    _progress("customers", count, count, started); print()
+
+
+def generate_sales(conn, count, years, rng, batch, walk_in=0.2, mean_lines=2.5):
+    products = [(r[0], r[3] if r[3] is not None else int(round(r[2] * 100)))
+                for r in q.execute(conn, "products.all").fetchall()]
+    customers = [r[1] for r in q.execute(conn, "users.customers").fetchall()]
+    if not products:
+        raise SystemExit("no products: generate some first (--products)")
+    rng.shuffle(products)
+    rng.shuffle(customers)
+    product_cum = _zipf_cum_weights(len(products))
+    customer_cum = _zipf_cum_weights(len(customers), 0.6) if customers else None
+    hours = list(range(24))
+    p_more = 1 - 1 / mean_lines  # geometric basket size
+
+    days = max(1, int(365 * years))
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    day_weights = [WEEKDAY_WEIGHTS[(first_day + timedelta(days=d)).weekday()] for d in range(days)]
+    per_weight = count / sum(day_weights)
+
+    sale_id = q.execute(conn, "sales.max_id").fetchone()[0]
+    sales, lines, made, carry = [], [], 0, 0.0
+    started = time.perf_counter()
+    for d in range(days):
+        carry += day_weights[d] * per_weight
+        n_today = min(int(carry), count - made)
+        carry -= n_today
+        if n_today <= 0:
+            continue
+        day = first_day + timedelta(days=d)
+        for hour in sorted(rng.choices(hours, weights=HOUR_WEIGHTS, k=n_today)):
+            sale_id += 1
+            when = day + timedelta(hours=hour, seconds=rng.randrange(3600))
+            n_lines = 1
+            while rng.random() < p_more and n_lines < 30:
+                n_lines += 1
+            total = gst = 0
+            for pid, unit in dict(rng.choices(products, cum_weights=product_cum, k=n_lines)).items():
+                qty = 1 if rng.random() < 0.8 else rng.randint(2, 4)
+                net = unit * qty
+                line_gst = apply_rate(net, GST_BP)
+                total += net + line_gst
+                gst += line_gst
+                lines.append((sale_id, pid, qty, from_cents(unit), from_cents(net + line_gst), unit, net + line_gst, line_gst))
+            customer = None if not customers or rng.random() < walk_in else \
+                rng.choices(customers, cum_weights=customer_cum)[0]
+            ts = when.isoformat(timespec='seconds')
+            sales.append((sale_id, ts, None, customer, from_cents(total), from_cents(gst), total, gst,
+                          (when + timedelta(days=3)).date().isoformat()))
+            made += 1
+            if len(sales) >= batch:
+                q.executemany(conn, "datagen.sales", sales)
+                q.executemany(conn, "sale_lines.insert", lines)
+                conn.commit()
+                sales, lines = [], []
+                _progress("sales", made, count, started)
+    if sales:
+        q.executemany(conn, "datagen.sales", sales)
+        q.executemany(conn, "sale_lines.insert", lines)
+        conn.commit()
+    _progress("sales", made, count, started); print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic FitNZ data for scale testing")
+    parser.add_argument("--db", help="SQLite file to fill (default: the configured database)")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--years", type=float, default=2.0, help="spread sales over this many years up to today")
+    parser.add_argument("--walk-in", type=float, default=0.2, help="fraction of sales without a customer")
+    parser.add_argument("--batch", type=int, default=10000, help="rows per transaction")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_PATH = args.db
+    db.setup_database()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    conn = db.get_conn()
+    try:
+        if q.dialect_of(conn) == "sqlite":
+            # Throwaway data: trade durability for load speed.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+        if args.products:
+            generate_products(conn, args.products, rng, args.batch)
+        if args.customers:
+            generate_customers(conn, args.customers, rng, args.batch)
+        if args.sales:
+            generate_sales(conn, args.sales, args.years, rng, args.batch, args.walk_in)
+    finally:
+        conn.close()
+    db.setup_database()  # opens loyalty balances for the new customers
+    db.release_pool()  # let the caller copy or re-open the file
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,911 @@
+# File: FITNZ/db_queries.py
+"""
+Named SQL statements for database_mysql.
+
+Every statement is written once with qmark (?) placeholders and compiled
+on first use for the connection's dialect (SQLite keeps ?, MySQL gets %s).
+Statements whose syntax differs between engines (DDL) carry one text per
+dialect. Execution goes through execute()/executemany(), which reuse a
+prepared cursor per statement on MySQL connections and record per-statement
+counts, latency histograms and rows for statement_timings()/snapshot().
+Statements slower than the set_slow_query_log() threshold are logged with
+their parameters redacted; start_periodic_dump() writes format_report() to
+a file every few seconds.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from datetime import datetime
+
+from . import metrics
+
+# ===============================================
+# Code Owner: Imran (US: Admin/Reports - Core DB Access & Management)
+# ===============================================
+
+# Size of sqlite3's per-connection statement cache (the default is 128).
+STATEMENT_CACHE_SIZE = 256
+
+# Users are always read with their live loyalty balance: one primary-key
+# probe into loyalty_balances per row.
+USER_SELECT = (
+    "SELECT u.id, u.user_id, u.username, u.password, u.role, u.name, u.contact, u.address, "
+    "u.membership_level, COALESCE(b.balance, u.loyalty_points) AS loyalty_points "
+    "FROM users u LEFT JOIN loyalty_balances b ON b.user_id = u.user_id"
+)
+
+# Just what the customer picker shows.
+CUSTOMER_PICK = "SELECT u.user_id, u.name, u.contact, u.membership_level FROM users u"
+
+STATEMENTS = {
+    # ---------------------------- schema ----------------------------
+    "schema.users": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            username TEXT UNIQUE,
+            password TEXT,
+            role TEXT,
+            name TEXT,
+            contact TEXT,
+            address TEXT,
+            membership_level TEXT DEFAULT 'Standard',
+            loyalty_points INTEGER DEFAULT 0
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS users (
+            id INT PRIMARY KEY AUTO_INCREMENT,
+            user_id VARCHAR(32),
+            username VARCHAR(64) UNIQUE,
+            password VARCHAR(255),
+            role VARCHAR(32),
+            name VARCHAR(255),
+            contact VARCHAR(255),
+            address VARCHAR(255),
+            membership_level VARCHAR(32) DEFAULT 'Standard',
+            loyalty_points INT DEFAULT 0
+        )""",
+    },
+    "schema.products": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT UNIQUE,
+            sku TEXT,
+            name TEXT,
+            description TEXT,
+            price REAL,
+            stock INTEGER DEFAULT 0
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS products (
+            id INT PRIMARY KEY AUTO_INCREMENT,
+            product_id VARCHAR(32) UNIQUE,
+            sku VARCHAR(64),
+            name VARCHAR(255),
+            description TEXT,
+            price DOUBLE,
+            stock INT DEFAULT 0
+        )""",
+    },
+    "schema.sales": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT,
+            user_id TEXT,
+            customer_id TEXT,
+            total REAL,
+            gst REAL,
+            delivery_date TEXT
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS sales (
+            id INT PRIMARY KEY AUTO_INCREMENT,
+            datetime VARCHAR(19),
+            user_id VARCHAR(32),
+            customer_id VARCHAR(32),
+            total DOUBLE,
+            gst DOUBLE,
+            delivery_date VARCHAR(32)
+        )""",
+    },
+    "schema.sale_lines": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS sale_lines (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sale_id INTEGER,
+            product_id TEXT,
+            qty INTEGER,
+            unit_price REAL,
+            line_total REAL
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS sale_lines (
+            id INT PRIMARY KEY AUTO_INCREMENT,
+            sale_id INT,
+            product_id VARCHAR(32),
+            qty INT,
+            unit_price DOUBLE,
+            line_total DOUBLE
+        )""",
+    },
+
+    # Append-only points ledger plus one balance row per member. `balance`
+    # is kept current by relative updates in the same transaction as the
+    # ledger insert; snapshot_* is the compacted checkpoint of the ledger.
+    "schema.loyalty_ledger": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS loyalty_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            delta INTEGER NOT NULL,
+            reason TEXT,
+            sale_id INTEGER,
+            created_at TEXT
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS loyalty_ledger (
+            id BIGINT PRIMARY KEY AUTO_INCREMENT,
+            user_id VARCHAR(32) NOT NULL,
+            delta INT NOT NULL,
+            reason VARCHAR(32),
+            sale_id INT,
+            created_at VARCHAR(19)
+        )""",
+    },
+    "schema.loyalty_balances": {
+        "sqlite": """CREATE TABLE IF NOT EXISTS loyalty_balances (
+            user_id TEXT PRIMARY KEY,
+            balance INTEGER NOT NULL DEFAULT 0,
+            snapshot_balance INTEGER NOT NULL DEFAULT 0,
+            snapshot_entry_id INTEGER NOT NULL DEFAULT 0,
+            snapshot_at TEXT
+        )""",
+        "mysql": """CREATE TABLE IF NOT EXISTS loyalty_balances (
+            user_id VARCHAR(32) PRIMARY KEY,
+            balance INT NOT NULL DEFAULT 0,
+            snapshot_balance INT NOT NULL DEFAULT 0,
+            snapshot_entry_id BIGINT NOT NULL DEFAULT 0,
+            snapshot_at VARCHAR(19)
+        )""",
+    },
+
+    # Legacy `customers` table -> view over users (see _migrate_customers).
+    "meta.columns": {
+        "sqlite": "SELECT name FROM pragma_table_info(?)",
+        "mysql": "SELECT COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ?",
+    },
+    "meta.object_kind": {
+        "sqlite": "SELECT type FROM sqlite_master WHERE name=?",
+        "mysql": "SELECT CASE TABLE_TYPE WHEN 'VIEW' THEN 'view' ELSE 'table' END "
+                 "FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ?",
+    },
+    "migrate.customers_into_users": """
+        INSERT INTO users (user_id, role, name, contact, membership_level, loyalty_points)
+        SELECT c.customer_id, 'Customer', c.name, COALESCE(c.email, c.phone), c.tier, c.loyalty_points
+        FROM customers c
+        WHERE c.customer_id IS NOT NULL
+          AND c.id = (SELECT MIN(c2.id) FROM customers c2 WHERE c2.customer_id = c.customer_id)
+          AND NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = c.customer_id)""",
+    "migrate.retire_customers_table": "ALTER TABLE customers RENAME TO customers_legacy",
+    "view.customers_drop": "DROP VIEW IF EXISTS customers",
+    "view.customers": {
+        "sqlite": """CREATE VIEW IF NOT EXISTS customers AS
+            SELECT u.id, u.user_id AS customer_id, u.name, u.contact AS email, u.contact AS phone,
+                   u.membership_level AS tier, COALESCE(b.balance, u.loyalty_points) AS loyalty_points
+            FROM users u LEFT JOIN loyalty_balances b ON b.user_id = u.user_id
+            WHERE u.role = 'Customer'""",
+        "mysql": """CREATE OR REPLACE VIEW customers AS
+            SELECT u.id, u.user_id AS customer_id, u.name, u.contact AS email, u.contact AS phone,
+                   u.membership_level AS tier, COALESCE(b.balance, u.loyalty_points) AS loyalty_points
+            FROM users u LEFT JOIN loyalty_balances b ON b.user_id = u.user_id
+            WHERE u.role = 'Customer'""",
+    },
+
+    # ---------------------------- indexes ---------------------------
+    # MySQL has no CREATE INDEX IF NOT EXISTS; setup_database ignores
+    # "duplicate key name" errors instead.
+    "index.users_user_id": {
+        "sqlite": "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_user_id ON users(user_id)",
+        "mysql": "CREATE UNIQUE INDEX ux_users_user_id ON users(user_id)",
+    },
+    "index.users_role": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_role ON users(role)",
+        "mysql": "CREATE INDEX ix_users_role ON users(role)",
+    },
+    # Prefix search for the customer picker. SQLite only range-scans a
+    # case-insensitive LIKE on a NOCASE index; MySQL's _ci collations already are.
+    "index.users_role_user_id": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_role_user_id ON users(role, user_id)",
+        "mysql": "CREATE INDEX ix_users_role_user_id ON users(role, user_id)",
+    },
+    "index.users_role_name": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_role_name ON users(role, name COLLATE NOCASE)",
+        "mysql": "CREATE INDEX ix_users_role_name ON users(role, name)",
+    },
+    "index.users_role_contact": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_role_contact ON users(role, contact COLLATE NOCASE)",
+        "mysql": "CREATE INDEX ix_users_role_contact ON users(role, contact)",
+    },
+    # Admin user search (prefix of username, name or user_id, any role).
+    # MySQL's unique username/user_id indexes already serve a _ci LIKE, so
+    # only SQLite needs NOCASE copies of those.
+    "index.users_name": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_name ON users(name COLLATE NOCASE)",
+        "mysql": "CREATE INDEX ix_users_name ON users(name)",
+    },
+    "index.users_username_nocase": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_username_nocase ON users(username COLLATE NOCASE)",
+    },
+    "index.users_user_id_nocase": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_users_user_id_nocase ON users(user_id COLLATE NOCASE)",
+    },
+    # Covers both order history and rolling spend (tier recomputation).
+    "index.sales_customer": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_sales_customer_cents ON sales(customer_id, datetime, total_cents)",
+        "mysql": "CREATE INDEX ix_sales_customer_cents ON sales(customer_id, datetime, total_cents)",
+    },
+    # Replaced by ix_sales_customer_cents once spend moved to total_cents.
+    "index.drop.sales_customer_spend": {
+        "sqlite": "DROP INDEX IF EXISTS ix_sales_customer_spend",
+        "mysql": "DROP INDEX ix_sales_customer_spend ON sales",
+    },
+    "index.sales_datetime": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_sales_datetime ON sales(datetime)",
+        "mysql": "CREATE INDEX ix_sales_datetime ON sales(datetime)",
+    },
+    "index.sale_lines_sale": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_sale_lines_sale ON sale_lines(sale_id)",
+        "mysql": "CREATE INDEX ix_sale_lines_sale ON sale_lines(sale_id)",
+    },
+    "index.loyalty_ledger_user": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_loyalty_ledger_user ON loyalty_ledger(user_id, id)",
+        "mysql": "CREATE INDEX ix_loyalty_ledger_user ON loyalty_ledger(user_id, id)",
+    },
+    # Scanner lookups; unique so a code always means one product (NULLs allowed).
+    "index.products_sku": {
+        "sqlite": "CREATE UNIQUE INDEX IF NOT EXISTS ux_products_sku ON products(sku)",
+        "mysql": "CREATE UNIQUE INDEX ux_products_sku ON products(sku)",
+    },
+    "index.products_barcode": {
+        "sqlite": "CREATE UNIQUE INDEX IF NOT EXISTS ux_products_barcode ON products(barcode)",
+        "mysql": "CREATE UNIQUE INDEX ux_products_barcode ON products(barcode)",
+    },
+    # Grid views (see GRIDS): each sort key has an index to walk in order.
+    "index.products_category_price": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_products_category_price ON products(category, price_cents)",
+        "mysql": "CREATE INDEX ix_products_category_price ON products(category, price_cents)",
+    },
+    "index.products_price": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_products_price ON products(price_cents)",
+        "mysql": "CREATE INDEX ix_products_price ON products(price_cents)",
+    },
+    "index.products_stock": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_products_stock ON products(stock)",
+        "mysql": "CREATE INDEX ix_products_stock ON products(stock)",
+    },
+    "index.sales_total": {
+        "sqlite": "CREATE INDEX IF NOT EXISTS ix_sales_total ON sales(total_cents)",
+        "mysql": "CREATE INDEX ix_sales_total ON sales(total_cents)",
+    },
+
+    # ---------------------------- users -----------------------------
+    "users.count": "SELECT COUNT(*) FROM users",
+    "users.all": USER_SELECT,
+    "users.customers": USER_SELECT + " WHERE u.role = 'Customer'",
+    "users.next_pk": "SELECT COALESCE(MAX(id), 0) + 1 FROM users",
+    "users.by_pk": USER_SELECT + " WHERE u.id=?",
+    "users.by_user_id": USER_SELECT + " WHERE u.user_id=?",
+    "users.by_username": USER_SELECT + " WHERE u.username=?",
+    "users.by_username_role": USER_SELECT + " WHERE u.username=? AND u.role=?",
+    "users.set_password": "UPDATE users SET password=? WHERE username=?",
+    "users.seed": "INSERT INTO users (user_id, username, password, role, name, contact, address, membership_level, loyalty_points) "
+                  "VALUES (?,?,?,?,?,?,?,?,?)",
+    "users.insert": "INSERT INTO users (user_id, username, password, role, name, contact, address) VALUES (?,?,?,?,?,?,?)",
+    "users.delete_by_user_id": "DELETE FROM users WHERE user_id=?",
+    "users.set_membership_by_user_id": "UPDATE users SET membership_level=? WHERE user_id=?",
+    "users.customer_id_bounds": "SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM users WHERE role = 'Customer'",
+    # Set-based re-tier of one primary-key range from rolling spend (thresholds in cents).
+    "users.retier_range": """
+        UPDATE users SET membership_level = (
+            SELECT CASE
+                WHEN COALESCE(SUM(s.total_cents), 0) >= ? THEN 'Gold'
+                WHEN COALESCE(SUM(s.total_cents), 0) >= ? THEN 'Silver'
+                WHEN COALESCE(SUM(s.total_cents), 0) >= ? THEN 'Bronze'
+                ELSE 'Standard' END
+            FROM sales s
+            WHERE s.customer_id = users.user_id AND s.datetime >= ?)
+        WHERE role = 'Customer' AND COALESCE(membership_level, '') <> 'Student'
+          AND id > ? AND id <= ?""",
+    # Type-ahead customer lookup: one index range scan each, LIMIT rows.
+    # The LIKE patterns are prefixes escaped with '!' (see database_mysql.search_customers).
+    "customers.prefix_user_id": CUSTOMER_PICK + " WHERE u.role = 'Customer' AND u.user_id >= ? AND u.user_id < ? "
+                                "ORDER BY u.user_id LIMIT ?",
+    "customers.prefix_name": {
+        "sqlite": CUSTOMER_PICK + " WHERE u.role = 'Customer' AND u.name LIKE ? ESCAPE '!' "
+                                  "ORDER BY u.name COLLATE NOCASE LIMIT ?",
+        "mysql": CUSTOMER_PICK + " WHERE u.role = 'Customer' AND u.name LIKE ? ESCAPE '!' ORDER BY u.name LIMIT ?",
+    },
+    "customers.prefix_contact": {
+        "sqlite": CUSTOMER_PICK + " WHERE u.role = 'Customer' AND u.contact LIKE ? ESCAPE '!' "
+                                  "ORDER BY u.contact COLLATE NOCASE LIMIT ?",
+        "mysql": CUSTOMER_PICK + " WHERE u.role = 'Customer' AND u.contact LIKE ? ESCAPE '!' ORDER BY u.contact LIMIT ?",
+    },
+
+    # --------------------------- loyalty ----------------------------
+    "loyalty.append": "INSERT INTO loyalty_ledger (user_id, delta, reason, sale_id, created_at) VALUES (?,?,?,?,?)",
+    "loyalty.credit": "UPDATE loyalty_balances SET balance = balance + ? WHERE user_id = ?",
+    # Guarded debit: matches no row when the balance can't cover it.
+    "loyalty.debit": "UPDATE loyalty_balances SET balance = balance - ? WHERE user_id = ? AND balance >= ?",
+    "loyalty.open_balance": "INSERT INTO loyalty_balances (user_id, balance, snapshot_balance, snapshot_entry_id, snapshot_at) "
+                            "VALUES (?, 0, 0, 0, ?)",
+    "loyalty.balance": "SELECT balance FROM loyalty_balances WHERE user_id = ?",
+    "loyalty.max_entry": "SELECT COALESCE(MAX(id), 0) FROM loyalty_ledger",
+    "loyalty.seed_opening_entries": """
+        INSERT INTO loyalty_ledger (user_id, delta, reason, sale_id, created_at)
+        SELECT u.user_id, u.loyalty_points, 'opening', NULL, ?
+        FROM users u
+        WHERE u.role = 'Customer' AND u.user_id IS NOT NULL AND COALESCE(u.loyalty_points, 0) <> 0
+          AND NOT EXISTS (SELECT 1 FROM loyalty_balances b WHERE b.user_id = u.user_id)""",
+    "loyalty.seed_balances": """
+        INSERT INTO loyalty_balances (user_id, balance, snapshot_balance, snapshot_entry_id, snapshot_at)
+        SELECT u.user_id, COALESCE(u.loyalty_points, 0), 0, 0, ?
+        FROM users u
+        WHERE u.role = 'Customer' AND u.user_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM loyalty_balances b WHERE b.user_id = u.user_id)""",
+    # Compaction: fold ledger entries up to a fixed id into each snapshot,
+    # then resync the live balance from snapshot + remaining tail.
+    "loyalty.compact_snapshots": """
+        UPDATE loyalty_balances SET
+            snapshot_balance = snapshot_balance + COALESCE((
+                SELECT SUM(l.delta) FROM loyalty_ledger l
+                WHERE l.user_id = loyalty_balances.user_id
+                  AND l.id > loyalty_balances.snapshot_entry_id AND l.id <= ?), 0),
+            snapshot_entry_id = ?,
+            snapshot_at = ?
+        WHERE snapshot_entry_id < ?""",
+    "loyalty.resync_balances": """
+        UPDATE loyalty_balances SET balance = snapshot_balance + COALESCE((
+            SELECT SUM(l.delta) FROM loyalty_ledger l
+            WHERE l.user_id = loyalty_balances.user_id AND l.id > loyalty_balances.snapshot_entry_id), 0)""",
+    "loyalty.prune_ledger": "DELETE FROM loyalty_ledger WHERE id <= ?",
+    # Keep the legacy users.loyalty_points column readable by old tools.
+    "loyalty.sync_users": """
+        UPDATE users SET loyalty_points = (
+            SELECT b.balance FROM loyalty_balances b WHERE b.user_id = users.user_id)
+        WHERE role = 'Customer'
+          AND EXISTS (SELECT 1 FROM loyalty_balances b WHERE b.user_id = users.user_id)""",
+
+    # --------------------------- products ---------------------------
+    "products.count": "SELECT COUNT(*) FROM products",
+    "products.next_pk": "SELECT COALESCE(MAX(id), 0) + 1 FROM products",
+    "products.all": "SELECT product_id, name, price, price_cents, stock, category FROM products",
+    "products.by_product_id": "SELECT product_id, name, price, price_cents, stock, category FROM products WHERE product_id=?",
+    "products.by_id_or_pk": "SELECT product_id, name, price, price_cents, stock, category FROM products WHERE product_id=? OR id=?",
+    # Everything the scanner's in-memory code index needs, in one pass.
+    "products.scan_codes": "SELECT product_id, sku, barcode, name, price, price_cents, stock, category FROM products "
+                           "WHERE sku IS NOT NULL OR barcode IS NOT NULL",
+    "products.by_code": "SELECT product_id, sku, barcode, name, price, price_cents, stock, category FROM products "
+                        "WHERE sku=? OR barcode=?",
+    "products.search_docs": "SELECT product_id, name, sku FROM products",
+    "products.search_doc": "SELECT product_id, name, sku FROM products WHERE product_id=?",
+    "products.set_barcode": "UPDATE products SET barcode=? WHERE product_id=?",
+    "products.seed": "INSERT INTO products (product_id, sku, name, description, price, price_cents, stock, category) "
+                     "VALUES (?,?,?,?,?,?,?,?)",
+    "products.insert": "INSERT INTO products (product_id, name, description, price, price_cents, stock, category) "
+                       "VALUES (?,?,?,?,?,?,?)",
+    "products.update": "UPDATE products SET name=?, price=?, price_cents=?, stock=?, category=? WHERE product_id=?",
+    "products.delete": "DELETE FROM products WHERE product_id=?",
+    # Guarded decrement: matches no row when there isn't enough stock left.
+    "products.reserve_stock": "UPDATE products SET stock = stock - ? WHERE product_id = ? AND stock >= ?",
+
+    # ---------------------------- sales -----------------------------
+    "sales.insert": "INSERT INTO sales (datetime, user_id, customer_id, total, gst, total_cents, gst_cents, delivery_date) "
+                    "VALUES (?,?,?,?,?,?,?,?)",
+    "sales.max_id": "SELECT COALESCE(MAX(id), 0) FROM sales",
+    # Bulk loads (datagen) assign sale ids up front so lines can be batched too.
+    "datagen.sales": "INSERT INTO sales (id, datetime, user_id, customer_id, total, gst, total_cents, gst_cents, delivery_date) "
+                     "VALUES (?,?,?,?,?,?,?,?,?)",
+    "datagen.restock": "UPDATE products SET stock = ?",
+    "datagen.top_customer": "SELECT customer_id FROM sales WHERE customer_id IS NOT NULL "
+                            "GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1",
+    "sale_lines.insert": "INSERT INTO sale_lines (sale_id, product_id, qty, unit_price, line_total, "
+                         "unit_price_cents, line_total_cents, line_gst_cents) VALUES (?,?,?,?,?,?,?,?)",
+    # Walk-in sales have no customer_id, so the join stays LEFT; each match
+    # is a probe of the unique users.user_id index.
+    "sales.all_with_customer": """
+        SELECT s.id, s.datetime, s.customer_id, s.total, s.gst, s.delivery_date,
+               u.name AS customer_name
+        FROM sales s
+        LEFT JOIN users u ON u.user_id = s.customer_id
+        ORDER BY s.datetime DESC""",
+    "sales.by_customer": """
+        SELECT id, datetime, total, gst, delivery_date
+        FROM sales WHERE customer_id = ?
+        ORDER BY datetime DESC""",
+    "sale_lines.by_sale": """
+        SELECT sl.product_id, COALESCE(p.name, sl.product_id) AS name, sl.qty, sl.unit_price, sl.line_total
+        FROM sale_lines sl
+        LEFT JOIN products p ON p.product_id = sl.product_id
+        WHERE sl.sale_id = ?
+        ORDER BY sl.id""",
+}
+
+# Server-side grid views: whitelisted sort keys and filters per grid.
+# grid_statements() turns one combination into a named page + count pair.
+GRIDS = {
+    "products": {
+        "select": "SELECT p.product_id, p.name, p.price, p.price_cents, p.stock, p.category",
+        "from": "FROM products p",
+        "count_from": "FROM products p",
+        "key": "p.id",
+        "sorts": {"name": "p.name", "price": "p.price_cents", "stock": "p.stock", "category": "p.category"},
+        "filters": {
+            "category": "p.category = ?",
+            "name": "p.name LIKE ?",
+            "min_price": "p.price_cents >= ?",
+            "max_price": "p.price_cents <= ?",
+            "min_stock": "p.stock >= ?",
+            "max_stock": "p.stock <= ?",
+        },
+    },
+    "sales": {
+        "select": "SELECT s.id, s.datetime, s.customer_id, s.total, s.gst, s.delivery_date, "
+                  "u.name AS customer_name, s.total_cents",
+        "from": "FROM sales s LEFT JOIN users u ON u.user_id = s.customer_id",
+        "count_from": "FROM sales s",
+        # Columns summed in Python for the report footer (see grid_column_statement).
+        "totals": "SELECT s.total_cents, s.gst_cents",
+        "key": "s.id",
+        # Customer sorts by the name shown. A name from the joined table can't come
+        # off an index, so this sorts the filtered rows (the date range keeps that small).
+        "sorts": {"date": "s.datetime", "total": "s.total_cents", "customer": "COALESCE(u.name, 'Walk-in')"},
+        "filters": {
+            "date_from": "s.datetime >= ?",
+            "date_to": "s.datetime < ?",
+            "min_total": "s.total_cents >= ?",
+            "max_total": "s.total_cents <= ?",
+            "customer": "s.customer_id = ?",
+        },
+    },
+    # Admin user list: never selects the password column.
+    "users": {
+        "select": "SELECT u.user_id, u.username, u.role, u.name",
+        "from": "FROM users u",
+        "count_from": "FROM users u",
+        "key": "u.id",
+        # Case-insensitive name order, so SQLite can walk the NOCASE name indexes.
+        "sorts": {"user_id": "u.user_id", "username": "u.username", "role": "u.role",
+                  "name": {"sqlite": "u.name COLLATE NOCASE", "mysql": "u.name"}},
+        "filters": {
+            "role": "u.role = ?",
+            "search": "(u.username LIKE ? ESCAPE '!' OR u.name LIKE ? ESCAPE '!' OR u.user_id LIKE ? ESCAPE '!')",
+        },
+    },
+}
+
+
+def grid_statements(grid, sort, descending, filter_keys, count_cap=None):
+    """
+    Register (once) and return the (page, count) statement names for one
+    sort/filter combination of `grid`. Page statements bind grid_params(),
+    then LIMIT and OFFSET. With count_cap the count stops at count_cap + 1
+    rows, so "more than count_cap" costs no more than reading that many.
+    """
+    spec = GRIDS[grid]
+    column = spec["sorts"][sort]
+    keys = tuple(filter_keys)
+    direction = "DESC" if descending else "ASC"
+    name = f"grid.{grid}.{sort}.{direction.lower()}.{'+'.join(keys) or 'all'}"
+    count_name = name + (f".count{count_cap}" if count_cap else ".count")
+    if name not in STATEMENTS:
+        def page(column):
+            return (f"{spec['select']} {spec['from']}{_grid_where(spec, keys)} "
+                    f"ORDER BY {column} {direction}, {spec['key']} {direction} LIMIT ? OFFSET ?")
+        STATEMENTS[name] = ({dialect: page(c) for dialect, c in column.items()}
+                            if isinstance(column, dict) else page(column))
+    if count_name not in STATEMENTS:
+        where = _grid_where(spec, keys)
+        if count_cap:
+            STATEMENTS[count_name] = (f"SELECT COUNT(*) FROM (SELECT 1 {spec['count_from']}{where} "
+                                      f"LIMIT {int(count_cap) + 1}) capped")
+        else:
+            STATEMENTS[count_name] = f"SELECT COUNT(*) {spec['count_from']}{where}"
+    return name, count_name
+
+
+def grid_column_statement(grid, filter_keys):
+    """
+    Register (once) and return the name of a statement selecting the grid's
+    "totals" columns for every row that matches filter_keys (no paging).
+    """
+    spec = GRIDS[grid]
+    keys = tuple(filter_keys)
+    name = f"grid.{grid}.totals.{'+'.join(keys) or 'all'}"
+    if name not in STATEMENTS:
+        STATEMENTS[name] = f"{spec['totals']} {spec['count_from']}{_grid_where(spec, keys)}"
+    return name
+
+
+def _grid_where(spec, keys):
+    where = " AND ".join(spec["filters"][k] for k in keys)
+    return f" WHERE {where}" if where else ""
+
+
+def grid_params(grid, filters):
+    """Filter values in placeholder order; a filter may use its value more than once."""
+    spec = GRIDS[grid]["filters"]
+    return tuple(v for k, v in filters.items() for _ in range(spec[k].count("?")))
+
+
+# Batched product lookups (till_server) always bind this many ids.
+PRODUCT_BATCH = 32
+STATEMENTS["products.by_product_ids"] = (
+    "SELECT product_id, name, price, price_cents, stock, category FROM products WHERE product_id IN ("
+    + ",".join("?" * PRODUCT_BATCH) + ")")
+
+# Exact integer-cents columns kept next to the legacy REAL money columns
+# (table, cents column, legacy column to backfill from or None). Added by
+# setup_database when missing; the REAL columns are still written for old tools.
+MONEY_COLUMNS = (
+    ("products", "price_cents", "price"),
+    ("sales", "total_cents", "total"),
+    ("sales", "gst_cents", "gst"),
+    ("sale_lines", "unit_price_cents", "unit_price"),
+    ("sale_lines", "line_total_cents", "line_total"),
+    ("sale_lines", "line_gst_cents", None),
+)
+for _table, _column, _legacy in MONEY_COLUMNS:
+    STATEMENTS[f"migrate.add.{_table}.{_column}"] = f"ALTER TABLE {_table} ADD COLUMN {_column} BIGINT"
+    if _legacy:
+        STATEMENTS[f"migrate.backfill.{_table}.{_column}"] = (
+            f"UPDATE {_table} SET {_column} = ROUND({_legacy} * 100) WHERE {_column} IS NULL AND {_legacy} IS NOT NULL")
+
+# Other columns added after release (table, column, type); setup_database
+# adds them when missing.
+ADDED_COLUMNS = (
+    ("products", "barcode", "VARCHAR(64)"),
+    ("products", "category", "VARCHAR(32)"),
+)
+for _table, _column, _type in ADDED_COLUMNS:
+    STATEMENTS[f"migrate.add.{_table}.{_column}"] = f"ALTER TABLE {_table} ADD COLUMN {_column} {_type}"
+# Same rules as database_mysql.product_category, for rows from before the column.
+STATEMENTS["migrate.backfill.products.category"] = """
+    UPDATE products SET category = CASE
+        WHEN LOWER(name) LIKE '%protein%' OR LOWER(name) LIKE '%supplement%' THEN 'Nutrition'
+        WHEN LOWER(name) LIKE '%yoga%' OR LOWER(name) LIKE '%mat%' THEN 'Yoga'
+        WHEN LOWER(name) LIKE '%band%' THEN 'Accessories'
+        ELSE 'Equipment' END
+    WHERE category IS NULL"""
+
+# Tables created by setup_database, in dependency order.
+SCHEMA = (
+    "schema.users", "schema.products", "schema.sales", "schema.sale_lines",
+    "schema.loyalty_ledger", "schema.loyalty_balances",
+)
+# Indexes created (if missing) by setup_database after the tables; one
+# with no text for the connection's dialect is skipped.
+INDEXES = (
+    "index.users_user_id", "index.users_role", "index.users_role_user_id",
+    "index.users_role_name", "index.users_role_contact",
+    "index.users_name", "index.users_username_nocase", "index.users_user_id_nocase",
+    "index.sales_customer", "index.sales_datetime", "index.sale_lines_sale",
+    "index.loyalty_ledger_user", "index.products_sku", "index.products_barcode",
+    "index.products_category_price", "index.products_price", "index.products_stock", "index.sales_total",
+)
+
+# Indexes that an older database may still have; dropped by setup_database.
+RETIRED_INDEXES = ("index.drop.sales_customer_spend",)
+
+_compiled = {}
+_prepared = weakref.WeakKeyDictionary()
+_seen = weakref.WeakKeyDictionary()  # sqlite connection -> names already run on it
+_timings = {}  # name -> [count, exec_s, worst_s, rows, fetch_s, histogram, cache_hits]
+_timings_lock = threading.Lock()
+
+# Upper bounds (ms) of the latency histogram buckets; one more open-ended
+# bucket catches everything slower.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+_BUCKET_BOUNDS = tuple(ms / 1000 for ms in LATENCY_BUCKETS_MS)
+
+_connections = {"opened": 0, "reused": 0, "connect_s": 0.0}
+_since = time.time()
+_slow = {"threshold": None, "path": None, "count": 0}
+_slow_lock = threading.Lock()
+
+
+def dialect_of(conn):
+    """Return 'sqlite' or 'mysql' for an open DB-API connection."""
+    return "sqlite" if isinstance(conn, sqlite3.Connection) else "mysql"
+
+
+def compile_statement(name, dialect):
+    """Return the SQL text of statement `name` for `dialect`, compiling it on first use."""
+    key = (name, dialect)
+    text = _compiled.get(key)
+    if text is None:
+        source = STATEMENTS[name]
+        if isinstance(source, dict):
+            source = source[dialect]
+        text = source.replace("?", "%s") if dialect == "mysql" else source
+        _compiled[key] = text
+    return text
+
+
+def _cursor_for(conn, name, dialect, has_params):
+    """
+    (cursor, cached): cached is True when this connection has run `name`
+    before, so sqlite's statement cache or the prepared cursor skips the parse.
+    Only connections that outlive one call (the get_conn pool) ever hit.
+    """
+    if dialect != "mysql":
+        try:
+            seen = _seen.setdefault(conn, set())
+        except TypeError:
+            # plain sqlite3.Connection (no pool): opened for this call only
+            return conn.cursor(), False
+        # sqlite's cache is an LRU of STATEMENT_CACHE_SIZE; a connection would
+        # need that many distinct statements before a "cached" run re-parses.
+        cached = name in seen
+        seen.add(name)
+        return conn.cursor(), cached
+    if not has_params:
+        return conn.cursor(), False
+    # One prepared cursor per statement per connection: mysql.connector only
+    # re-prepares when the operation text changes.
+    try:
+        cursors = _prepared.setdefault(conn, {})
+    except TypeError:
+        return conn.cursor(prepared=True), False
+    cur = cursors.get(name)
+    if cur is None:
+        cur = cursors[name] = conn.cursor(prepared=True)
+        return cur, False
+    return cur, True
+
+
+def _record(name, elapsed, rows=0, cached=False):
+    with _timings_lock:
+        entry = _timings.get(name)
+        if entry is None:
+            entry = _timings[name] = [0, 0.0, 0.0, 0, 0.0, [0] * (len(_BUCKET_BOUNDS) + 1), 0]
+        entry[0] += 1
+        entry[6] += cached
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+        entry[3] += rows
+        entry[5][bisect_left(_BUCKET_BOUNDS, elapsed)] += 1
+    return entry
+
+
+class _CountingCursor:
+    """Result-set cursor that adds fetched rows and fetch time to its statement's entry."""
+
+    __slots__ = ("_cur", "_entry")
+
+    def __init__(self, cur, entry):
+        self._cur = cur
+        self._entry = entry
+
+    def _add(self, rows, start):
+        elapsed = time.perf_counter() - start
+        with _timings_lock:
+            self._entry[3] += rows
+            self._entry[4] += elapsed
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cur.fetchone()
+        self._add(row is not None, start)
+        return row
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        rows = self._cur.fetchmany(*args)
+        self._add(len(rows), start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cur.fetchall()
+        self._add(len(rows), start)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def _redact(params):
+    """Parameter types (and string lengths) only: values never reach the log."""
+    return "(" + ", ".join(
+        f"str[{len(p)}]" if isinstance(p, str) else type(p).__name__ for p in params) + ")"
+
+
+def _log_slow(name, sql, params, elapsed):
+    line = (f"{datetime.now().isoformat(timespec='milliseconds')} slow query {elapsed * 1000:.1f} ms "
+            f"{name} params={params} sql={sql}")
+    with _slow_lock:
+        _slow["count"] += 1
+        path = _slow["path"]
+        if path:
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                return
+            except OSError as e:
+                print("slow query log error:", e)
+        print(line, file=sys.stderr)
+
+
+def set_slow_query_log(threshold_ms, path=None):
+    """Log statements taking at least `threshold_ms` to `path` (stderr if None); None disables."""
+    with _slow_lock:
+        _slow["threshold"] = None if threshold_ms is None else float(threshold_ms) / 1000
+        _slow["path"] = path
+
+
+def record_connection(elapsed, reused=False):
+    """Called by get_conn(): a new connection took `elapsed` seconds, or a pooled one was reused."""
+    with _timings_lock:
+        if reused:
+            _connections["reused"] += 1
+        else:
+            _connections["opened"] += 1
+            _connections["connect_s"] += elapsed
+
+
+def execute(conn, name, params=()):
+    """Execute named statement `name` on `conn` and return the cursor."""
+    dialect = dialect_of(conn)
+    sql = compile_statement(name, dialect)
+    cur, cached = _cursor_for(conn, name, dialect, bool(params))
+    start = time.perf_counter()
+    try:
+        if params:
+            cur.execute(sql, tuple(params))
+        else:
+            cur.execute(sql)
+    except Exception:
+        metrics.DB_ERRORS.inc(statement=name)
+        raise
+    elapsed = time.perf_counter() - start
+    result_set = cur.description is not None
+    entry = _record(name, elapsed, 0 if result_set else max(cur.rowcount, 0), cached)
+    threshold = _slow["threshold"]
+    if threshold is not None and elapsed >= threshold:
+        _log_slow(name, sql, _redact(params), elapsed)
+    return _CountingCursor(cur, entry) if result_set else cur
+
+
+def executemany(conn, name, seq_of_params):
+    """Execute named statement `name` once per parameter tuple and return the cursor."""
+    dialect = dialect_of(conn)
+    sql = compile_statement(name, dialect)
+    cur, cached = _cursor_for(conn, name, dialect, False)
+    start = time.perf_counter()
+    try:
+        cur.executemany(sql, seq_of_params)
+    except Exception:
+        metrics.DB_ERRORS.inc(statement=name)
+        raise
+    elapsed = time.perf_counter() - start
+    _record(name, elapsed, max(cur.rowcount, 0), cached)
+    threshold = _slow["threshold"]
+    if threshold is not None and elapsed >= threshold:
+        _log_slow(name, sql, "[batch]", elapsed)
+    return cur
+
+
+def _percentile_ms(histogram, count, p):
+    """Upper bound of the bucket holding the p-th percentile (worst for the open bucket)."""
+    rank = p * count
+    seen = 0
+    for bound, n in zip(LATENCY_BUCKETS_MS, histogram):
+        seen += n
+        if seen >= rank:
+            return bound
+    return None
+
+
+def statement_timings():
+    """
+    Snapshot of per-statement stats: {name: {count, total_ms, mean_ms, max_ms,
+    p50_ms, p95_ms, p99_ms, rows, fetch_ms, cache_hits, histogram}}. Percentiles
+    are histogram bucket bounds; histogram maps "<=N ms" (and ">N ms") to counts.
+    cache_hits counts runs on a connection that already had the statement
+    parsed (sqlite statement cache, MySQL prepared cursor).
+    """
+    with _timings_lock:
+        items = [(name, (*entry[:5], tuple(entry[5]), entry[6])) for name, entry in _timings.items()]
+    labels = [f"<={ms:g}ms" for ms in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]:g}ms"]
+    stats = {}
+    for name, (count, total, worst, rows, fetch, histogram, cache_hits) in items:
+        pct = {p: _percentile_ms(histogram, count, p) for p in (.5, .95, .99)}
+        stats[name] = {
+            "count": count,
+            "total_ms": total * 1000,
+            "mean_ms": total * 1000 / count,
+            "max_ms": worst * 1000,
+            "p50_ms": pct[.5] if pct[.5] is not None else worst * 1000,
+            "p95_ms": pct[.95] if pct[.95] is not None else worst * 1000,
+            "p99_ms": pct[.99] if pct[.99] is not None else worst * 1000,
+            "rows": rows,
+            "fetch_ms": fetch * 1000,
+            "cache_hits": cache_hits,
+            "histogram": dict(zip(labels, histogram)),
+        }
+    return stats
+
+
+def connection_stats():
+    with _timings_lock:
+        c = dict(_connections)
+    return {"opened": c["opened"], "reused": c["reused"], "connect_ms": c["connect_s"] * 1000,
+            "mean_connect_ms": c["connect_s"] * 1000 / c["opened"] if c["opened"] else 0.0}
+
+
+def snapshot():
+    """Everything recorded since the last reset_timings(), as plain JSON-able dicts."""
+    with _slow_lock:
+        slow = {"threshold_ms": _slow["threshold"] * 1000 if _slow["threshold"] is not None else None,
+                "logged": _slow["count"]}
+    return {
+        "since": datetime.fromtimestamp(_since).isoformat(timespec="seconds"),
+        "connections": connection_stats(),
+        "slow_queries": slow,
+        "statements": statement_timings(),
+    }
+
+
+def format_timings():
+    """Per-statement timings as a text table, slowest total first."""
+    rows = sorted(statement_timings().items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+    lines = [f"{'statement':<34} {'count':>8} {'total ms':>10} {'mean ms':>9} {'p95 ms':>8} "
+             f"{'max ms':>9} {'rows':>9} {'fetch ms':>9} {'cached':>7}"]
+    for name, t in rows:
+        lines.append(f"{name:<34} {t['count']:>8} {t['total_ms']:>10.2f} {t['mean_ms']:>9.3f} {t['p95_ms']:>8g} "
+                     f"{t['max_ms']:>9.3f} {t['rows']:>9} {t['fetch_ms']:>9.2f} {t['cache_hits'] / t['count']:>7.0%}")
+    return "\n".join(lines)
+
+
+def format_report():
+    """format_timings() under a header with connection and slow-query counters."""
+    snap = snapshot()
+    c, slow = snap["connections"], snap["slow_queries"]
+    header = (f"DB stats since {snap['since']}: connections opened {c['opened']} "
+              f"(mean {c['mean_connect_ms']:.2f} ms), reused {c['reused']}; "
+              f"slow queries {slow['logged']} (threshold {slow['threshold_ms']} ms)")
+    return header + "\n" + format_timings()
+
+
+def start_periodic_dump(interval_s=60.0, path=None):
+    """
+    Write format_report() every `interval_s` seconds from a daemon thread,
+    appending to `path` (stdout if None). Set the returned Event to stop.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_s):
+            text = f"--- {datetime.now().isoformat(timespec='seconds')}\n{format_report()}\n"
+            try:
+                if path:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(text)
+                else:
+                    print(text, flush=True)
+            except OSError as e:
+                print("stats dump error:", e)
+
+    threading.Thread(target=run, name="db-stats-dump", daemon=True).start()
+    return stop
+
+
+def reset_timings():
+    global _since
+    with _timings_lock:
+        _timings.clear()
+        _connections.update(opened=0, reused=0, connect_s=0.0)
+        _since = time.time()
+    with _slow_lock:
+        _slow["count"] = 0
@@ -9,6 +9,8 @@ from ttkbootstrap.dialogs import Messagebox
 from . import database_mysql as db
 from .auth_ui import LoginPage
 from .main_app_ui import MainAppPage  # This should now work
+from . import ui_watchdog
+from . import metrics
 
 
 # ===============================================
@@ -33,6 +35,12 @@ class AppController(bs.Window):
         self.current_frame = None
         self.show_login_page()
         
+        # Om: log main-loop stalls with the stack that caused them
+        ui_watchdog.install(self)
+        # Imran: background exporters, started here so every launcher gets them
+        db.start_stats_dump()
+        metrics.start_exporter()
+        
         # Center window on screen
         self.update_idletasks()
         width = self.winfo_width()
@@ -7,9 +7,20 @@ import ttkbootstrap as ttk
 from ttkbootstrap.dialogs import Messagebox
 from PIL import Image, ImageTk
 import os
+import time
 from . import database_mysql as db
+from . import receipts
+from . import ui_watchdog
+from . import metrics
+from . import scanner
+from . import notify
+from . import search
+from . import customer_search
+from .money import to_cents
+from .checkout import CheckoutService, CheckoutError
 from .admin_ui import AdminPage
 from .customer_ui import CartPage, MembershipPage
+from .reports_ui import GridPager, SalesReportPage
 
 class MainAppPage(ttk.Frame):
     """Main application interface after login"""
@@ -58,6 +69,10 @@ class MainAppPage(ttk.Frame):
         self.main_frame.grid_rowconfigure(0, weight=1)
         self.main_frame.grid_columnconfigure(0, weight=1)
         
+        # Status bar - success messages without blocking the cashier
+        self.status_bar = notify.StatusBar(self)
+        self.status_bar.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 5))
+        
         # Show appropriate interface based on user role
         if self.logged_in_user.role == "Customer":
             self.create_customer_interface()
@@ -247,27 +262,17 @@ class MainAppPage(ttk.Frame):
         customer_selection_frame.pack(fill="x")
         customer_selection_frame.grid_columnconfigure(0, weight=1)
         
-        # Customer combobox
-        ttk.Label(customer_selection_frame, text="Customer:", font=("Segoe UI", 10, "bold")).grid(row=0, column=0, sticky="w", pady=(0, 5))
+        # Customer type-ahead: name, email/phone or customer ID
+        ttk.Label(customer_selection_frame, text="Customer (name, email, phone or ID):",
+                  font=("Segoe UI", 10, "bold")).grid(row=0, column=0, sticky="w", pady=(0, 5))
         
-        self.customer_var = tk.StringVar(value="Walk-in Customer")
-        self.customer_combo = ttk.Combobox(
+        self.customer_lookup = customer_search.CustomerLookup()
+        self.customer_picker = customer_search.CustomerPicker(
             customer_selection_frame,
-            textvariable=self.customer_var,
-            state="readonly",
-            font=("Segoe UI", 10)
+            on_select=self.on_customer_selected,
+            lookup=self.customer_lookup
         )
-        self.customer_combo.grid(row=1, column=0, sticky="ew", padx=(0, 10))
-        self.customer_combo.bind('<<ComboboxSelected>>', self.on_customer_selected)
-        
-        # Load customers button
-        ttk.Button(
-            customer_selection_frame,
-            text="🔄 Load Customers",
-            command=self.load_customers,
-            bootstyle="primary-outline",
-            width=15
-        ).grid(row=1, column=1, sticky="ew")
+        self.customer_picker.grid(row=1, column=0, sticky="ew")
         
         # Customer info display
         self.customer_info_label = ttk.Label(
@@ -392,6 +397,32 @@ class MainAppPage(ttk.Frame):
         sale_frame.grid_rowconfigure(1, weight=1)
         sale_frame.grid_columnconfigure(0, weight=1)
         
+        # Scanner input - SKU/barcode scans add straight to the sale
+        scan_frame = ttk.Frame(sale_frame)
+        scan_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        
+        ttk.Label(scan_frame, text="📷 Scan:", font=("Segoe UI", 10)).pack(side="left", padx=(0, 10))
+        self.scan_var = tk.StringVar()
+        self.scan_entry = ttk.Entry(
+            scan_frame,
+            textvariable=self.scan_var,
+            font=("Segoe UI", 10),
+            width=16
+        )
+        self.scan_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.scan_entry.bind('<Return>', self.on_scan_entered)
+        
+        self.scan_mode_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            scan_frame,
+            text="Scanner mode",
+            variable=self.scan_mode_var,
+            bootstyle="success-round-toggle"
+        ).pack(side="left")
+        
+        self.scan_status_label = ttk.Label(sale_frame, text="", font=("Segoe UI", 9), bootstyle="secondary")
+        self.scan_status_label.grid(row=4, column=0, sticky="w", pady=(5, 0))
+        
         # Sale items treeview
         sale_tree_frame = ttk.Frame(sale_frame)
         sale_tree_frame.grid(row=1, column=0, sticky="nsew")
@@ -517,11 +548,73 @@ class MainAppPage(ttk.Frame):
                 command=self.manage_users,
                 bootstyle="warning-outline"
             ).pack(fill="x", pady=5, ipady=8)
+            
+            self.profile_button = ttk.Button(
+                quick_actions_frame,
+                text="⏹ Stop Profiling" if ui_watchdog.profiler().running else "⏱ Start Profiling",
+                command=self.toggle_profiling,
+                bootstyle="secondary-outline"
+            )
+            self.profile_button.pack(fill="x", pady=5, ipady=8)
+        
+        # Scanner mode: catch keyboard-wedge scans whichever field has focus
+        self.scan_index = scanner.default_index()
+        self.wedge = scanner.WedgeDetector()
+        self.bind_class("FitnzScan", "<Key>", self.on_wedge_key)
+        self._add_bindtag(self, "FitnzScan")
         
         # Load initial data
-        self.load_customers()
+        self.on_customer_selected(None)
         self.load_products()
     
+    def _add_bindtag(self, widget, tag):
+        widget.bindtags((tag,) + widget.bindtags())
+        for child in widget.winfo_children():
+            self._add_bindtag(child, tag)
+    
+    def on_wedge_key(self, event):
+        """Spot scanner bursts typed into any field on the staff screen"""
+        if not self.scan_mode_var.get() or event.widget is self.scan_entry:
+            return None
+        if event.keysym in ("Return", "KP_Enter"):
+            code = self.wedge.enter(event.time)
+            if not code:
+                return None
+            # The burst already went into the focused field; take it back out
+            if isinstance(event.widget, tk.Entry):
+                end = event.widget.index("insert")
+                event.widget.delete(max(0, end - len(code)), end)
+            self.scan_code(code)
+            return "break"
+        if event.char and event.char.isprintable():
+            self.wedge.key(event.char, event.time)
+        return None
+    
+    def on_scan_entered(self, event=None):
+        """Scan (or typed code) submitted in the scan field"""
+        code = self.scan_var.get()
+        self.scan_var.set("")
+        if code.strip():
+            self.scan_code(code)
+        return "break"
+    
+    @metrics.ui_handler("scan_code")
+    def scan_code(self, code):
+        """Resolve a SKU/barcode and merge it into the sale - no dialogs"""
+        start = time.perf_counter()
+        product = self.scan_index.lookup(code)
+        if product is None:
+            self.bell()
+            self.scan_status_label.config(text=f"❌ Unknown code: {code.strip()}", bootstyle="danger")
+            return
+        if scanner.add_to_sale(self.sale_items, product) is None:
+            self.bell()
+            self.scan_status_label.config(text=f"⚠️ Not enough stock for {product.name}", bootstyle="warning")
+            return
+        self.update_sale_display()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.scan_status_label.config(text=f"✔ {product.name} ({elapsed:.0f} ms)", bootstyle="success")
+    
     def create_manager_interface(self):
         """Manager Dashboard"""
         frame = ttk.Frame(self.content_frame, padding=20)
@@ -586,57 +679,32 @@ class MainAppPage(ttk.Frame):
         ).pack(fill="x", pady=20)
 
 
-    def load_customers(self):
-        """Load customers into the combobox"""
-        customers = db.get_all_users()
-        customer_list = ["Walk-in Customer"]
-        
-        for customer in customers:
-            if hasattr(customer, 'role') and customer.role == 'Customer':
-                customer_name = customer.get_name() if hasattr(customer, 'get_name') else getattr(customer, 'name', 'Unknown')
-                customer_list.append(f"{customer_name} (ID: {getattr(customer, '_customer_id', 'N/A')})")
-        
-        self.customer_combo['values'] = customer_list
-        if customer_list:
-            self.customer_combo.set(customer_list[0])
-    
-    def on_customer_selected(self, event):
-        """Handle customer selection"""
-        selected = self.customer_var.get()
-        if selected == "Walk-in Customer":
-            self.current_customer = None
+    def on_customer_selected(self, customer):
+        """Handle customer selection from the picker (None = walk-in)"""
+        self.current_customer = customer
+        if customer is None:
             self.customer_info_label.config(text="Walk-in Customer (No loyalty points)")
-        else:
-            # Extract customer ID from the selection
-            try:
-                customer_id = selected.split("(ID: ")[1].replace(")", "")
-                self.current_customer = db.get_user_by_id(customer_id)
-                if self.current_customer:
-                    points = getattr(self.current_customer, 'loyalty_points', 0)
-                    membership = getattr(self.current_customer, 'membership_level', 'Standard')
-                    self.customer_info_label.config(
-                        text=f"{self.current_customer.get_name()} | {membership} Member | {points} Points"
-                    )
-            except (IndexError, AttributeError):
-                self.current_customer = None
-                self.customer_info_label.config(text="Error loading customer info")
+            return
+        points = getattr(customer, 'loyalty_points', 0)
+        membership = getattr(customer, 'membership_level', 'Standard')
+        self.customer_info_label.config(
+            text=f"{customer.get_name()} | {membership} Member | {points} Points"
+        )
     
+    @metrics.ui_handler("load_products")
     def load_products(self):
         """Load products into the treeview"""
         for item in self.products_tree.get_children():
             self.products_tree.delete(item)
+        
+        # Keep scanned prices/stock in step with the list
+        if hasattr(self, "scan_index"):
+            self.scan_index.refresh()
             
         products = db.get_all_products()
         for product in products:
-            # Simple category detection based on product name
-            category = "Equipment"
-            if "protein" in product.name.lower() or "supplement" in product.name.lower():
-                category = "Nutrition"
-            elif "yoga" in product.name.lower() or "mat" in product.name.lower():
-                category = "Yoga"
-            elif "band" in product.name.lower():
-                category = "Accessories"
-                
+            category = product.category or db.product_category(product.name)
+
             self.products_tree.insert(
                 "", "end",
                 values=(
@@ -652,34 +720,29 @@ class MainAppPage(ttk.Frame):
         """Handle real-time search"""
         self.search_products()
     
+    @metrics.ui_handler("search_products")
     def search_products(self):
         """Filter products based on search term"""
-        search_term = self.search_var.get().lower()
+        search_term = self.search_var.get().strip()
         
         for item in self.products_tree.get_children():
             self.products_tree.delete(item)
-            
-        products = db.get_all_products()
+        
+        # Ranked, typo-tolerant matches from the trigram index ("protien", "dumbell")
+        products = search.search_products(search_term, limit=200) if search_term else db.get_all_products()
         for product in products:
-            if search_term in product.name.lower() or search_term in product.product_id.lower():
-                category = "Equipment"
-                if "protein" in product.name.lower() or "supplement" in product.name.lower():
-                    category = "Nutrition"
-                elif "yoga" in product.name.lower() or "mat" in product.name.lower():
-                    category = "Yoga"
-                elif "band" in product.name.lower():
-                    category = "Accessories"
-                    
-                self.products_tree.insert(
-                    "", "end",
-                    values=(
-                        product.product_id, 
-                        product.name, 
-                        f"${product.price:.2f}", 
-                        product.stock,
-                        category
-                    )
+            category = product.category or db.product_category(product.name)
+
+            self.products_tree.insert(
+                "", "end",
+                values=(
+                    product.product_id, 
+                    product.name, 
+                    f"${product.price:.2f}", 
+                    product.stock,
+                    category
                 )
+            )
 
     def save_new_product(self):
         """Called when Manager clicks 'Add Product' button"""
@@ -741,7 +804,7 @@ class MainAppPage(ttk.Frame):
             if item['product'].product_id == product_id:
                 item['quantity'] += 1
                 self.update_sale_display()
-                Messagebox.show_info(f"Added another {product.name} to sale.", "Success", parent=self)
+                notify.success(self, f"Added another {product.name} to sale.")
                 return
         
         # Add new product to sale
@@ -751,8 +814,9 @@ class MainAppPage(ttk.Frame):
         })
         
         self.update_sale_display()
-        Messagebox.show_info(f"Added {product.name} to sale.", "Success", parent=self)
+        notify.success(self, f"Added {product.name} to sale.")
     
+    @metrics.ui_handler("update_sale_display")
     def update_sale_display(self):
         """Update the sale display with current items and totals"""
         # Clear current display
@@ -877,10 +941,10 @@ class MainAppPage(ttk.Frame):
         index = self.sale_tree.index(selected[0])
         product_name = self.sale_items[index]['product'].name
         
-        if Messagebox.yesno(f"Remove {product_name} from sale?", "Confirm Removal", parent=self):
+        if notify.confirm(self, f"Remove {product_name} from sale?", "Confirm Removal"):
             self.sale_items.pop(index)
             self.update_sale_display()
-            Messagebox.show_info(f"Removed {product_name} from sale.", "Success", parent=self)
+            notify.success(self, f"Removed {product_name} from sale.")
     
     def process_payment(self):
         """Process payment for the current sale"""
@@ -906,13 +970,13 @@ class MainAppPage(ttk.Frame):
     def clear_sale(self):
         """Clear the current sale"""
         if not self.sale_items:
-            Messagebox.show_info("Sale is already empty.", "Info", parent=self)
+            notify.info(self, "Sale is already empty.")
             return
         
-        if Messagebox.yesno("Clear all items from the current sale?", "Confirm Clear", parent=self):
+        if notify.confirm(self, "Clear all items from the current sale?", "Confirm Clear"):
             self.sale_items.clear()
             self.update_sale_display()
-            Messagebox.show_info("Sale cleared.", "Success", parent=self)
+            notify.success(self, "Sale cleared.")
     
     def view_products(self):
         """Open product management interface for staff"""
@@ -947,14 +1011,14 @@ class MainAppPage(ttk.Frame):
         
         if product:
             self.cart.append(product)
-            Messagebox.show_info(f"Added {product.name} to cart!", "Success", parent=self)
+            notify.success(self, f"Added {product.name} to cart!")
         else:
             Messagebox.show_error("Failed to add product to cart.", "Error", parent=self)
     
     def view_cart(self):
         """Open cart window"""
         if not self.cart:
-            Messagebox.show_info("Your cart is empty.", "Empty Cart", parent=self)
+            notify.info(self, "Your cart is empty.", "Empty Cart")
             return
             
         cart_window = CartPage(self, self.cart, self.logged_in_user)
@@ -994,6 +1058,11 @@ class MainAppPage(ttk.Frame):
         self.sale_items.clear()
         self.update_sale_display()
         self.load_products()  # Refresh product stock
+        if self.current_customer is not None:
+            # points (and maybe tier) changed with the sale
+            customer_id = self.current_customer._customer_id
+            self.customer_lookup.forget(customer_id)
+            self.on_customer_selected(self.customer_lookup.get(customer_id))
     
     def clear_cart(self):
         """Clear the shopping cart"""
@@ -1004,10 +1073,18 @@ class MainAppPage(ttk.Frame):
         # This would typically reload customer data from database
         pass
     
+    def toggle_profiling(self):
+        """Manager: start/stop profiling the till; the profile is written to FITNZ/profiles/"""
+        path = ui_watchdog.profiler().toggle()
+        if path is None:
+            self.profile_button.config(text="⏹ Stop Profiling")
+            return
+        self.profile_button.config(text="⏱ Start Profiling")
+        Messagebox.show_info(f"Profile saved to:\n{path}", "Profiling Stopped", parent=self)
+
     def logout(self):
         """Log out and return to login page"""
-        result = Messagebox.yesno("Are you sure you want to logout?", "Confirm Logout", parent=self)
-        if result == "Yes":
+        if notify.confirm(self, "Are you sure you want to logout?", "Confirm Logout"):
             self.controller.show_login_page()
 
 
@@ -1022,7 +1099,11 @@ class ProductDetailsPage(bs.Toplevel):
         
         # Make window full screen
         self.title(f"📦 {product.name} - Product Details")
-        self.state('zoomed')  # Full screen
+        try:
+            self.state('zoomed')  # Full screen
+        except tk.TclError:
+            # X11 has no 'zoomed' state
+            self.geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}")
         self.transient(parent)
         
         self.create_widgets()
@@ -1744,6 +1825,8 @@ Stock: {self.product.stock} units
 class ProductManagementPage(bs.Toplevel):
     """Full product management UI (Manager/Owner/Developer only)."""
 
+    PAGE_SIZE = 100
+
     def __init__(self, parent, logged_in_user):
         super().__init__(parent)
         self.logged_in_user = logged_in_user
@@ -1783,11 +1866,40 @@ class ProductManagementPage(bs.Toplevel):
         )
         list_frame.pack(side="left", fill="both", expand=True, padx=(0, 20))
 
+        # Filters run in the database; Enter or Apply reloads page 1
+        filter_bar = ttk.Frame(list_frame)
+        filter_bar.pack(fill="x", pady=(0, 10))
+        self.filter_vars = {
+            "name": ttk.StringVar(),
+            "category": ttk.StringVar(value="All"),
+            "min_price": ttk.StringVar(),
+            "max_price": ttk.StringVar(),
+            "max_stock": ttk.StringVar(),
+        }
+        ttk.Label(filter_bar, text="Name:").pack(side="left")
+        name_entry = ttk.Entry(filter_bar, textvariable=self.filter_vars["name"], width=14)
+        name_entry.pack(side="left", padx=(4, 10))
+        ttk.Label(filter_bar, text="Category:").pack(side="left")
+        category_box = ttk.Combobox(
+            filter_bar, textvariable=self.filter_vars["category"], state="readonly", width=11,
+            values=("All", "Equipment", "Nutrition", "Yoga", "Accessories"),
+        )
+        category_box.pack(side="left", padx=(4, 10))
+        category_box.bind("<<ComboboxSelected>>", lambda e: self.load_products())
+        for label, key in (("Min $:", "min_price"), ("Max $:", "max_price"), ("Stock ≤", "max_stock")):
+            ttk.Label(filter_bar, text=label).pack(side="left")
+            entry = ttk.Entry(filter_bar, textvariable=self.filter_vars[key], width=6)
+            entry.pack(side="left", padx=(4, 10))
+            entry.bind("<Return>", lambda e: self.load_products())
+        name_entry.bind("<Return>", lambda e: self.load_products())
+        ttk.Button(filter_bar, text="Apply", bootstyle="primary-outline",
+                   command=self.load_products).pack(side="left")
+
         # Tree container (GRID only inside)
         tree_container = ttk.Frame(list_frame)
         tree_container.pack(fill="both", expand=True)
 
-        columns = ("ID", "Name", "Price", "Stock")
+        columns = ("ID", "Name", "Price", "Stock", "Category")
         self.product_tree = ttk.Treeview(
             tree_container,
             columns=columns,
@@ -1800,11 +1912,13 @@ class ProductManagementPage(bs.Toplevel):
         self.product_tree.heading("Name", text="Product Name")
         self.product_tree.heading("Price", text="Price ($)")
         self.product_tree.heading("Stock", text="Stock")
+        self.product_tree.heading("Category", text="Category")
 
         self.product_tree.column("ID", width=120, anchor="center")
         self.product_tree.column("Name", width=220, anchor="w")
         self.product_tree.column("Price", width=100, anchor="e")
         self.product_tree.column("Stock", width=100, anchor="center")
+        self.product_tree.column("Category", width=110, anchor="center")
 
         self.product_tree.grid(row=0, column=0, sticky="nsew")
 
@@ -1819,6 +1933,14 @@ class ProductManagementPage(bs.Toplevel):
         tree_container.grid_rowconfigure(0, weight=1)
         tree_container.grid_columnconfigure(0, weight=1)
 
+        pager_controls = ttk.Frame(list_frame)
+        pager_controls.pack(anchor="e", pady=(10, 0))
+        self.pager = GridPager(
+            self.product_tree, pager_controls, self.fetch_products, self.render_product,
+            {"Name": "name", "Price": "price", "Stock": "stock", "Category": "category"},
+            sort="name", page_size=self.PAGE_SIZE,
+        )
+
         # ===== RIGHT: BUTTONS =====
         right_actions = ttk.Frame(content)
         right_actions.pack(side="right", fill="y")
@@ -1867,6 +1989,65 @@ class ProductManagementPage(bs.Toplevel):
         self.load_products()
 
 # Umang part
+    def current_filters(self):
+        filters = {key: var.get().strip() for key, var in self.filter_vars.items()}
+        if filters["category"] == "All":
+            filters["category"] = ""
+        for key in ("min_price", "max_price"):
+            if filters[key]:
+                to_cents(filters[key])  # ValueError / InvalidOperation for the caller
+        if filters["max_stock"]:
+            filters["max_stock"] = int(float(filters["max_stock"]))
+        return filters
+
+    def fetch_products(self, sort, descending, page, page_size):
+        return db.browse_products(sort, descending, self.filters, page, page_size)
+
+    def render_product(self, product):
+        return (
+            product["product_id"],
+            product["name"],
+            f"{product['price']:.2f}",
+            product["stock"],
+            product["category"] or "Equipment",
+        )
+
+    @metrics.ui_handler("manage_products")
+    def load_products(self):
+        """Reload the current page with the current sort and filters (back to page 1)."""
+        try:
+            self.filters = self.current_filters()
+        except (ValueError, ArithmeticError):
+            Messagebox.show_error("Price and stock filters must be numbers.", "Invalid Filter", parent=self)
+            return
+        self.pager.reload(first_page=True)
+
+    def selected_product_id(self):
+        selected = self.product_tree.selection()
+        if not selected:
+            Messagebox.show_warning("Please select a product first.", "No Selection", parent=self)
+            return None
+        return str(self.product_tree.item(selected[0])["values"][0])
+
+    def open_add_product(self):
+        AddProductPage(self, self.logged_in_user).grab_set()
+
+    def open_edit_product(self):
+        pid = self.selected_product_id()
+        if pid:
+            EditProductPage(self, pid).grab_set()
+
+    def delete_product(self):
+        pid = self.selected_product_id()
+        if not pid:
+            return
+        if not notify.confirm(self, f"Delete product {pid}? This cannot be undone.", "Confirm Delete"):
+            return
+        if db.delete_product(pid):
+            notify.success(self, f"Product {pid} deleted.")
+            self.pager.reload()
+        else:
+            Messagebox.show_error("Failed to delete product.", "Error", parent=self)
 
     
 # ===============================================
@@ -1875,58 +2056,9 @@ class ProductManagementPage(bs.Toplevel):
     def process_payment(self, payment_method):
         """Process the sale with the given payment method"""
         try:
-            # Prepare products for database
-            products_for_db = []
-            for item in self.sale_items:
-                # Add each product quantity times
-                for _ in range(item['quantity']):
-                    products_for_db.append(item['product'])
-            
-            # Calculate delivery date (next day for in-store)
-            delivery_date = date.today()
-            
-            # Process sale
-            success = db.process_sale(
-                self.customer,
-                products_for_db,
-                self.points_redeemed,
-                False,  # student_discount_applied
-                delivery_date,
-            )
-            
-            if success:
-                # --- LOYALTY POINT UPDATE ---
-                if self.customer:
-                    old = getattr(self.customer, "loyalty_points", 0)
-                    used = self.points_redeemed
-                    spent = self.total
-
-                    # Deduct used points
-                    remaining = max(0, old - used)
-
-                    # Earn new points (1 point per $10 spent)
-                    earned = int(spent // 10)
-
-                    final_points = remaining + earned
-
-                    # Get correct customer ID safely
-                    cust_id = (
-                        getattr(self.customer, "customer_id", None)
-                        or getattr(self.customer, "_customer_id", None)
-                        or getattr(self.customer, "id", None)
-                    )
-
-                    # Save to database
-                    if cust_id:
-                        db.update_customer_points(cust_id, final_points)
-
-                    # Update in memory
-                    self.customer.loyalty_points = final_points
-
-                # Continue to receipt
-                self.show_receipt(payment_method)
-            else:
-                Messagebox.show_error("Failed to process sale. Please try again.", "Error", parent=self)
+            # show_receipt records the sale exactly once; points are earned
+            # and redeemed inside db.process_sale through the loyalty ledger.
+            self.show_receipt(payment_method)
                 
         except Exception as e:
             Messagebox.show_error(f"An error occurred: {str(e)}", "Error", parent=self)
@@ -1936,44 +2068,20 @@ class ProductManagementPage(bs.Toplevel):
         Modified to include GST, points redeemed, and remaining points.
         """
 
-        success, remaining_points, gst_total, grand_total = db.process_sale(
-            self.customer,
-            [item['product'] for item in self.sale_items for _ in range(item['quantity'])],
-            self.points_redeemed,
-            False,  # student discount not used here
-            date.today()
+        # Pricing, stock, points and the sale commit go through the headless
+        # checkout service; it returns the receipt fields.
+        service = CheckoutService.from_cart(
+            self.sale_items, self.customer, False, self.points_redeemed, employee=self.employee
         )
-
-        if not success:
-            Messagebox.show_error("Failed to process sale.", "Error", parent=self)
+        try:
+            receipt_info = service.checkout(payment_method, delivery_date=date.today())
+        except CheckoutError as e:
+            Messagebox.show_error(f"Failed to process sale: {e}", "Error", parent=self)
             return
 
-        # Build receipt info with new fields
-        receipt_items = []
-        for item in self.sale_items:
-            receipt_items.append({
-                'name': item['product'].name,
-                'price': item['product'].price,
-                'quantity': item['quantity'],
-                'total': item['product'].price * item['quantity']
-            })
-
-        receipt_info = {
-            'items': receipt_items,
-            'subtotal': self.subtotal,
-            'discount': self.discount_applied,
-            'points_redeemed': self.points_redeemed,
-            'remaining_points': remaining_points,
-            'gst': gst_total,
-            'total': grand_total,
-            'payment_method': payment_method,
-            'customer': self.customer.get_name() if self.customer else "Walk-in Customer",
-            'employee': self.employee.name,
-            'date': date.today().strftime("%Y-%m-%d"),
-            'time': datetime.now().strftime("%H:%M:%S")
-        }
-
         receipt_text = self.generate_receipt_text(receipt_info)
+        # Printing happens on the printer thread; the till is free right away.
+        receipts.default_printer().submit(receipt_info)
 
         Messagebox.show_info(
             receipt_text,
@@ -1989,43 +2097,8 @@ class ProductManagementPage(bs.Toplevel):
 
 
     def generate_receipt_text(self, r):
-        """Generate updated receipt with GST + loyalty points."""
-        
-        receipt = "═══════════════════════════════\n"
-        receipt += "           FIT NZ STORE\n"
-        receipt += "      Fitness Equipment & Nutrition\n"
-        receipt += "═══════════════════════════════\n\n"
-
-        receipt += f"Date: {r['date']} {r['time']}\n"
-        receipt += f"Customer: {r['customer']}\n"
-        receipt += f"Staff: {r['employee']}\n"
-        receipt += "───────────────────────────────\n"
-        receipt += "ITEMS:\n"
-
-        for item in r['items']:
-            receipt += f"{item['name']:<20} ${item['price']:>6.2f} × {item['quantity']}\n"
-
-        receipt += "───────────────────────────────\n"
-        receipt += f"Subtotal:              ${r['subtotal']:>7.2f}\n"
-
-        if r['discount'] > 0:
-            receipt += f"Discount:              -${r['discount']:>7.2f}\n"
-
-        if r['points_redeemed'] > 0:
-            receipt += f"Points Redeemed:        {r['points_redeemed']}\n"
-            receipt += f"Remaining Points:       {r['remaining_points']}\n"
-
-        receipt += f"GST (15%):             ${r['gst']:>7.2f}\n"
-        receipt += f"TOTAL:                 ${r['total']:>7.2f}\n"
-
-        receipt += "───────────────────────────────\n"
-        receipt += f"Payment: {r['payment_method']}\n"
-        receipt += "═══════════════════════════════\n"
-        receipt += "     THANK YOU FOR SHOPPING!\n"
-        receipt += "        HAVE A GREAT DAY!\n"
-        receipt += "═══════════════════════════════"
-
-        return receipt
+        """Render the receipt with the precompiled store template."""
+        return receipts.render_text(r)
 
     def on_close(self):
         """Handle window close"""
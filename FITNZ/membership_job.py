@@ -0,0 +1,48 @@
+# File: FITNZ/membership_job.py
+# ---------------- Code Owner: Rajina ----------------
+"""
+Nightly batch job: recompute Bronze/Silver/Gold tiers for every customer
+from rolling spend, then optionally compact the loyalty ledger.
+
+    python -m FITNZ.membership_job --window-days 365 --chunk-size 5000
+"""
+
+import argparse
+import time
+
+from . import database_mysql as db
+
+
+def _progress_printer(started):
+    def report(done, total, updated):
+        pct = done / total if total else 1.0
+        print(f"[{pct:>4.0%}] {done:,}/{total:,} ids  {updated:,} members updated  {time.perf_counter() - started:.1f}s")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute membership tiers from rolling spend")
+    parser.add_argument("--window-days", type=int, default=365, help="rolling spend window")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="member ids per commit")
+    for tier, amount in db.TIER_THRESHOLDS.items():
+        parser.add_argument(f"--{tier.lower()}", type=float, default=amount, help=f"{tier} spend threshold")
+    parser.add_argument("--compact-loyalty", action="store_true", help="compact the loyalty ledger afterwards")
+    parser.add_argument("--quiet", action="store_true", help="no per-chunk progress")
+    args = parser.parse_args(argv)
+
+    db.setup_database()
+    started = time.perf_counter()
+    updated = db.recompute_membership_tiers(
+        window_days=args.window_days,
+        thresholds={tier: getattr(args, tier.lower()) for tier in db.TIER_THRESHOLDS},
+        chunk_size=args.chunk_size,
+        progress=None if args.quiet else _progress_printer(started),
+    )
+    print(f"Re-tiered {updated:,} members in {time.perf_counter() - started:.1f}s")
+
+    if args.compact_loyalty:
+        print("Loyalty ledger compacted up to entry", db.compact_loyalty_ledger(prune=True, repair=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# File: FITNZ/metrics.py
+# ===============================================
+# Code Owner: Imran (US: Admin/Reports - Core DB Access & Management)
+# Per-till operational metrics, exported for fleet monitoring.
+# ===============================================
+"""
+Counters, gauges and histograms kept in process and exported two ways
+by a background thread every METRICS_SECONDS (default 15):
+
+    <METRICS_DIR>/fitnz.prom         Prometheus text format, replaced
+                                     atomically (node_exporter textfile
+                                     collector)
+    <METRICS_DIR>/metrics.jsonl      one JSON snapshot per line, rotated
+                                     at METRICS_JSON_MAX_BYTES with
+                                     METRICS_JSON_BACKUPS old files kept
+
+METRICS_DIR defaults to FITNZ/metrics/ and TILL_ID (added as a `till`
+label) to the host name; METRICS_SECONDS=0 turns the exporter off. The
+instruments below are fed from process_sale, authenticate_user,
+db_queries, the till server's product cache, the receipt printer and the
+main UI handlers.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+
+METRICS_DIR = os.path.join(os.path.dirname(__file__), "metrics")
+# Seconds; an implicit +Inf bucket follows.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, n=1, **labels):
+        key = _key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, v) for key, v in self._values.items()]
+
+
+class Gauge:
+    """set() a number, or a zero-argument callable that is read at export time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self._values = {}
+        _registry.append(self)
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[_key(labels)] = value
+
+    def samples(self):
+        with _lock:
+            items = list(self._values.items())
+        out = []
+        for key, v in items:
+            if callable(v):
+                try:
+                    v = v()
+                except Exception:
+                    continue
+            out.append((self.name, key, v))
+        return out
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            entry[bisect_left(self.buckets, value)] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def time(self, **labels):
+        """Decorator timing each call into this histogram."""
+        def decorate(fn):
+            @wraps(fn)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return timed
+        return decorate
+
+    def samples(self):
+        with _lock:
+            items = [(key, list(entry)) for key, entry in self._values.items()]
+        out = []
+        for key, entry in items:
+            running = 0
+            for bound, n in zip(self.buckets + ("+Inf",), entry):
+                running += n
+                out.append((self.name + "_bucket", key + (("le", f"{bound:g}" if bound != "+Inf" else bound),), running))
+            out.append((self.name + "_sum", key, entry[-2]))
+            out.append((self.name + "_count", key, entry[-1]))
+        return out
+
+
+class RateWindow:
+    """Events in the last `window` seconds (sales per minute)."""
+
+    def __init__(self, window=60.0):
+        self.window = window
+        self._times = deque()
+
+    def mark(self):
+        now = time.monotonic()
+        with _lock:
+            self._times.append(now)
+            self._trim(now)
+
+    def _trim(self, now):
+        while self._times and self._times[0] < now - self.window:
+            self._times.popleft()
+
+    def count(self):
+        with _lock:
+            self._trim(time.monotonic())
+            return len(self._times)
+
+
+# ----- the till's instruments -----
+SALES = Counter("fitnz_sales_total", "Sales committed, by result")
+SALE_AMOUNT = Counter("fitnz_sales_amount_cents_total", "Value of committed sales in cents")
+_sales_window = RateWindow(60.0)
+SALES_PER_MINUTE = Gauge("fitnz_sales_last_minute", "Sales committed in the last 60 seconds")
+SALES_PER_MINUTE.set(_sales_window.count)
+CHECKOUT_LATENCY = Histogram("fitnz_checkout_seconds", "process_sale latency")
+LOGINS = Counter("fitnz_logins_total", "authenticate_user calls, by result")
+LOGIN_LATENCY = Histogram("fitnz_login_seconds", "authenticate_user latency")
+CACHE = Counter("fitnz_cache_requests_total", "Cache lookups, by cache and hit/miss")
+DB_ERRORS = Counter("fitnz_db_errors_total", "Failed statements, by statement name")
+UI_LATENCY = Histogram("fitnz_ui_handler_seconds", "Time spent in UI event handlers")
+QUEUE_DEPTH = Gauge("fitnz_queue_depth", "Items waiting in background queues, by queue")
+UP_SINCE = Gauge("fitnz_process_start_time_seconds", "Unix time the till process started")
+UP_SINCE.set(time.time())
+
+
+def record_sale(elapsed, ok, total_cents=0):
+    """Called by process_sale."""
+    CHECKOUT_LATENCY.observe(elapsed)
+    SALES.inc(result="ok" if ok else "failed")
+    if ok:
+        SALE_AMOUNT.inc(int(total_cents))
+        _sales_window.mark()
+
+
+def ui_handler(name):
+    """Decorator for Tk handlers: observe their duration as fitnz_ui_handler_seconds{handler=name}."""
+    return UI_LATENCY.time(handler=name)
+
+
+# ----- export -----
+def render_prometheus(till=None):
+    lines = []
+    extra = (("till", till),) if till else ()
+    for metric in list(_registry):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in metric.samples():
+            lines.append(f"{name}{_fmt_labels(key, extra)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """All metrics as {name: [{"labels": {...}, "value": v}, ...]}."""
+    out = {}
+    for metric in list(_registry):
+        for name, key, value in metric.samples():
+            out.setdefault(name, []).append({"labels": dict(key), "value": value})
+    return out
+
+
+def write_prometheus(path, till=None):
+    """Replace `path` atomically so a scraper never sees half a file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus(till))
+    os.replace(tmp, path)
+
+
+class RollingJsonLog:
+    """JSON-lines file that rotates to path.1 .. path.N once it passes max_bytes."""
+
+    def __init__(self, path, max_bytes=1_000_000, backups=3):
+        self.path, self.max_bytes, self.backups = path, max_bytes, backups
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size and size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def export_once(out_dir=METRICS_DIR, till=None, log=None):
+    os.makedirs(out_dir, exist_ok=True)
+    write_prometheus(os.path.join(out_dir, "fitnz.prom"), till)
+    log = log or RollingJsonLog(os.path.join(out_dir, "metrics.jsonl"))
+    log.append({"ts": time.time(), "till": till, "metrics": snapshot()})
+
+
+_exporter = None
+
+def start_exporter():
+    """Start the background exporter as configured in database.env; returns its stop Event or None."""
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+    from .database_mysql import config
+    interval = float(config.get("METRICS_SECONDS", 15))
+    if interval <= 0:
+        return None
+    out_dir = config.get("METRICS_DIR") or METRICS_DIR
+    till = config.get("TILL_ID") or socket.gethostname()
+    log = RollingJsonLog(os.path.join(out_dir, "metrics.jsonl"),
+                         int(config.get("METRICS_JSON_MAX_BYTES", 1_000_000)),
+                         int(config.get("METRICS_JSON_BACKUPS", 3)))
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                export_once(out_dir, till, log)
+            except OSError as e:
+                print("metrics export error:", e)
+
+    threading.Thread(target=run, name="metrics-export", daemon=True).start()
+    _exporter = stop
+    return stop
@@ -8,6 +8,9 @@ from .user import User
 # ===============================================
 
 class Customer(User):
+    __slots__ = ("_customer_id", "_name", "_contact", "loyalty_points", "transaction_history",
+                 "role", "membership_level", "address")
+
     def __init__(self, customer_id: str, name: str, contact: str, username: str, password: str):
         super().__init__(username, password)
         self._customer_id = customer_id
@@ -42,6 +45,8 @@ class Customer(User):
         return f"ID: {self._customer_id}, Name: {self._name}, Membership: {self.membership_level}, Points: {self.loyalty_points}"
 
 class StudentMember(Customer):
+    __slots__ = ()
+
     def __init__(self, customer: Customer):
         super().__init__(customer._customer_id, customer.get_name(), customer._contact, customer.username, customer._password)
         self.loyalty_points = customer.loyalty_points
@@ -52,6 +57,8 @@ class StudentMember(Customer):
         return 0.20 # 20% discount
 
 class BronzeMember(Customer):
+    __slots__ = ()
+
     def __init__(self, customer: Customer):
         super().__init__(customer._customer_id, customer.get_name(), customer._contact, customer.username, customer._password)
         self.loyalty_points = customer.loyalty_points
@@ -62,6 +69,8 @@ class BronzeMember(Customer):
         return 0.05
 
 class SilverMember(Customer):
+    __slots__ = ()
+
     def __init__(self, customer: Customer):
         super().__init__(customer._customer_id, customer.get_name(), customer._contact, customer.username, customer._password)
         self.loyalty_points = customer.loyalty_points
@@ -72,6 +81,8 @@ class SilverMember(Customer):
         return 0.10
 
 class GoldMember(Customer):
+    __slots__ = ()
+
     def __init__(self, customer: Customer):
         super().__init__(customer._customer_id, customer.get_name(), customer._contact, customer.username, customer._password)
         self.loyalty_points = customer.loyalty_points
@@ -8,6 +8,8 @@ from .user import User
 
 class Employee(User):
     """Represents an employee with a specific role."""
+    __slots__ = ("employee_id", "name", "role")
+
     def __init__(self, employee_id: str, name: str, role: str, username: str, password: str):
         super().__init__(username, password)
         # Roles can be 'Developer', 'Manager', 'Employee', 'Owner'
@@ -3,13 +3,30 @@
 # Code Owner: Umang (US: Add a new product / Update the stock quantity)
 # This class manages the definition and state of inventory items.
 # ===============================================
+from ..money import to_cents, from_cents
+
+
 class Product:
     """Represents a single product in the store's inventory."""
-    def __init__(self, product_id: str, name: str, price: float, stock: int):
+    # Slots keep the resident catalogue compact (no per-instance __dict__).
+    # The price is held as integer cents; `price` stays a dollar float view.
+    __slots__ = ("product_id", "name", "price_cents", "stock", "category")
+
+    def __init__(self, product_id: str, name: str, price: float, stock: int, category: str = None):
         self.product_id = product_id
         self.name = name
         self.price = price
         self.stock = stock
+        self.category = category  # drives pricing.CategoryDiscount
+
+    @property
+    def price(self) -> float:
+        return from_cents(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        """Accepts dollars (float/str/Decimal) or a Money amount in cents."""
+        self.price_cents = to_cents(value)
 
     def update_stock(self, quantity: int):
         """Updates the stock level. Can be positive (adding stock) or negative (selling)."""
@@ -5,6 +5,7 @@ from .customer import Customer
 from .employee import Employee
 from .product import Product
 from typing import List
+from ..pricing import price_basket
 
 
 # ===============================================
@@ -14,6 +15,8 @@ from typing import List
 
 class Sale:
     """Represents a single sales transaction."""
+    __slots__ = ("sale_id", "customer", "employee", "items", "transaction_time", "total_amount")
+
     def __init__(self, sale_id: int, customer: Customer, employee: Employee, items: List[Product]):
         self.sale_id = sale_id
         self.customer = customer
@@ -24,11 +27,7 @@ class Sale:
 
     def _calculate_total(self) -> float:
         """Calculates the total cost of the sale, including discounts."""
-        subtotal = sum(item.price for item in self.items)
-        discount_rate = self.customer.get_discount_rate()
-        discount_amount = subtotal * discount_rate
-        final_total = subtotal - discount_amount
-        return final_total
+        return price_basket(self.items, self.customer).net
 
     def generate_receipt_info(self) -> dict:
         """Creates a dictionary of information needed for a receipt."""
@@ -5,12 +5,16 @@
 # This class defines the core identity structure for all authenticated users.
 # ===============================================
 
+from ..passwords import verify_password
+
 class User:
     """A base class for any entity that can log into the system."""
+    __slots__ = ("username", "_password")
+
     def __init__(self, username, password):
         self.username = username
         self._password = password # Encapsulated
 
     def check_password(self, password_to_check):
-        """Checks if the provided password is correct."""
-        return self._password == password_to_check
\ No newline at end of file
+        """Checks if the provided password is correct (hashed or legacy plaintext)."""
+        return verify_password(password_to_check, self._password)
\ No newline at end of file
@@ -0,0 +1,154 @@
+# File: FITNZ/money.py
+# ===============================================
+# Code Owner: Sahil (US: Complete my purchase by providing payment details)
+# Fixed-point money: amounts are whole cents held in Python ints.
+# ===============================================
+"""
+Money is stored and summed as integer cents, so totals are exact no matter
+how many lines are added, and the hot pricing loops stay plain int math
+(no Decimal). Conversion to and from dollars happens only at the edges:
+reading prices, displaying amounts and writing the legacy REAL columns.
+
+Rates (discounts, GST) are applied in basis points with half-up rounding,
+and allocate() splits a header amount over lines so the parts always add
+back up to the header (used for GST and points).
+
+The *_array helpers convert and sum whole columns for reports. They use
+NumPy int64 arrays when numpy is installed and plain lists of ints
+otherwise, so reports work either way.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+# Optional: vectorised helpers for reports. Falls back to None if missing.
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+
+class Money(int):
+    """An int number of cents that prints as dollars."""
+    __slots__ = ()
+
+    @classmethod
+    def from_dollars(cls, value):
+        return cls(to_cents(value))
+
+    @property
+    def dollars(self):
+        return self / 100
+
+    def __add__(self, other):
+        return Money(int(self) + int(other))
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Money(int(self) - int(other))
+
+    def __rsub__(self, other):
+        return Money(int(other) - int(self))
+
+    def __neg__(self):
+        return Money(-int(self))
+
+    def __mul__(self, qty):
+        # Quantities only; use apply_rate() for percentages.
+        return Money(int(self) * int(qty))
+    __rmul__ = __mul__
+
+    def __str__(self):
+        return format_cents(self)
+
+    def __repr__(self):
+        return f"Money({int(self)})"
+
+
+def to_cents(value):
+    """Dollars (float, int, str or Decimal) -> int cents, half-up. Money passes through."""
+    if type(value) is float:
+        # Prices have at most two decimals, so value * 100 is within float
+        # noise of an integer; round() lands on it.
+        return round(value * 100)
+    if value is None:
+        return 0
+    if isinstance(value, Money):
+        return int(value)
+    if isinstance(value, int):
+        return value * 100
+    return int(Decimal(str(value).strip().lstrip("$").replace(",", "")).scaleb(2).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Int cents -> float dollars (for display and legacy REAL columns)."""
+    return int(cents) / 100
+
+
+def format_cents(cents):
+    cents = int(cents)
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}${whole:,}.{part:02d}"
+
+
+def rate_bp(rate):
+    """Fractional rate (0.15) -> basis points (1500)."""
+    return int(round(float(rate) * 10000))
+
+
+def apply_rate(cents, bp):
+    """cents * bp / 10000, rounded half away from zero."""
+    n = int(cents) * bp
+    return (n + 5000) // 10000 if n >= 0 else -((-n + 5000) // 10000)
+
+
+def allocate(total, weights):
+    """
+    Split int `total` over `weights` pro rata (largest remainder), so the
+    returned parts are ints that sum exactly to `total`.
+    """
+    weights = [int(w) for w in weights]
+    base = sum(weights)
+    if not weights:
+        return []
+    if base <= 0:
+        parts = [0] * len(weights)
+        parts[-1] = int(total)
+        return parts
+    parts, remainders = [], []
+    for i, w in enumerate(weights):
+        share, rem = divmod(total * w, base)
+        parts.append(share)
+        remainders.append((rem, i))
+    for _, i in sorted(remainders, reverse=True)[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+# ------------------------- NumPy helpers (reports) -------------------------
+
+def cents_array(values):
+    """Sequence of dollar amounts -> cents (half-up): int64 array, or a list without numpy."""
+    if np is None:
+        return [to_cents(float(v or 0)) for v in values]
+    a = np.asarray(values, dtype=np.float64) * 100
+    return (np.sign(a) * np.floor(np.abs(a) + 0.5)).astype(np.int64)
+
+def dollars_array(cents):
+    """Cents -> float dollars (display only)."""
+    if np is None:
+        return [from_cents(c) for c in cents]
+    return np.asarray(cents, dtype=np.int64) / 100
+
+def total_cents(cents):
+    """Exact sum of a cents column as a Python int."""
+    if np is None:
+        return sum(int(c) for c in cents)
+    return int(np.asarray(cents, dtype=np.int64).sum(dtype=np.int64))
+
+def apply_rate_array(cents, bp):
+    """apply_rate() over a whole cents column."""
+    if np is None:
+        return [apply_rate(c, bp) for c in cents]
+    n = np.asarray(cents, dtype=np.int64) * bp
+    return np.sign(n) * ((np.abs(n) + 5000) // 10000)
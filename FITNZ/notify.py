@@ -0,0 +1,90 @@
+# File: FITNZ/notify.py
+# ===============================================
+# Code Owner: Om (Initial Developer/Core Structure)
+# Non-blocking user feedback for the till screens.
+# ===============================================
+"""
+A StatusBar shows queued messages one after another and clears itself, so
+success feedback ("Added X to sale") never costs the cashier a click.
+Pages that own one set `self.status_bar`; success() and info() go there,
+or to a Messagebox when the page has none or SUCCESS_MESSAGES=dialog is
+set in database.env (the default is statusbar). Errors stay modal.
+
+confirm() wraps Messagebox.yesno, which returns the pressed button's
+(translated) text rather than a bool.
+"""
+
+import ttkbootstrap as ttk
+from ttkbootstrap.dialogs import Messagebox
+from ttkbootstrap.localization import MessageCatalog
+
+from .database_mysql import config
+
+MODE = config.get("SUCCESS_MESSAGES", "statusbar").lower()
+ICONS = {"success": "✔", "info": "ℹ️", "warning": "⚠️"}
+
+
+class StatusBar(ttk.Frame):
+    """One-line message strip with a queue and auto-dismiss."""
+
+    MAX_PENDING = 3  # older queued messages are dropped past this
+
+    def __init__(self, parent, duration_ms=2500, **kwargs):
+        super().__init__(parent, padding=(10, 4), **kwargs)
+        self.duration_ms = duration_ms
+        self.label = ttk.Label(self, text="", font=("Segoe UI", 10), anchor="w")
+        self.label.pack(fill="x")
+        self._pending = []
+        self._job = None
+
+    def show(self, message, kind="success"):
+        self._pending.append((message, kind))
+        del self._pending[:-self.MAX_PENDING]
+        if self._job is None:
+            self._next()
+
+    def _next(self):
+        self._job = None
+        if not self.winfo_exists():
+            return
+        if not self._pending:
+            self.label.config(text="")
+            return
+        message, kind = self._pending.pop(0)
+        self.label.config(text=f"{ICONS.get(kind, '')} {message}", bootstyle=kind)
+        # a backlog moves faster so the newest message is never stale
+        delay = self.duration_ms if not self._pending else max(600, self.duration_ms // 3)
+        self._job = self.after(delay, self._next)
+
+    def clear(self):
+        if self._job is not None:
+            self.after_cancel(self._job)
+        self._pending = []
+        self._next()
+
+
+def _bar_for(owner):
+    if MODE == "dialog":
+        return None
+    return getattr(owner, "status_bar", None)
+
+
+def success(owner, message, title="Success"):
+    bar = _bar_for(owner)
+    if bar is None:
+        Messagebox.show_info(message, title, parent=owner)
+    else:
+        bar.show(message, "success")
+
+
+def info(owner, message, title="Info"):
+    bar = _bar_for(owner)
+    if bar is None:
+        Messagebox.show_info(message, title, parent=owner)
+    else:
+        bar.show(message, "info")
+
+
+def confirm(owner, message, title):
+    """Ask a yes/no question; True only when Yes was pressed."""
+    return Messagebox.yesno(message, title, parent=owner) == MessageCatalog.translate("Yes")
@@ -0,0 +1,263 @@
+# File: FITNZ/passwords.py
+# ===============================================
+# Code Owner: Om (US: Registration/Login Logic)
+# Password hashing, verification and transparent upgrade of stored passwords.
+# ===============================================
+"""
+Passwords are stored as self-describing strings:
+
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>      (salt/hash urlsafe base64)
+
+scrypt is the default; PASSWORD_SCHEME=pbkdf2_sha256 selects PBKDF2 (also
+used when the Python build has no hashlib.scrypt). Cost parameters come
+from database.env (SCRYPT_N, SCRYPT_R, SCRYPT_P, PBKDF2_ITERATIONS);
+`python -m FITNZ.passwords --tune` reports what reaches a target time on
+the till hardware. A stored value that is still plaintext, or was hashed
+with older parameters, is re-hashed by authenticate_user after the next
+successful login (needs_rehash), so no migration run is needed.
+
+A strong KDF costs tens of milliseconds per check, which adds up when a
+whole shift logs in on one till. VerifyCache remembers recent successful
+checks for PASSWORD_CACHE_SECONDS (default 900), at most
+PASSWORD_CACHE_SIZE (256) of them. Its keys are an HMAC of the stored
+hash and the password under a random per-process key, so the cache never
+holds a password or anything usable offline, and a password change misses
+it automatically. Failures are never cached.
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import metrics
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+HAS_SCRYPT = hasattr(hashlib, "scrypt")
+DEFAULTS = {"n": 2 ** 14, "r": 8, "p": 1, "iterations": 600_000}
+SALT_BYTES = 16
+
+_settings = None
+
+
+def settings():
+    """Scheme and cost parameters from database.env (read once)."""
+    global _settings
+    if _settings is None:
+        from .database_mysql import config
+        scheme = config.get("PASSWORD_SCHEME", SCRYPT).lower()
+        if scheme == SCRYPT and not HAS_SCRYPT:
+            scheme = PBKDF2
+        _settings = {
+            "scheme": scheme,
+            "n": int(config.get("SCRYPT_N", DEFAULTS["n"])),
+            "r": int(config.get("SCRYPT_R", DEFAULTS["r"])),
+            "p": int(config.get("SCRYPT_P", DEFAULTS["p"])),
+            "iterations": int(config.get("PBKDF2_ITERATIONS", DEFAULTS["iterations"])),
+            "cache_size": int(config.get("PASSWORD_CACHE_SIZE", 256)),
+            "cache_seconds": float(config.get("PASSWORD_CACHE_SECONDS", 900)),
+        }
+    return _settings
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem: OpenSSL's 32 MiB default is too small past n=2**15.
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=32)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+
+
+def hash_password(password, scheme=None, **params):
+    """Hash with the configured scheme and costs; keyword params override them."""
+    cfg = dict(settings(), **params)
+    scheme = scheme or cfg["scheme"]
+    salt = os.urandom(SALT_BYTES)
+    if scheme == SCRYPT:
+        n, r, p = cfg["n"], cfg["r"], cfg["p"]
+        return f"{SCRYPT}${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+    if scheme == PBKDF2:
+        iterations = cfg["iterations"]
+        return f"{PBKDF2}${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}"
+    raise ValueError(f"unknown password scheme: {scheme}")
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.split("$", 1)[0] in (SCRYPT, PBKDF2)
+
+
+def needs_rehash(stored):
+    """True for plaintext and for hashes made with another scheme or other costs."""
+    if not is_hashed(stored):
+        return True
+    cfg = settings()
+    parts = stored.split("$")
+    if parts[0] != cfg["scheme"]:
+        return True
+    if parts[0] == SCRYPT:
+        return [int(x) for x in parts[1:4]] != [cfg["n"], cfg["r"], cfg["p"]]
+    return int(parts[1]) != cfg["iterations"]
+
+
+def _check(password, stored):
+    if not is_hashed(stored):
+        # legacy plaintext row: compare in constant time until it is upgraded
+        return hmac.compare_digest(password.encode("utf-8"), (stored or "").encode("utf-8"))
+    parts = stored.split("$")
+    try:
+        if parts[0] == SCRYPT:
+            n, r, p = (int(x) for x in parts[1:4])
+            salt, expected = _unb64(parts[4]), _unb64(parts[5])
+            if not HAS_SCRYPT:
+                return False
+            actual = _scrypt(password, salt, n, r, p)
+        else:
+            salt, expected = _unb64(parts[2]), _unb64(parts[3])
+            actual = _pbkdf2(password, salt, int(parts[1]))
+    except (ValueError, IndexError) as e:
+        print("password check error:", e)
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+class VerifyCache:
+    """Bounded, expiring set of recent successful (stored hash, password) checks."""
+
+    def __init__(self, size=256, ttl=900.0):
+        self.size = size
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()  # digest -> expiry (monotonic)
+        self._lock = threading.Lock()
+
+    def _digest(self, password, stored):
+        return hmac.new(self._key, f"{stored}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+    def hit(self, password, stored):
+        if self.size <= 0:
+            return False
+        digest = self._digest(password, stored)
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(digest)
+            if expires is None:
+                return False
+            if expires <= now:
+                del self._entries[digest]
+                return False
+            self._entries.move_to_end(digest)
+            return True
+
+    def add(self, password, stored):
+        if self.size <= 0:
+            return
+        digest = self._digest(password, stored)
+        with self._lock:
+            self._entries[digest] = time.monotonic() + self.ttl
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+_dummy = None
+
+def _verify_cache():
+    global _cache
+    if _cache is None:
+        cfg = settings()
+        _cache = VerifyCache(cfg["cache_size"], cfg["cache_seconds"])
+    return _cache
+
+
+def verify_password(password, stored):
+    """Check `password` against a stored value (hashed or legacy plaintext)."""
+    if not is_hashed(stored):
+        return _check(password, stored)
+    cache = _verify_cache()
+    if cache.hit(password, stored):
+        metrics.CACHE.inc(cache="password", result="hit")
+        return True
+    metrics.CACHE.inc(cache="password", result="miss")
+    ok = _check(password, stored)
+    if ok:
+        cache.add(password, stored)
+    return ok
+
+
+def burn_check(password):
+    """Spend one KDF check on a fixed hash, so an unknown username takes as long as a wrong password."""
+    global _dummy
+    if _dummy is None:
+        _dummy = hash_password("fitnz-unknown-user")
+    _check(password, _dummy)
+
+
+# ----- cost tuning -----
+def _time_hash(scheme, **params):
+    start = time.perf_counter()
+    hash_password("tuning-password", scheme, **params)
+    return time.perf_counter() - start
+
+
+def tune(target_ms=100.0, scheme=None):
+    """Double the cost until one hash takes at least target_ms here; returns (params, ms)."""
+    scheme = scheme or settings()["scheme"]
+    if scheme == SCRYPT:
+        n = 2 ** 12
+        while True:
+            ms = _time_hash(SCRYPT, n=n) * 1000
+            if ms >= target_ms or n >= 2 ** 20:
+                return {"SCRYPT_N": n, "SCRYPT_R": settings()["r"], "SCRYPT_P": settings()["p"]}, ms
+            n *= 2
+    iterations = 50_000
+    while True:
+        ms = _time_hash(PBKDF2, iterations=iterations) * 1000
+        if ms >= target_ms or iterations >= 10_000_000:
+            return {"PBKDF2_ITERATIONS": iterations}, ms
+        iterations *= 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Password hashing settings for this till")
+    parser.add_argument("--tune", action="store_true", help="find costs that reach --target-ms")
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--scheme", choices=(SCRYPT, PBKDF2))
+    args = parser.parse_args(argv)
+
+    cfg = settings()
+    current = (f"n={cfg['n']} r={cfg['r']} p={cfg['p']}" if cfg["scheme"] == SCRYPT
+               else f"iterations={cfg['iterations']}")
+    ms = _time_hash(cfg["scheme"]) * 1000
+    print(f"current: {cfg['scheme']} {current}: {ms:.1f} ms per hash")
+    if args.tune:
+        params, ms = tune(args.target_ms, args.scheme)
+        print(f"suggested ({ms:.1f} ms per hash), add to database.env:")
+        if (args.scheme or cfg["scheme"]) != cfg["scheme"]:
+            print(f"PASSWORD_SCHEME={args.scheme}")
+        for key, value in params.items():
+            print(f"{key}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,15 @@ from tkinter import ttk
 import ttkbootstrap as bs
 from ttkbootstrap.dialogs import Messagebox
 from datetime import datetime
-import re
 from .product_forms import AddProductPage, EditProductPage
 
-# Import your DB function (adjust relative import if package structure differs)
-from . import database_mysql as db
+# Checkout logic lives in the headless service
+from .checkout import CheckoutService, CheckoutError, PaymentError, validate_payment
 
 class PaymentDialog(bs.Toplevel):
     """
     Modal dialog for entering card details and performing a simulated payment.
-    On success, it will call db.process_sale(...) with provided sale details.
+    On success, it records the sale through CheckoutService.checkout().
     """
 
     def __init__(self, parent, cart, customer_obj=None, user_obj=None,
@@ -26,6 +25,8 @@ class PaymentDialog(bs.Toplevel):
         self.points_redeemed = points_redeemed
         self.student_discount_applied = student_discount_applied
         self.delivery_date = delivery_date or (datetime.now().date())
+        self.service = CheckoutService.from_cart(cart, customer_obj, student_discount_applied,
+                                                 points_redeemed, employee=user_obj)
 
         self.title("Payment — Enter Card Details")
         self.transient(parent)
@@ -73,47 +74,9 @@ class PaymentDialog(bs.Toplevel):
                   wraplength=380, font=("Helvetica", 9), foreground="gray").pack(pady=(6,0))
 
     def calc_totals(self):
-        """Compute total and gst from cart items. Cart items expected to be dicts/objects with unit_price and qty/quantity."""
-        total = 0.0
-        gst = 0.0
-        for it in self.cart:
-            price = getattr(it, "unit_price", None) or getattr(it, "price", None) or (it.get("unit_price") if isinstance(it, dict) else 0)
-            qty = getattr(it, "qty", None) or getattr(it, "quantity", None) or (it.get("qty") if isinstance(it, dict) else 1)
-            # If item has gst_rate, use it; else default 15%
-            gst_rate = getattr(it, "gst_rate", None) or (it.get("gst_rate") if isinstance(it, dict) else 0.15)
-            line = float(price) * int(qty)
-            total += line * (1 + float(gst_rate))
-            gst += line * float(gst_rate)
-        return total, gst
-
-    # --- Validation helpers ---
-    def luhn_check(self, card_number: str) -> bool:
-        n = re.sub(r"\D", "", card_number)
-        if len(n) < 12: 
-            return False
-        def digits_of(x): return [int(d) for d in x]
-        digits = digits_of(n)
-        odd_sum = sum(digits[-1::-2])
-        even_sum = sum(sum(divmod(2*d, 10)) for d in digits[-2::-2])
-        return (odd_sum + even_sum) % 10 == 0
-
-    def validate_expiry(self, mm_yy: str) -> bool:
-        try:
-            mm_yy = mm_yy.strip()
-            m, y = mm_yy.split("/")
-            m = int(m); y = int(y)
-            # normalize two-digit year to 2000+
-            if y < 100:
-                y += 2000
-            exp = datetime(y, m, 1)
-            now = datetime.now()
-            # expire end of month: allow if current date <= last day of month
-            return exp.replace(day=28) >= now.replace(day=28) or (y > now.year or (y==now.year and m>=now.month))
-        except Exception:
-            return False
-
-    def validate_cvv(self, cvv: str) -> bool:
-        return bool(re.fullmatch(r"\d{3,4}", cvv.strip()))
+        """Compute total (incl. GST) and GST for the cart via the pricing plan."""
+        quote = self.service.quote()
+        return quote.total, quote.gst
 
     # --- Payment processing (simulated) ---
     def on_pay(self):
@@ -122,14 +85,10 @@ class PaymentDialog(bs.Toplevel):
         expiry = self.ent_expiry.get().strip()
         cvv = self.ent_cvv.get().strip()
 
-        if not name:
-            Messagebox.show_error("Cardholder name is required.", "Validation Error", parent=self); return
-        if not number or not self.luhn_check(number):
-            Messagebox.show_error("Invalid card number.", "Validation Error", parent=self); return
-        if not expiry or not self.validate_expiry(expiry):
-            Messagebox.show_error("Invalid expiry (use MM/YY).", "Validation Error", parent=self); return
-        if not self.validate_cvv(cvv):
-            Messagebox.show_error("Invalid CVV (3 or 4 digits).", "Validation Error", parent=self); return
+        try:
+            validate_payment({"name": name, "number": number, "expiry": expiry, "cvv": cvv})
+        except PaymentError as e:
+            Messagebox.show_error(str(e), "Validation Error", parent=self); return
 
         # simulate contacting payment gateway
         Messagebox.show_info("Processing payment... (demo)", "Processing", parent=self)
@@ -138,24 +97,18 @@ class PaymentDialog(bs.Toplevel):
     def _complete_payment(self):
         """
         Here you'd call a real payment gateway. We'll simulate success.
-        On success, call db.process_sale and close dialog.
+        On success, commit the sale via CheckoutService and close dialog.
         """
         # Simulate a successful payment result
         success = True
 
         if success:
-            # Persist sale via your db API (match your code)
+            # Record the sale through the headless checkout service
             try:
-                # db.process_sale(customer_obj, cart, points_redeemed, student_discount_applied, delivery_date)
-                # ensure proper args — these come from constructor
-                ok = db.process_sale(self.customer_obj, self.cart, self.points_redeemed,
-                                     self.student_discount_applied, self.delivery_date)
-                if ok:
-                    Messagebox.show_info("Payment successful. Sale recorded.", "Success", parent=self)
-                else:
-                    Messagebox.show_error("Payment succeeded but saving sale failed.", "DB Error", parent=self)
-            except Exception as e:
-                Messagebox.show_error(f"Payment succeeded but error saving sale: {e}", "Error", parent=self)
+                self.service.checkout("Card", delivery_date=self.delivery_date)
+                Messagebox.show_info("Payment successful. Sale recorded.", "Success", parent=self)
+            except CheckoutError as e:
+                Messagebox.show_error(f"Payment succeeded but saving sale failed: {e}", "DB Error", parent=self)
             self.result = True
             self.destroy()
         else:
@@ -0,0 +1,248 @@
+# File: FITNZ/pricing.py
+# ===============================================
+# Code Owner: Rajina (US: Automatically calculate and apply all eligible discounts)
+# Single place for basket pricing: promotions, member/student discounts,
+# loyalty point redemption and GST.
+# ===============================================
+"""
+Rules are compiled once into a PricingPlan; plan.price(...) then prices a
+whole basket in one pass and returns a Quote with a PricedLine per product.
+
+Order of application per line:
+    multi-buy free units -> category discount -> member/student discount
+Points are applied to the basket afterwards (capped at the net amount) and
+spread across lines pro rata, then GST is added on what is left.
+All arithmetic is in integer cents (see money.py).
+"""
+
+from .money import Money, allocate, apply_rate, from_cents, rate_bp, to_cents
+
+# Member discount by membership level (matches the Customer subclasses).
+TIER_RATES = {"Standard": 0.0, "Bronze": 0.05, "Silver": 0.10, "Gold": 0.15, "Student": 0.20}
+STUDENT_RATE = 0.20
+POINT_VALUE = 0.10   # 1 point = $0.10
+GST_RATE = 0.15
+
+
+class MultiBuy:
+    """Buy `buy` of a product, get `free` more free (e.g. 3 for 2 = MultiBuy(pid, 2, 1))."""
+    __slots__ = ("product_id", "buy", "free")
+
+    def __init__(self, product_id, buy, free=1):
+        self.product_id = str(product_id)
+        self.buy = int(buy)
+        self.free = int(free)
+
+
+class CategoryDiscount:
+    """Percentage off every product whose `category` matches."""
+    __slots__ = ("category", "rate")
+
+    def __init__(self, category, rate):
+        self.category = str(category).lower()
+        self.rate = float(rate)
+
+
+class PricedLine:
+    """One product's line. Amounts are int cents; unit_price/total are dollar views."""
+    __slots__ = ("product_id", "name", "qty", "unit_cents", "gross_cents", "promo_cents",
+                 "member_cents", "points_cents", "net_cents", "gst_cents", "total_cents")
+
+    @property
+    def unit_price(self):
+        return from_cents(self.unit_cents)
+
+    @property
+    def total(self):
+        return from_cents(self.total_cents)
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Quote:
+    """
+    Priced basket. Header amounts are the exact sums of the lines (GST is
+    computed on the basket and allocated, so lines add up to the header).
+    `net` is after all discounts, `total` includes GST.
+    """
+    __slots__ = ("lines", "subtotal_cents", "discount_cents", "points_cents", "points_used",
+                 "net_cents", "gst_cents", "total_cents")
+
+    def __init__(self, lines, points_used=0):
+        self.lines = lines
+        self.points_used = points_used
+        self.subtotal_cents = Money(sum(l.gross_cents for l in lines))
+        self.discount_cents = Money(sum(l.promo_cents + l.member_cents for l in lines))
+        self.points_cents = Money(sum(l.points_cents for l in lines))
+        self.net_cents = Money(sum(l.net_cents for l in lines))
+        self.gst_cents = Money(sum(l.gst_cents for l in lines))
+        self.total_cents = Money(sum(l.total_cents for l in lines))
+
+    # Dollar views for display code.
+    subtotal = property(lambda self: from_cents(self.subtotal_cents))
+    discount = property(lambda self: from_cents(self.discount_cents))
+    points_discount = property(lambda self: from_cents(self.points_cents))
+    net = property(lambda self: from_cents(self.net_cents))
+    gst = property(lambda self: from_cents(self.gst_cents))
+    total = property(lambda self: from_cents(self.total_cents))
+
+
+def _field(obj, names, default=None):
+    if isinstance(obj, dict):
+        for n in names:
+            if obj.get(n) is not None:
+                return obj[n]
+        return default
+    for n in names:
+        v = getattr(obj, n, None)
+        if v is not None:
+            return v
+    return default
+
+
+def basket_lines(cart):
+    """
+    Normalise any cart shape used by the UI into [(pid, product, qty), ...] with
+    one entry per product id: repeated Product objects, objects with .qty,
+    {'product': p, 'quantity': n} dicts, or plain dicts with unit_price/qty.
+    """
+    grouped = {}
+    for it in cart:
+        product = it.get('product', it) if isinstance(it, dict) else it
+        qty = int(_field(it, ('quantity', 'qty'), 1))
+        pid = str(_field(product, ('product_id', 'id'), id(product)))
+        if pid in grouped:
+            grouped[pid][2] += qty
+        else:
+            grouped[pid] = [pid, product, qty]
+    return grouped.values()
+
+
+class PricingPlan:
+    """Compiled pricing rules; build with compile_rules(). Rates are basis points."""
+
+    def __init__(self, multibuys, category_bp, tier_bp, student_bp, point_cents, gst_bp):
+        self._multibuys = multibuys
+        self._category_bp = category_bp
+        self.tier_bp = tier_bp
+        self.student_bp = student_bp
+        self.point_cents = point_cents
+        self.gst_bp = gst_bp
+        # (product id, category) -> (buy + free, free, category bp); filled on
+        # first sight. The category is part of the key, so re-categorising a
+        # product in the back office takes effect on the next basket.
+        self._line_rules = {}
+
+    def _rule_for(self, pid, product):
+        category = str(_field(product, ('category',), '')).lower()
+        rule = self._line_rules.get((pid, category))
+        if rule is None:
+            mb = self._multibuys.get(pid)
+            rule = ((mb.buy + mb.free, mb.free) if mb else (0, 0)) + \
+                   (self._category_bp.get(category, 0),)
+            self._line_rules[(pid, category)] = rule
+        return rule
+
+    def member_bp(self, customer, student=False):
+        if student:
+            return self.student_bp
+        if customer is None:
+            return 0
+        level = getattr(customer, 'membership_level', None)
+        if level in self.tier_bp:
+            return self.tier_bp[level]
+        return rate_bp(getattr(customer, 'get_discount_rate', lambda: 0.0)())
+
+    def price(self, cart, customer=None, student=False, points=0):
+        """Price `cart` in one pass and return a Quote."""
+        member_bp = self.member_bp(customer, student)
+        rule_for = self._rule_for
+        lines = []
+        for pid, product, qty in basket_lines(cart):
+            unit = _unit_cents(product)
+            group, free, cat_bp = rule_for(pid, product)
+
+            gross = unit * qty
+            promo = unit * (qty // group) * free if group else 0
+            if cat_bp:
+                promo += apply_rate(gross - promo, cat_bp)
+            member = apply_rate(gross - promo, member_bp) if member_bp else 0
+
+            line = PricedLine()
+            line.product_id = pid
+            line.name = _field(product, ('name',), '')
+            line.qty = qty
+            line.unit_cents = unit
+            line.gross_cents = gross
+            line.promo_cents = promo
+            line.member_cents = member
+            line.points_cents = 0
+            line.net_cents = gross - promo - member
+            lines.append(line)
+
+        points_used = self._apply_points(lines, points)
+
+        # GST on the basket, then allocated so the lines sum to the header.
+        net_total = sum(l.net_cents for l in lines)
+        gst_parts = allocate(apply_rate(net_total, self.gst_bp), [l.net_cents for l in lines])
+        for line, gst in zip(lines, gst_parts):
+            line.gst_cents = gst
+            line.total_cents = line.net_cents + gst
+        return Quote(lines, points_used)
+
+    def _apply_points(self, lines, points):
+        """Spread the points discount over lines pro rata; return points actually used."""
+        net = sum(l.net_cents for l in lines)
+        if points <= 0 or net <= 0:
+            return 0
+        used = min(int(points), net // self.point_cents)
+        parts = allocate(used * self.point_cents, [l.net_cents for l in lines])
+        for line, cut in zip(lines, parts):
+            line.points_cents = cut
+            line.net_cents -= cut
+        return used
+
+
+def _unit_cents(product):
+    cents = _field(product, ('price_cents', 'unit_cents'))
+    if cents is not None:
+        return int(cents)
+    return to_cents(_field(product, ('unit_price', 'price'), 0))
+
+
+def compile_rules(rules=(), tier_rates=None, student_rate=STUDENT_RATE,
+                  point_value=POINT_VALUE, gst_rate=GST_RATE):
+    """Compile promotion rules (MultiBuy / CategoryDiscount) into a PricingPlan."""
+    multibuys, category_bp = {}, {}
+    for rule in rules:
+        if isinstance(rule, MultiBuy):
+            multibuys[rule.product_id] = rule
+        elif isinstance(rule, CategoryDiscount):
+            category_bp[rule.category] = rate_bp(rule.rate)
+        else:
+            raise TypeError(f"Unknown pricing rule: {rule!r}")
+    tier_bp = {level: rate_bp(r) for level, r in (tier_rates or TIER_RATES).items()}
+    return PricingPlan(multibuys, category_bp, tier_bp, rate_bp(student_rate),
+                       to_cents(point_value), rate_bp(gst_rate))
+
+
+# Store-wide promotions. Edit here and call set_rules() to recompile.
+PROMOTIONS = ()
+
+_plan = None
+
+def default_plan():
+    global _plan
+    if _plan is None:
+        _plan = compile_rules(PROMOTIONS)
+    return _plan
+
+def set_rules(rules):
+    """Replace the store-wide promotions and recompile the default plan."""
+    global _plan
+    _plan = compile_rules(rules)
+    return _plan
+
+def price_basket(cart, customer=None, student=False, points=0):
+    return default_plan().price(cart, customer, student, points)
@@ -0,0 +1,387 @@
+# File: FITNZ/receipts.py
+# ===============================================
+# Code Owner: Sahil (US: Checkout/Order History/Stock Alerts)
+# Receipt rendering (plain text, ESC/POS, HTML) and background printing.
+# ===============================================
+"""
+A receipt template is a tuple of rows. compile_template() turns it into a
+list of pieces for one output format, once: constant rows are rendered up
+front, variable rows keep a bound str.format_map, and the item row is
+expanded per cart line. Rendering a receipt is then one pass and a single
+join.
+
+Row kinds:
+    ("rule", char)                 full-width line
+    ("title", text)                centred, emphasised (double size on ESC/POS)
+    ("center", text)               centred
+    ("text", fmt)                  left aligned
+    ("pair", label, fmt)           label left, value right
+    ("items", fmt)                 one row per entry in r['items']
+    ("blank",)
+A row may end with {"when": key} to print only when r[key] is truthy.
+
+ReceiptPrinter renders ESC/POS on a worker thread and hands the bytes to
+a sink (FileSink for a device node such as /dev/usb/lp0 or a log file,
+DirectorySink for one file per receipt, NullSink when the till has no
+printer), so the till is free straight away.
+
+Code page 437 has no macrons, smart quotes or "×", so EscPosFormat spells
+such characters in ASCII before encoding instead of printing "?".
+`python -m FITNZ.receipts --check` renders a sample receipt as ESC/POS
+and exits 1 if anything still came out as "?".
+"""
+
+import argparse
+import html
+import os
+import queue
+import sys
+import threading
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+
+from . import metrics
+
+WIDTH = 32  # characters per line on 58mm thermal paper
+
+STORE_RECEIPT = (
+    ("rule", "═"),
+    ("title", "FIT NZ STORE"),
+    ("center", "Fitness Equipment & Nutrition"),
+    ("rule", "═"),
+    ("blank",),
+    ("text", "Date: {date} {time}"),
+    ("text", "Customer: {customer}"),
+    ("text", "Staff: {employee}"),
+    ("rule", "─"),
+    ("text", "ITEMS:"),
+    ("items", "{name:<18.18} ${price:>6.2f} x {quantity}"),
+    ("rule", "─"),
+    ("pair", "Subtotal:", "${subtotal:.2f}"),
+    ("pair", "Discount:", "-${discount:.2f}", {"when": "discount"}),
+    ("pair", "Points Redeemed:", "{points_redeemed}", {"when": "points_redeemed"}),
+    ("pair", "Remaining Points:", "{remaining_points}", {"when": "points_redeemed"}),
+    ("pair", "GST (15%):", "${gst:.2f}"),
+    ("pair", "TOTAL:", "${total:.2f}"),
+    ("rule", "─"),
+    ("text", "Payment: {payment_method}"),
+    ("rule", "═"),
+    ("center", "THANK YOU FOR SHOPPING!"),
+    ("center", "HAVE A GREAT DAY!"),
+    ("rule", "═"),
+)
+
+
+# ------------------------------ formats ------------------------------
+
+class TextFormat:
+    """Plain text, one receipt line per row."""
+    sep = "\n"
+
+    def __init__(self, width=WIDTH):
+        self.width = width
+
+    def rule(self, char):
+        return char * self.width
+
+    def blank(self):
+        return ""
+
+    def title(self, text):
+        return text.center(self.width).rstrip()
+
+    def center(self, text):
+        return text.center(self.width).rstrip()
+
+    def text(self, text):
+        return text
+
+    def pair(self, label, value):
+        return f"{label:<{self.width - len(value)}}{value}" if len(label) + len(value) < self.width else f"{label} {value}"
+
+    def document(self, body):
+        return body
+
+
+# Characters cp437 lacks that have no ASCII base under NFKD.
+CP437_FALLBACKS = {
+    "×": "x", "–": "-", "—": "-", "‘": "'", "’": "'", "‚": ",", "“": '"', "”": '"',
+    "„": '"', "…": "...", "•": "*", "€": "EUR", "™": "TM", "©": "(c)", "®": "(R)",
+}
+
+
+@lru_cache(maxsize=1024)
+def _cp437_char(ch):
+    try:
+        ch.encode("cp437")
+        return ch
+    except UnicodeEncodeError:
+        pass
+    if ch in CP437_FALLBACKS:
+        return CP437_FALLBACKS[ch]
+    # "ā" -> "a": drop the combining marks
+    base = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+    return base or "?"
+
+
+class EscPosFormat(TextFormat):
+    """ESC/POS byte stream for thermal printers (code page 437)."""
+    sep = b"\n"
+    INIT = b"\x1b@\x1bt\x00"          # reset, PC437
+    CENTER, LEFT = b"\x1ba\x01", b"\x1ba\x00"
+    BIG_BOLD, NORMAL = b"\x1d!\x11\x1bE\x01", b"\x1d!\x00\x1bE\x00"
+    CUT = b"\n\n\n\x1dV\x42\x00"      # feed and partial cut
+
+    def _enc(self, text):
+        try:
+            return text.encode("cp437")
+        except UnicodeEncodeError:
+            return "".join(map(_cp437_char, text)).encode("cp437", "replace")
+
+    def rule(self, char):
+        return self._enc(super().rule(char))
+
+    def blank(self):
+        return b""
+
+    def title(self, text):
+        return self.CENTER + self.BIG_BOLD + self._enc(text) + self.NORMAL + self.LEFT
+
+    def center(self, text):
+        return self.CENTER + self._enc(text) + self.LEFT
+
+    def text(self, text):
+        return self._enc(text)
+
+    def pair(self, label, value):
+        return self._enc(super().pair(label, value))
+
+    def document(self, body):
+        return self.INIT + body + self.CUT
+
+
+class HtmlFormat(TextFormat):
+    """Self-contained HTML (no PDF dependency); values are escaped."""
+    sep = "\n"
+    STYLE = ("body{font-family:monospace;width:%dch;margin:1em auto}"
+             ".c{text-align:center}.t{font-weight:bold;font-size:1.4em}"
+             ".p{display:flex;justify-content:space-between}hr{border:0;border-top:1px dashed #000}")
+
+    def rule(self, char):
+        return "<hr>"
+
+    def blank(self):
+        return "<br>"
+
+    def title(self, text):
+        return f'<div class="c t">{html.escape(text)}</div>'
+
+    def center(self, text):
+        return f'<div class="c">{html.escape(text)}</div>'
+
+    def text(self, text):
+        return f"<div>{html.escape(text)}</div>"
+
+    def pair(self, label, value):
+        return f'<div class="p"><span>{html.escape(label)}</span><span>{html.escape(value)}</span></div>'
+
+    def document(self, body):
+        return ('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Receipt</title>'
+                f"<style>{self.STYLE % self.width}</style></head><body>\n{body}\n</body></html>")
+
+
+# ----------------------------- compilation -----------------------------
+
+def _split_row(row):
+    if row and isinstance(row[-1], dict):
+        return row[:-1], row[-1].get("when")
+    return row, None
+
+
+def compile_template(template, fmt):
+    """Compile `template` for output format `fmt` into a render(r) function."""
+    pieces = []  # (when, constant) or (when, callable(r) -> piece)
+    for row in template:
+        (kind, *args), when = _split_row(row)
+        if kind == "rule":
+            pieces.append((when, fmt.rule(args[0])))
+        elif kind == "blank":
+            pieces.append((when, fmt.blank()))
+        elif kind == "items":
+            line, fill = fmt.text, args[0].format_map
+            pieces.append((when, lambda r, line=line, fill=fill, sep=fmt.sep: sep.join(line(fill(it)) for it in r["items"])))
+        elif kind == "pair":
+            label, value = args
+            emit = fmt.pair
+            if "{" in value:
+                fill = value.format_map
+                pieces.append((when, lambda r, emit=emit, label=label, fill=fill: emit(label, fill(r))))
+            else:
+                pieces.append((when, emit(label, value)))
+        else:
+            emit = getattr(fmt, kind)
+            text = args[0]
+            if "{" in text:
+                fill = text.format_map
+                pieces.append((when, lambda r, emit=emit, fill=fill: emit(fill(r))))
+            else:
+                pieces.append((when, emit(text)))
+
+    sep, document = fmt.sep, fmt.document
+
+    def render(r):
+        return document(sep.join(
+            p if not callable(p) else p(r)
+            for when, p in pieces if when is None or r.get(when)
+        ))
+    return render
+
+
+_text = compile_template(STORE_RECEIPT, TextFormat())
+_escpos = compile_template(STORE_RECEIPT, EscPosFormat())
+_html = compile_template(STORE_RECEIPT, HtmlFormat())
+
+def render_text(r):
+    return _text(r)
+
+def render_escpos(r):
+    return _escpos(r)
+
+def render_html(r):
+    return _html(r)
+
+
+# ------------------------------ printing ------------------------------
+
+class FileSink:
+    """Append each job to one file (a printer device node or a log file)."""
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+
+class DirectorySink:
+    """Write each job to its own file in `folder`, keeping only the newest `keep` of them."""
+    def __init__(self, folder, suffix=".bin", keep=500):
+        self.folder = folder
+        self.suffix = suffix
+        self.keep = keep
+        os.makedirs(folder, exist_ok=True)
+
+    def write(self, data):
+        name = datetime.now().strftime("receipt_%Y%m%d_%H%M%S_%f") + self.suffix
+        mode = "wb" if isinstance(data, bytes) else "w"
+        with open(os.path.join(self.folder, name), mode) as f:
+            f.write(data)
+        self.prune()
+
+    def prune(self):
+        if not self.keep:
+            return
+        # names sort by time, so everything before the last `keep` is older
+        names = sorted(n for n in os.listdir(self.folder)
+                       if n.startswith("receipt_") and n.endswith(self.suffix))
+        for name in names[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError as e:
+                print("receipt prune error:", e)
+
+
+class NullSink:
+    """Drop every job (no printer configured)."""
+    def write(self, data):
+        pass
+
+
+class ReceiptPrinter:
+    """Renders and writes receipts on a daemon thread; submit() never blocks."""
+
+    def __init__(self, sink, render=render_escpos):
+        self.sink = sink
+        self.render = render
+        self._jobs = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="receipt-printer", daemon=True)
+        self._worker.start()
+
+    def submit(self, receipt_info):
+        self._jobs.put(dict(receipt_info))
+
+    def flush(self, timeout=None):
+        """Wait until every submitted receipt has been written (for shutdown/tests)."""
+        done = threading.Event()
+        self._jobs.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if isinstance(job, threading.Event):
+                job.set()
+                continue
+            try:
+                self.sink.write(self.render(job))
+            except Exception as e:
+                print("receipt printer error:", e)
+
+
+_printer = None
+
+def default_printer():
+    """
+    Printer for the till: RECEIPT_PRINTER in database.env names a device or
+    file to append to; RECEIPT_DIR keeps one file per receipt in a folder
+    (the newest RECEIPT_KEEP, default 500). With neither set, nothing is
+    printed.
+    """
+    global _printer
+    if _printer is None:
+        from .database_mysql import config
+        target = config.get("RECEIPT_PRINTER")
+        folder = config.get("RECEIPT_DIR")
+        if target:
+            sink = FileSink(target)
+        elif folder:
+            sink = DirectorySink(folder, keep=int(config.get("RECEIPT_KEEP", 500)))
+        else:
+            sink = NullSink()
+        _printer = ReceiptPrinter(sink)
+        metrics.QUEUE_DEPTH.set(_printer._jobs.qsize, queue="receipts")
+    return _printer
+
+
+# ------------------------------ self-check ------------------------------
+
+SAMPLE_RECEIPT = {
+    "date": "2026-01-31", "time": "09:30", "customer": "Aroha Ngāta", "employee": "Jane Doe",
+    "items": [
+        {"name": "Dumbbell 5kg", "price": 40.0, "quantity": 2},
+        {"name": "Kūmara Protein – “Choc”", "price": 80.0, "quantity": 1},
+    ],
+    "subtotal": 160.0, "discount": 8.0, "points_redeemed": 100, "remaining_points": 400,
+    "gst": 19.83, "total": 152.0, "payment_method": "EFTPOS",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receipt rendering")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if the sample ESC/POS receipt has characters code page 437 cannot print")
+    args = parser.parse_args(argv)
+
+    print(render_text(SAMPLE_RECEIPT))
+    if args.check:
+        data = render_escpos(SAMPLE_RECEIPT)
+        if b"?" in data:
+            bad = [line for line in data.split(b"\n") if b"?" in line]
+            print("ESC/POS output has '?' substitutions:", *bad, sep="\n  ")
+            sys.exit(1)
+        print("ESC/POS output OK: no '?' substitutions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# File: FITNZ/reports_ui.py
+# ===============================================
+# Code Owner: Imran (US: Reports/Admin Access)
+# Sales report window and the paged grid helper shared with product management.
+# ===============================================
+"""
+The grids never hold the whole table: sorting, filtering and paging are
+done by the database (db.browse_products / db.browse_sales, indexed per
+sort key apart from the customer name, which is sorted within the date
+range), and the Treeview only ever shows one page of rows.
+"""
+
+from datetime import date, timedelta
+
+import ttkbootstrap as bs
+import ttkbootstrap as ttk
+from ttkbootstrap.dialogs import Messagebox
+
+from . import database_mysql as db
+from . import metrics
+from .money import format_cents, to_cents
+
+
+class GridPager:
+    """
+    Clickable sort headings and Prev/Next paging for a Treeview.
+
+    fetch(sort, descending, page, page_size) returns (rows, total); render(row)
+    turns a row into the Treeview values. sort_keys maps Treeview column ids
+    to the sort keys fetch understands; other columns are not sortable.
+    With count_cap, a total above it is an estimate ("5000+ rows"); paging
+    then goes on while pages come back full.
+    """
+
+    ARROWS = {False: " ▲", True: " ▼"}
+
+    def __init__(self, tree, controls, fetch, render, sort_keys, sort, descending=False, page_size=100,
+                 count_cap=None):
+        self.tree = tree
+        self.fetch = fetch
+        self.render = render
+        self.sort_keys = sort_keys
+        self.sort = sort
+        self.descending = descending
+        self.page_size = page_size
+        self.count_cap = count_cap
+        self.page = 0
+        self.total = 0
+        self.rows = []
+        self._titles = {col: tree.heading(col, "text") for col in tree["columns"]}
+        for col, key in sort_keys.items():
+            tree.heading(col, command=lambda k=key: self.sort_by(k))
+
+        self.prev_button = ttk.Button(controls, text="◀ Prev", bootstyle="secondary-outline",
+                                      width=8, command=self.prev_page)
+        self.prev_button.pack(side="left")
+        self.page_label = ttk.Label(controls, text="", font=("Segoe UI", 9), bootstyle="secondary")
+        self.page_label.pack(side="left", padx=10)
+        self.next_button = ttk.Button(controls, text="Next ▶", bootstyle="secondary-outline",
+                                      width=8, command=self.next_page)
+        self.next_button.pack(side="left")
+
+    def sort_by(self, key):
+        """Clicking the current sort column flips the direction."""
+        if key == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort, self.descending = key, False
+        self.reload(first_page=True)
+
+    def prev_page(self):
+        if self.page > 0:
+            self.page -= 1
+            self.reload()
+
+    def has_more(self):
+        if self.count_cap and self.total > self.count_cap:
+            return len(self.rows) == self.page_size
+        return (self.page + 1) * self.page_size < self.total
+
+    def next_page(self):
+        if self.has_more():
+            self.page += 1
+            self.reload()
+
+    def reload(self, first_page=False):
+        if first_page:
+            self.page = 0
+        self.rows, self.total = self.fetch(self.sort, self.descending, self.page, self.page_size)
+        if self.page and not self.rows and self.total and not (self.count_cap and self.total > self.count_cap):
+            # rows were deleted under us: step back to the last page
+            self.page = (self.total - 1) // self.page_size
+            self.rows, self.total = self.fetch(self.sort, self.descending, self.page, self.page_size)
+
+        self.tree.delete(*self.tree.get_children())
+        for row in self.rows:
+            self.tree.insert("", "end", values=self.render(row))
+
+        for col, title in self._titles.items():
+            arrow = self.ARROWS[self.descending] if self.sort_keys.get(col) == self.sort else ""
+            self.tree.heading(col, text=title + arrow)
+
+        first = self.page * self.page_size + 1 if self.rows else 0
+        last = first + len(self.rows) - 1 if self.rows else 0
+        if self.count_cap and self.total > self.count_cap:
+            text = f"{first}-{last} of {self.count_cap}+  (page {self.page + 1})"
+        else:
+            text = f"{first}-{last} of {self.total}  (page {self.page + 1}/{max(1, -(-self.total // self.page_size))})"
+        self.page_label.config(text=text)
+        self.prev_button.config(state="normal" if self.page > 0 else "disabled")
+        self.next_button.config(state="normal" if self.has_more() else "disabled")
+
+
+class SalesReportPage(bs.Toplevel):
+    """Sales report (Manager/Owner/Developer): filter by date, total and customer, sort by any of them."""
+
+    PAGE_SIZE = 100
+
+    def __init__(self, parent, logged_in_user):
+        super().__init__(parent)
+        self.logged_in_user = logged_in_user
+        self.title("📊 Sales Report - Fit NZ")
+        self.minsize(900, 600)
+        self.transient(parent)
+
+        header = ttk.Frame(self, padding=20)
+        header.pack(fill="x")
+        ttk.Label(header, text="📊 Sales Report", font=("Segoe UI", 20, "bold"),
+                  bootstyle="primary").pack(side="left")
+        ttk.Label(header, text=f"Logged in as: {logged_in_user.name}", font=("Segoe UI", 10),
+                  bootstyle="secondary").pack(side="right")
+
+        # ===== FILTERS =====
+        filters = ttk.Labelframe(self, text="Filters", padding=10, bootstyle="info")
+        filters.pack(fill="x", padx=20)
+
+        today = date.today()
+        self.filter_vars = {
+            "date_from": ttk.StringVar(value=(today - timedelta(days=30)).isoformat()),
+            "date_to": ttk.StringVar(value=today.isoformat()),
+            "min_total": ttk.StringVar(),
+            "max_total": ttk.StringVar(),
+            "customer": ttk.StringVar(),
+        }
+        fields = [
+            ("From (YYYY-MM-DD):", "date_from", 12),
+            ("To:", "date_to", 12),
+            ("Min $:", "min_total", 8),
+            ("Max $:", "max_total", 8),
+            ("Customer ID:", "customer", 10),
+        ]
+        for col, (label, key, width) in enumerate(fields):
+            ttk.Label(filters, text=label, font=("Segoe UI", 9, "bold")).grid(row=0, column=col * 2, padx=(0, 4))
+            entry = ttk.Entry(filters, textvariable=self.filter_vars[key], width=width)
+            entry.grid(row=0, column=col * 2 + 1, padx=(0, 12))
+            entry.bind("<Return>", lambda e: self.apply_filters())
+        ttk.Button(filters, text="🔍 Apply", bootstyle="primary", command=self.apply_filters).grid(
+            row=0, column=len(fields) * 2, padx=(0, 6))
+        ttk.Button(filters, text="Clear", bootstyle="secondary-outline", command=self.clear_filters).grid(
+            row=0, column=len(fields) * 2 + 1)
+
+        # ===== GRID =====
+        body = ttk.Frame(self, padding=(20, 10))
+        body.pack(fill="both", expand=True)
+
+        columns = ("ID", "Date", "Customer", "Total", "GST", "Delivery")
+        self.sales_tree = ttk.Treeview(body, columns=columns, show="headings", bootstyle="primary", height=18)
+        for col, title, width, anchor in (
+            ("ID", "Sale #", 70, "center"),
+            ("Date", "Date", 160, "center"),
+            ("Customer", "Customer", 200, "w"),
+            ("Total", "Total ($)", 100, "e"),
+            ("GST", "GST ($)", 90, "e"),
+            ("Delivery", "Delivery", 110, "center"),
+        ):
+            self.sales_tree.heading(col, text=title)
+            self.sales_tree.column(col, width=width, anchor=anchor)
+        self.sales_tree.grid(row=0, column=0, sticky="nsew")
+        scroll = ttk.Scrollbar(body, orient="vertical", command=self.sales_tree.yview)
+        scroll.grid(row=0, column=1, sticky="ns")
+        self.sales_tree.configure(yscrollcommand=scroll.set)
+        body.grid_rowconfigure(0, weight=1)
+        body.grid_columnconfigure(0, weight=1)
+        self.sales_tree.bind("<Double-1>", self.show_sale_details)
+
+        footer = ttk.Frame(self, padding=(20, 0, 20, 15))
+        footer.pack(fill="x")
+        self.summary_label = ttk.Label(footer, text="", font=("Segoe UI", 10, "bold"))
+        self.summary_label.pack(side="left")
+        controls = ttk.Frame(footer)
+        controls.pack(side="right")
+        ttk.Button(footer, text="Close", bootstyle="secondary-outline", command=self.destroy).pack(
+            side="right", padx=(0, 20))
+
+        self.pager = GridPager(
+            self.sales_tree, controls, self.fetch_sales, self.render_sale,
+            {"Date": "date", "Customer": "customer", "Total": "total"},
+            sort="date", descending=True, page_size=self.PAGE_SIZE,
+        )
+        self.apply_filters()
+
+    def current_filters(self):
+        values = {key: var.get().strip() for key, var in self.filter_vars.items()}
+        if values["date_to"]:
+            # inclusive in the form, exclusive in the query
+            try:
+                values["date_to"] = (date.fromisoformat(values["date_to"]) + timedelta(days=1)).isoformat()
+            except ValueError:
+                raise ValueError("Dates must be YYYY-MM-DD.")
+        if values["date_from"]:
+            try:
+                date.fromisoformat(values["date_from"])
+            except ValueError:
+                raise ValueError("Dates must be YYYY-MM-DD.")
+        for key in ("min_total", "max_total"):
+            if values[key]:
+                try:
+                    to_cents(values[key])
+                except (ValueError, ArithmeticError):
+                    # ArithmeticError covers decimal.InvalidOperation ("abc", "inf")
+                    raise ValueError("Totals must be amounts in dollars.")
+        return values
+
+    def fetch_sales(self, sort, descending, page, page_size):
+        return db.browse_sales(sort, descending, self.filters, page, page_size)
+
+    def render_sale(self, sale):
+        return (
+            sale["sale_id"],
+            sale["datetime"],
+            sale["customer"],
+            f"{sale['total']:.2f}",
+            f"{sale['gst'] or 0:.2f}",
+            sale["delivery_date"] or "-",
+        )
+
+    @metrics.ui_handler("sales_report")
+    def apply_filters(self):
+        try:
+            self.filters = self.current_filters()
+        except ValueError as e:
+            Messagebox.show_error(str(e), "Invalid Filter", parent=self)
+            return
+        self.pager.reload(first_page=True)
+        total, gst = db.sales_totals(self.filters)
+        self.summary_label.config(
+            text=f"{self.pager.total} sales match · {format_cents(total)} (GST {format_cents(gst)})")
+
+    def clear_filters(self):
+        for var in self.filter_vars.values():
+            var.set("")
+        self.apply_filters()
+
+    def show_sale_details(self, event=None):
+        selected = self.sales_tree.selection()
+        if not selected:
+            return
+        sale_id = self.sales_tree.item(selected[0])["values"][0]
+        lines = db.get_sale_details(sale_id)
+        if not lines:
+            Messagebox.show_info("No line items recorded for this sale.", f"Sale #{sale_id}", parent=self)
+            return
+        text = "\n".join(
+            f"{l['qty']} x {l['name']} @ ${l['unit_price']:.2f} = ${l['line_total']:.2f}" for l in lines
+        )
+        Messagebox.show_info(text, f"Sale #{sale_id}", parent=self)
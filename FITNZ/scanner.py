@@ -0,0 +1,113 @@
+# File: FITNZ/scanner.py
+# ===============================================
+# Code Owner: Umang (US: Product Management)
+# Barcode/SKU scanner fast path for the staff sale screen.
+# ===============================================
+"""
+Keyboard-wedge scanners "type" the code a few milliseconds per key and
+press Enter. WedgeDetector tells such a burst from a person typing, so a
+scan is caught whatever field has focus. ScanIndex resolves the code
+(SKU or barcode) from an in-memory dict built in one query; a code it has
+not seen yet costs one probe of the unique products.sku / products.barcode
+indexes and is then remembered. add_to_sale merges the product into the
+sale lines without any dialogs.
+"""
+
+import time
+
+from . import database_mysql as db
+from . import metrics
+
+
+def normalize(code):
+    return str(code).strip().upper()
+
+
+class ScanIndex:
+    """SKU/barcode -> Product, refreshed from the database in one pass."""
+
+    def __init__(self):
+        self._codes = {}
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._codes)
+
+    def refresh(self):
+        codes = {}
+        for sku, barcode, product in db.get_scan_codes():
+            if sku:
+                codes[normalize(sku)] = product
+            if barcode:
+                codes[normalize(barcode)] = product
+        self._codes = codes
+        self.loaded_at = time.time()
+
+    def lookup(self, code):
+        key = normalize(code)
+        if not key:
+            return None
+        product = self._codes.get(key)
+        if product is not None:
+            metrics.CACHE.inc(cache="scan_index", result="hit")
+            return product
+        metrics.CACHE.inc(cache="scan_index", result="miss")
+        product = db.get_product_by_code(key)
+        if product is not None:
+            self._codes[key] = product
+        return product
+
+
+class WedgeDetector:
+    """
+    Feed it every key press (char, event time in ms). enter() returns the
+    code when the keys since the last pause came at most `max_gap_ms`
+    apart and there were at least `min_len` of them, else None.
+    """
+
+    def __init__(self, min_len=4, max_gap_ms=35):
+        self.min_len = min_len
+        self.max_gap_ms = max_gap_ms
+        self._chars = []
+        self._last = None
+
+    def key(self, char, t_ms):
+        if self._last is None or t_ms - self._last > self.max_gap_ms:
+            self._chars = []
+        self._chars.append(char)
+        self._last = t_ms
+
+    def enter(self, t_ms):
+        burst = self._last is not None and t_ms - self._last <= self.max_gap_ms
+        code = "".join(self._chars) if burst and len(self._chars) >= self.min_len else None
+        self._chars = []
+        self._last = None
+        return code
+
+
+def add_to_sale(sale_items, product, quantity=1):
+    """
+    Merge `product` into the sale lines (list of {'product', 'quantity'}).
+    Returns the line, or None when the stock on hand can't cover it.
+    """
+    for item in sale_items:
+        if item['product'].product_id == product.product_id:
+            if item['quantity'] + quantity > product.stock:
+                return None
+            item['quantity'] += quantity
+            return item
+    if quantity > product.stock:
+        return None
+    item = {'product': product, 'quantity': quantity}
+    sale_items.append(item)
+    return item
+
+
+_index = None
+
+def default_index():
+    global _index
+    if _index is None:
+        _index = ScanIndex()
+        _index.refresh()
+    return _index
@@ -0,0 +1,154 @@
+# File: FITNZ/search.py
+# ===============================================
+# Code Owner: Umang (US: Product Management)
+# Typo-tolerant product search over an in-memory trigram index.
+# ===============================================
+"""
+Names and SKUs are lower-cased, split into words, and each word padded
+pg_trgm style ("  word ") before being cut into trigrams, so "protien"
+still shares " pr", "pro", "rot", ... with "protein". The index maps each
+trigram to the set of products containing it.
+
+A query walks its trigrams rarest first, counting shared trigrams per
+product. Once `max_candidates` products are in play, new ones stop being
+admitted (the rare trigrams have already picked the likely ones), and
+trigrams found in more than `common_cutoff` of the catalogue are only
+counted for existing candidates. Candidates are scored by how much of the
+query they cover (ties by Jaccard similarity); substring hits rank first.
+That keeps a keystroke in the low milliseconds at 100k products.
+
+The index only stores text: callers fetch the ranked ids from the
+database so prices and stock are live. database_mysql notifies it of
+product adds, updates and deletes, so it is kept current one product at a
+time; refresh() rebuilds it from scratch.
+"""
+
+import re
+from collections import defaultdict
+
+from . import database_mysql as db
+
+_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    return " ".join(w for w in _SPLIT.split(str(text).lower()) if w)
+
+
+def trigrams(text):
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    """product_id -> searchable text, with trigram postings for fuzzy lookup."""
+
+    def __init__(self, max_candidates=2000, common_cutoff=0.2):
+        self.max_candidates = max_candidates
+        self.common_cutoff = common_cutoff
+        self._docs = {}                    # product_id -> (text, trigrams)
+        self._postings = defaultdict(set)  # trigram -> {product_id}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, product_id, name, sku=None):
+        """Index (or re-index) one product."""
+        self.remove(product_id)
+        text = normalize(f"{name} {sku or ''} {product_id}")
+        grams = frozenset(trigrams(text))
+        self._docs[product_id] = (text, grams)
+        for g in grams:
+            self._postings[g].add(product_id)
+
+    def remove(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for g in doc[1]:
+            ids = self._postings.get(g)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self._postings[g]
+
+    def rebuild(self, docs):
+        """Replace the whole index from (product_id, name, sku) rows."""
+        self._docs = {}
+        self._postings = defaultdict(set)
+        for product_id, name, sku in docs:
+            self.add(product_id, name, sku)
+
+    def search(self, query, limit=50, min_score=0.35):
+        """Ranked product ids for `query`, best first."""
+        needle = normalize(query)
+        grams = trigrams(needle)
+        if not grams:
+            return []
+        postings = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        common = max(1, int(len(self._docs) * self.common_cutoff))
+        counts = {}
+        for ids in postings:
+            if not ids:
+                continue
+            if len(counts) >= self.max_candidates or len(ids) > common:
+                for pid in counts:
+                    if pid in ids:
+                        counts[pid] += 1
+                continue
+            for pid in ids:
+                if pid in counts:
+                    counts[pid] += 1
+                elif len(counts) < self.max_candidates:
+                    counts[pid] = 1
+        if not counts:
+            # every query trigram is common: take candidates from the rarest one
+            rarest = next(ids for ids in postings if ids) if any(postings) else ()
+            for pid in list(rarest)[:self.max_candidates]:
+                counts[pid] = sum(1 for ids in postings if pid in ids)
+
+        size = len(grams)
+        floor = min_score * size
+        ranked = []
+        for pid, shared in counts.items():
+            if shared < floor:
+                continue
+            text, doc_grams = self._docs[pid]
+            jaccard = shared / (size + len(doc_grams) - shared)
+            ranked.append((needle in text, shared / size, jaccard, pid))
+        ranked.sort(reverse=True)
+        return [pid for _, _, _, pid in ranked[:limit]]
+
+
+_index = None
+
+def _on_product_changed(product_id):
+    if _index is None:
+        return
+    row = db.get_search_doc(product_id)
+    if row is None:
+        _index.remove(product_id)
+    else:
+        _index.add(*row)
+
+def default_index():
+    """The shared catalogue index, built on first use and kept current via database_mysql."""
+    global _index
+    if _index is None:
+        _index = TrigramIndex()
+        _index.rebuild(db.get_search_docs())
+        db.on_product_changed(_on_product_changed)
+    return _index
+
+def refresh():
+    default_index().rebuild(db.get_search_docs())
+
+def search_products(query, limit=50):
+    """Fuzzy search returning live Product objects, best match first."""
+    ids = default_index().search(query, limit)
+    found = db.get_products_by_ids(ids)
+    return [found[pid] for pid in ids if pid in found]
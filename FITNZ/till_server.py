@@ -0,0 +1,312 @@
+# File: FITNZ/till_server.py
+# ===============================================
+# Code Owner: Imran (US: Admin/Reports - Core DB Access & Management)
+# Optional local HTTP/JSON API so thin tills and kiosks share one process,
+# one connection pool and one warm product cache.
+# ===============================================
+"""
+Plain asyncio (stdlib only), HTTP/1.1 with keep-alive, JSON in and out.
+
+    GET  /health
+    GET  /products/<product_id>
+    GET  /products?ids=P001,P002
+    POST /price   {"items": [{"product_id": "P001", "qty": 2}], "customer_id": "C101",
+                   "student": false, "points": 0}
+    POST /sales   same body + "payment_method", "delivery_date" (YYYY-MM-DD)
+    GET  /stats   cache/batch counters and the DB instrumentation snapshot
+
+Product lookups from all connections that arrive in the same event-loop
+tick are coalesced into one batched query (see ProductLoader), and results
+stay cached for --ttl seconds; a sale drops its products from the cache.
+Database work runs on a thread pool over the pooled connections.
+
+    python -m FITNZ.till_server --port 8765 --pool 8
+"""
+
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+
+from . import database_mysql as db
+from . import db_queries as q
+from . import metrics
+from .checkout import CheckoutService, CheckoutError
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ProductLoader:
+    """
+    Coalesces concurrent product lookups into one query per loop tick and
+    caches the products found (LRU of max_size; unknown ids are not cached).
+    """
+
+    def __init__(self, ttl=5.0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache = OrderedDict()  # product_id -> (expires_at, Product)
+        self._pending = {}  # product_id -> Future
+        self._scheduled = False
+        self.stats = {"hits": 0, "misses": 0, "batches": 0, "batched_ids": 0}
+
+    async def get_many(self, product_ids):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        found, waiting = {}, []
+        for pid in product_ids:
+            hit = self._cache.get(pid)
+            if hit and hit[0] > now:
+                self._cache.move_to_end(pid)
+                self.stats["hits"] += 1
+                metrics.CACHE.inc(cache="till_products", result="hit")
+                found[pid] = hit[1]
+                continue
+            fut = self._pending.get(pid)
+            if fut is None:
+                self.stats["misses"] += 1
+                metrics.CACHE.inc(cache="till_products", result="miss")
+                fut = self._pending[pid] = loop.create_future()
+            waiting.append((pid, fut))
+        if waiting and not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush)
+        for pid, fut in waiting:
+            found[pid] = await asyncio.shield(fut)
+        return found
+
+    def invalidate(self, product_ids):
+        for pid in product_ids:
+            self._cache.pop(pid, None)
+
+    def _flush(self):
+        self._scheduled = False
+        batch, self._pending = self._pending, {}
+        asyncio.ensure_future(self._fetch(batch))
+
+    async def _fetch(self, batch):
+        loop = asyncio.get_running_loop()
+        self.stats["batches"] += 1
+        self.stats["batched_ids"] += len(batch)
+        try:
+            rows = await loop.run_in_executor(None, db.get_products_by_ids, list(batch))
+        except Exception as e:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        expires = loop.time() + self.ttl
+        for pid, fut in batch.items():
+            product = rows.get(pid)
+            if product is not None:
+                self._cache[pid] = (expires, product)
+                self._cache.move_to_end(pid)
+            if not fut.done():
+                fut.set_result(product)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+
+def _product_json(p):
+    return {"product_id": p.product_id, "name": p.name, "price": p.price,
+            "price_cents": p.price_cents, "stock": p.stock}
+
+
+def _quote_json(quote):
+    return {
+        "lines": [line.as_dict() for line in quote.lines],
+        "subtotal": quote.subtotal, "discount": quote.discount,
+        "points_used": quote.points_used, "points_discount": quote.points_discount,
+        "net": quote.net, "gst": quote.gst, "total": quote.total,
+        "total_cents": int(quote.total_cents),
+    }
+
+
+class TillServer:
+    def __init__(self, ttl=5.0):
+        self.products = ProductLoader(ttl)
+        self.requests = 0
+
+    async def _run_db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # ----- request helpers -----
+    async def _basket(self, body):
+        items = body.get("items") or []
+        if not isinstance(items, list) or not items or not all(isinstance(it, dict) for it in items):
+            raise HttpError(400, "items must be a non-empty list of objects")
+        ids = [str(it.get("product_id")) for it in items]
+        products = await self.products.get_many(ids)
+        basket = []
+        for pid, it in zip(ids, items):
+            qty = it.get("qty", 1)
+            if isinstance(qty, bool) or not isinstance(qty, int) or qty < 1:
+                raise HttpError(400, f"qty for {pid} must be a positive integer")
+            if products.get(pid) is None:
+                raise HttpError(404, f"product {pid} not found")
+            basket.append({'product': products[pid], 'quantity': qty})
+        return basket
+
+    async def _service(self, body):
+        basket = await self._basket(body)
+        customer = None
+        if body.get("customer_id"):
+            customer = await self._run_db(db.get_user_by_user_id, str(body["customer_id"]))
+            if customer is None:
+                raise HttpError(404, f"customer {body['customer_id']} not found")
+        svc = CheckoutService.from_cart(basket, customer, bool(body.get("student")))
+        points = body.get("points") or 0
+        if isinstance(points, bool) or not isinstance(points, int) or points < 0:
+            raise HttpError(400, "points must be a non-negative integer")
+        if points:
+            svc.redeem_points(points)
+        return svc
+
+    @staticmethod
+    def _delivery_date(body):
+        value = body.get("delivery_date")
+        if not value:
+            return date.today()
+        try:
+            return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise HttpError(400, "delivery_date must be YYYY-MM-DD")
+
+    # ----- routes -----
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        if path == "/health":
+            return 200, {"ok": True}
+        if path == "/stats":
+            return 200, {"requests": self.requests, "products": self.products.stats,
+                         "db": q.snapshot()}
+        if path == "/products" or path.startswith("/products/"):
+            if method != "GET":
+                raise HttpError(405, "use GET")
+            if path == "/products":
+                ids = [i for i in ",".join(parse_qs(url.query).get("ids", [])).split(",") if i]
+                found = await self.products.get_many(ids)
+                return 200, {"products": [_product_json(p) for p in found.values() if p]}
+            pid = path[len("/products/"):]
+            if not pid or "/" in pid:
+                raise HttpError(404, f"no route for {path}")
+            product = (await self.products.get_many([pid]))[pid]
+            if product is None:
+                raise HttpError(404, f"product {pid} not found")
+            return 200, _product_json(product)
+        if path in ("/price", "/sales"):
+            if method != "POST":
+                raise HttpError(405, "use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(400, "body must be JSON")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "body must be a JSON object")
+            svc = await self._service(payload)
+            if path == "/price":
+                return 200, _quote_json(svc.quote())
+            delivery = self._delivery_date(payload)
+            ids = [line['product'].product_id for line in svc.items]
+            try:
+                receipt = await self._run_db(svc.checkout, payload.get("payment_method", "Card"), None, delivery)
+            finally:
+                self.products.invalidate(ids)
+            return 201, receipt
+        raise HttpError(404, f"no route for {path}")
+
+    # ----- HTTP -----
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except CheckoutError as e:
+                    status, payload = 409, {"error": str(e)}
+                except Exception as e:
+                    print("till_server error:", e)
+                    status, payload = 500, {"error": "internal error"}
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload, default=str).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, pool=8, ttl=5.0, ready=None):
+    """Run the server until cancelled. `ready` (an asyncio.Event) is set once listening."""
+    db.setup_database()
+    db.enable_pool(pool)
+    dump = db.start_stats_dump()
+    metrics.start_exporter()
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=pool, thread_name_prefix="till-db"))
+    app = TillServer(ttl)
+    server = await asyncio.start_server(app.handle, host, port)
+    print(f"FitNZ till server on http://{host}:{port} (pool={pool}, ttl={ttl}s)")
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if dump:
+            dump.set()
+        db.disable_pool()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for tills and kiosks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pool", type=int, default=8, help="pooled DB connections / worker threads")
+    parser.add_argument("--ttl", type=float, default=5.0, help="product cache lifetime in seconds")
+    parser.add_argument("--db", help="SQLite file to serve (default: the app database)")
+    args = parser.parse_args(argv)
+    if args.db:
+        db.DB_PATH = args.db
+    try:
+        asyncio.run(serve(args.host, args.port, args.pool, args.ttl))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
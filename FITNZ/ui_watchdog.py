@@ -0,0 +1,220 @@
+# File: FITNZ/ui_watchdog.py
+# ===============================================
+# Code Owner: Om (Initial Developer/Core Structure)
+# Tk event-loop stall detection and on-demand UI profiling.
+# ===============================================
+"""
+StallWatchdog keeps an after() heartbeat on the Tk main loop and a monitor
+thread that watches it. When the heartbeat is late by more than the
+threshold, the monitor grabs the main thread's Python stack from
+sys._current_frames(), so the log says which handler (search_products,
+process_sale, ...) held the loop, and how long for. Heartbeat lateness is
+kept for latency percentiles.
+
+Profiler is the manager's opt-in toggle: "cprofile" mode runs cProfile on
+the main thread and writes a .prof plus a text summary; "sampling" mode
+samples the main thread's stack from a helper thread and writes collapsed
+stacks (flamegraph.pl / speedscope input). Files go to FITNZ/profiles/.
+
+database.env: UI_STALL_MS (default 500, 0 disables the watchdog) and
+UI_PROFILER (cprofile or sampling, default cprofile).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "profiles")
+
+
+def _stamp():
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def _main_stack(main_id, limit=40):
+    frame = sys._current_frames().get(main_id)
+    return traceback.format_stack(frame, limit=limit) if frame else []
+
+
+class StallWatchdog:
+    """Reports Tk main-loop stalls longer than `threshold` seconds, with the blocking stack."""
+
+    HUNG_AFTER = 5.0  # seconds blocked before the stall is logged without waiting for it to end
+
+    def __init__(self, root, threshold=0.5, interval_ms=50, log_path=None, keep=50):
+        self.root = root
+        self.threshold = threshold
+        self.interval_ms = interval_ms
+        self.log_path = log_path or os.path.join(PROFILE_DIR, "stalls.log")
+        self.stalls = deque(maxlen=keep)      # most recent stall reports
+        self.lateness = deque(maxlen=10000)   # heartbeat lateness, seconds
+        self._main_id = threading.main_thread().ident
+        self._beat = time.perf_counter()
+        self._job = None
+        self._stop = threading.Event()
+        self._current = None                  # stall being observed right now
+
+    def start(self):
+        self._beat = time.perf_counter()
+        self._job = self.root.after(self.interval_ms, self._heartbeat)
+        threading.Thread(target=self._monitor, name="ui-watchdog", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._job:
+            try:
+                self.root.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+
+    # main thread
+    def _heartbeat(self):
+        now = time.perf_counter()
+        self.lateness.append(max(0.0, now - self._beat - self.interval_ms / 1000))
+        self._beat = now
+        self._job = self.root.after(self.interval_ms, self._heartbeat)
+
+    # monitor thread
+    def _monitor(self):
+        poll = min(self.threshold / 4, self.interval_ms / 1000)
+        while not self._stop.wait(poll):
+            blocked = time.perf_counter() - self._beat - self.interval_ms / 1000
+            if blocked >= self.threshold:
+                if self._current is None:
+                    self._current = {"started": datetime.now().isoformat(timespec="milliseconds"),
+                                     "stack": _main_stack(self._main_id), "logged": False}
+                self._current["blocked_s"] = blocked
+                if blocked >= self.HUNG_AFTER and not self._current["logged"]:
+                    # a till that never recovers still leaves its stack behind
+                    self._current["logged"] = True
+                    self._write(self._current, " and counting")
+            elif self._current is not None:
+                stall, self._current = self._current, None
+                self.stalls.append(stall)
+                self._write(stall)
+
+    def _write(self, stall, note=""):
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(f"{stall['started']} UI stalled {stall['blocked_s'] * 1000:.0f} ms{note} in:\n")
+                f.write("".join(stall["stack"]) + "\n")
+        except OSError as e:
+            print("ui watchdog error:", e)
+
+    def latency(self):
+        """Heartbeat lateness percentiles in ms."""
+        values = sorted(self.lateness)
+        if not values:
+            return {}
+        pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000
+        return {"n": len(values), "p50_ms": pick(.5), "p95_ms": pick(.95), "p99_ms": pick(.99),
+                "max_ms": values[-1] * 1000, "stalls": len(self.stalls)}
+
+
+class Profiler:
+    """Start/stop profiling of the UI thread; stop() returns the file written."""
+
+    def __init__(self, mode="cprofile", interval=0.005, out_dir=PROFILE_DIR):
+        self.mode = mode
+        self.interval = interval
+        self.out_dir = out_dir
+        self._profile = None
+        self._samples = None
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._profile is not None or self._samples is not None
+
+    def start(self):
+        if self.running:
+            return
+        if self.mode == "sampling":
+            self._samples = Counter()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._sample, args=(threading.main_thread().ident,),
+                                            name="ui-sampler", daemon=True)
+            self._thread.start()
+        else:
+            # cProfile only sees the thread that enables it: call from the Tk thread.
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _sample(self, main_id):
+        samples, stop = self._samples, self._stop
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(main_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        if not self.running:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        if self._profile is not None:
+            profile, self._profile = self._profile, None
+            profile.disable()
+            path = os.path.join(self.out_dir, f"ui-{_stamp()}.prof")
+            profile.dump_stats(path)
+            text = io.StringIO()
+            pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(40)
+            with open(path[:-5] + ".txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            return path
+        self._stop.set()
+        self._thread.join()
+        samples, self._samples = self._samples, None
+        path = os.path.join(self.out_dir, f"ui-{_stamp()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def toggle(self):
+        """Start if stopped; otherwise stop and return the profile path."""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+
+_watchdog = None
+_profiler = None
+
+def install(root):
+    """Start the stall watchdog on `root` as configured in database.env; returns it or None."""
+    global _watchdog
+    from .database_mysql import config
+    threshold_ms = float(config.get("UI_STALL_MS", 500))
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
+    if threshold_ms > 0:
+        _watchdog = StallWatchdog(root, threshold_ms / 1000).start()
+    return _watchdog
+
+def watchdog():
+    return _watchdog
+
+def profiler():
+    global _profiler
+    if _profiler is None:
+        from .database_mysql import config
+        _profiler = Profiler(config.get("UI_PROFILER", "cprofile"))
+    return _profiler